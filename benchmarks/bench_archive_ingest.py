@@ -0,0 +1,109 @@
+"""
+Ingesting PDFs from zip/tar archives: streamed vs. extracted to disk.
+
+    python -m benchmarks.bench_archive_ingest --papers 10
+    python -m benchmarks.bench_archive_ingest --papers 50 --paragraphs 12 --read-only
+
+Packs a synthetic corpus into a zip and a tar.gz, then ingests each archive
+by streaming its members (ingest_archive) and, for comparison, by extracting
+it to a temporary folder and running ingest_folder. Also times a read-only
+pass over each archive and records its tracemalloc peak, which stays near a
+few members' size however large the archive is. --read-only skips the
+ingest runs (no embedding model needed).
+"""
+import os
+import sys
+import shutil
+import tarfile
+import zipfile
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from ingest_papers import ingest_archive, ingest_folder
+from memory.vector_db import ResearchMemory
+from utils.archives import iter_archive, prefetch
+
+
+def pack(papers, workdir):
+    archives = {"zip": os.path.join(workdir, "papers.zip"), "tar.gz": os.path.join(workdir, "papers.tar.gz")}
+    with zipfile.ZipFile(archives["zip"], "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for paper in papers:
+            archive.write(paper["path"], f"dump/{os.path.basename(paper['path'])}")
+    with tarfile.open(archives["tar.gz"], "w:gz") as archive:
+        for paper in papers:
+            archive.add(paper["path"], f"dump/{os.path.basename(paper['path'])}")
+    return archives
+
+
+def read_pass(archive_path):
+    """Bytes read and tracemalloc peak for streaming every member without ingesting"""
+    tracemalloc.start()
+    total = 0
+    for member in prefetch(iter_archive(archive_path)):
+        total += len(member.data or b"")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return total, peak
+
+
+def extract_and_ingest(archive_path, workdir, memory):
+    folder = tempfile.mkdtemp(dir=workdir, prefix="extracted_")
+    try:
+        shutil.unpack_archive(archive_path, folder)
+        return ingest_folder(os.path.join(folder, "dump"), memory=memory)
+    finally:
+        shutil.rmtree(folder)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming ingestion from archives")
+    parser.add_argument("--papers", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=4, help="Paragraphs per section, controls PDF size")
+    parser.add_argument("--read-only", action="store_true", help="Only time reading the archives")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    sizes = {}
+    with tempfile.TemporaryDirectory(prefix="archive_bench_") as workdir:
+        papers = generate_corpus(os.path.join(workdir, "corpus"), n_papers=args.papers,
+                                 paragraphs_per_section=args.paragraphs)
+        archives = pack(papers, workdir)
+        pdf_bytes = sum(os.path.getsize(paper["path"]) for paper in papers)
+
+        for kind, path in archives.items():
+            read, peak = timer.run(f"read:{kind}", read_pass, path, items=args.papers)
+            sizes[kind] = {"archive_bytes": os.path.getsize(path), "pdf_bytes": read, "read_peak_bytes": peak}
+            if args.read_only:
+                continue
+            streamed = ResearchMemory(persist_dir=os.path.join(workdir, f"chroma_stream_{kind}"))
+            results = timer.run(f"stream:{kind}", ingest_archive, path, memory=streamed, items=args.papers)
+            extracted = ResearchMemory(persist_dir=os.path.join(workdir, f"chroma_extract_{kind}"))
+            timer.run(f"extract+folder:{kind}", extract_and_ingest, path, workdir, extracted, items=args.papers)
+            sizes[kind]["stored"] = sum(1 for r in results if r["success"])
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    print(f"\n   {'archive':8} {'archive MB':>11} {'PDF MB':>8} {'read MB/s':>10} {'read peak MB':>13}", file=sys.stderr)
+    for kind, s in sizes.items():
+        read_s = stages[f"read:{kind}"]["total_s"]
+        print(f"   {kind:8} {s['archive_bytes'] / 1e6:>11.2f} {s['pdf_bytes'] / 1e6:>8.2f} "
+              f"{s['pdf_bytes'] / 1e6 / read_s:>10.1f} {s['read_peak_bytes'] / 1e6:>13.2f}", file=sys.stderr)
+        if not args.read_only:
+            stream, extract = stages[f"stream:{kind}"]["total_s"], stages[f"extract+folder:{kind}"]["total_s"]
+            print(f"            streamed {args.papers / stream:.2f} PDFs/s vs extract + folder "
+                  f"{args.papers / extract:.2f} PDFs/s ({s['stored']} stored)", file=sys.stderr)
+
+    params = {"papers": args.papers, "paragraphs": args.paragraphs, "pdf_bytes": pdf_bytes,
+              "read_only": args.read_only}
+    write_report(build_report("archive_ingest", params, stages, extra={"archives": sizes}), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Prompt tokens of per-paper chat excerpts with and without chunk merging.
+
+    python -m benchmarks.bench_chat_context --papers 5 --turns 20
+    python -m benchmarks.bench_chat_context --paragraphs 12 --neighbors 0,1,2
+
+Stores synthetic papers with the ingest chunking (1000-word chunks, 200-word
+overlap) and asks --turns questions per paper, each retrieving the top-3
+chunks as `main.py --ask` does. For every turn it builds the excerpt block
+from the raw hits, from the hits merged into contiguous passages and, for
+each small-to-big neighbour count, from the expanded and merged chunks.
+Reports estimated excerpt tokens per turn, tokens saved by merging and the
+time expansion and merging add.
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_paper_text
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from main import format_excerpts
+from memory.vector_db import ResearchMemory, merge_contexts
+from utils.text_chunker import chunk_text, estimate_tokens
+
+QUESTIONS = [
+    "What was the methodology?",
+    "Which dataset and baselines were used in the experiments?",
+    "What are the main results?",
+    "What limitations and future work are mentioned?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark merging of retrieved chat excerpts")
+    parser.add_argument("--papers", type=int, default=3)
+    parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs per section (paper length)")
+    parser.add_argument("--turns", type=int, default=12, help="Questions per paper")
+    parser.add_argument("--n-results", type=int, default=3, help="Chunks retrieved per turn")
+    parser.add_argument("--neighbors", default="1", help="Comma-separated small-to-big neighbour counts")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    rng = random.Random(0)
+    neighbor_counts = [int(n) for n in args.neighbors.split(",")]
+    tokens = {mode: [] for mode in ["raw", "merged"] + [f"expand:{n}" for n in neighbor_counts]}
+    saved_by_merge = {mode: [] for mode in tokens if mode != "raw"}
+    passages = []
+
+    with tempfile.TemporaryDirectory(prefix="chat_context_bench_") as workdir:
+        memory = ResearchMemory(persist_dir=os.path.join(workdir, "chroma_db"))
+        for i in range(args.papers):
+            paper = generate_paper_text(seed=i, paragraphs_per_section=args.paragraphs)
+            chunks = chunk_text(paper["text"])
+            paper_id = timer.run("store_paper", memory.store_paper, paper["text"],
+                                 {"title": paper["title"], "topic": paper["topic"]}, chunks, items=len(chunks))
+            words = paper["text"].split()
+            for turn in range(args.turns):
+                # Alternate generic questions with phrases from the paper, which hit overlapping chunks
+                if turn % 2:
+                    start = rng.randrange(max(1, len(words) - 12))
+                    question = " ".join(words[start:start + 12])
+                else:
+                    question = QUESTIONS[turn // 2 % len(QUESTIONS)]
+                hits = timer.run("retrieve", memory.get_relevant_context, question, n_results=args.n_results,
+                                 filter_dict={"paper_id": paper_id})
+                raw = estimate_tokens(format_excerpts(hits))
+                merged = timer.run("merge", merge_contexts, hits, items=len(hits))
+                tokens["raw"].append(raw)
+                tokens["merged"].append(estimate_tokens(format_excerpts(merged)))
+                saved_by_merge["merged"].append(raw - tokens["merged"][-1])
+                passages.append(len(merged))
+                for n in neighbor_counts:
+                    expanded = timer.run(f"expand:{n}", memory.expand_contexts, hits, neighbors=n)
+                    merged = timer.run(f"merge:{n}", merge_contexts, expanded, items=len(expanded))
+                    tokens[f"expand:{n}"].append(estimate_tokens(format_excerpts(merged)))
+                    saved_by_merge[f"expand:{n}"].append(estimate_tokens(format_excerpts(expanded))
+                                                         - tokens[f"expand:{n}"][-1])
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    summary = {mode: {"mean_tokens": statistics.mean(values),
+                      "mean_saved_by_merge": statistics.mean(saved_by_merge[mode]) if mode in saved_by_merge else 0}
+               for mode, values in tokens.items()}
+    print(f"\n   {'excerpts':12} {'tokens/turn':>12} {'saved by merge':>15}", file=sys.stderr)
+    for mode, s in summary.items():
+        print(f"   {mode:12} {s['mean_tokens']:>12.0f} {s['mean_saved_by_merge']:>15.0f}", file=sys.stderr)
+    saved = 1 - summary["merged"]["mean_tokens"] / summary["raw"]["mean_tokens"]
+    print(f"   merging top-{args.n_results} hits: {saved:.1%} fewer excerpt tokens, "
+          f"{statistics.mean(passages):.2f} passages per turn", file=sys.stderr)
+
+    params = {"papers": args.papers, "paragraphs": args.paragraphs, "turns": args.turns,
+              "n_results": args.n_results, "neighbors": neighbor_counts}
+    write_report(build_report("chat_context", params, stages,
+                              extra={"tokens": summary, "passages_per_turn": statistics.mean(passages)}),
+                 args.output)
+
+
+if __name__ == "__main__":
+    main()
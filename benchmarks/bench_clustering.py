@@ -0,0 +1,86 @@
+"""
+Library topic clustering at scale, without Chroma in the loop.
+
+    python -m benchmarks.bench_clustering --papers 100000
+    python -m benchmarks.bench_clustering --papers 20000 --chunks-per-paper 30 --topics 50
+
+Streams synthetic chunk embeddings (papers drawn around --topics topic
+centers) through the per-paper mean reduction in Chroma-sized batches, then
+times mini-batch k-means, the full assignment pass and the incremental
+assignment of 1% new papers. Reports cluster purity against the generating
+topics. Reading embeddings out of Chroma is not included; see
+bench_exact_search for store throughput.
+"""
+import os
+import sys
+import argparse
+from collections import Counter
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from memory.clustering import _PaperMeans, kmeans, assign, auto_cluster_count
+from memory.retrieval import normalize
+from config import SNAPSHOT_BATCH_SIZE
+
+
+def purity(labels, topics):
+    by_cluster = {}
+    for label, topic in zip(labels, topics):
+        by_cluster.setdefault(label, Counter())[topic] += 1
+    return sum(c.most_common(1)[0][1] for c in by_cluster.values()) / len(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark paper vectors and mini-batch k-means")
+    parser.add_argument("--papers", type=int, default=100000)
+    parser.add_argument("--chunks-per-paper", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=100, help="Generating topic centers")
+    parser.add_argument("--k", type=int, default=0, help="Clusters (default: about sqrt(papers / 2))")
+    parser.add_argument("--noise", type=float, default=1.5, help="Paper spread around its topic center")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    timer = StageTimer()
+    centers = rng.standard_normal((args.topics, args.dim)).astype(np.float32)
+    topics = rng.integers(0, args.topics, args.papers)
+
+    means = _PaperMeans()
+    chunks = args.papers * args.chunks_per_paper
+    papers_per_batch = max(1, SNAPSHOT_BATCH_SIZE // args.chunks_per_paper)
+    for start in range(0, args.papers, papers_per_batch):
+        rows = np.arange(start, min(start + papers_per_batch, args.papers))
+        paper_centers = centers[topics[rows]] + args.noise * rng.standard_normal((len(rows), args.dim))
+        embeddings = np.repeat(paper_centers, args.chunks_per_paper, axis=0)
+        embeddings += 2.0 * rng.standard_normal(embeddings.shape)
+        paper_ids = [f"paper{row}" for row in np.repeat(rows, args.chunks_per_paper)]
+        timer.run("paper_means", means.add, paper_ids, embeddings.astype(np.float32),
+                  items=len(paper_ids))
+    _, vectors = timer.run("paper_means_finish", means.result, items=args.papers)
+
+    k = args.k or auto_cluster_count(args.papers)
+    existing = int(args.papers * 0.99)
+    centroids = timer.run("kmeans", kmeans, vectors[:existing], k, items=existing)
+    labels = timer.run("assign", assign, vectors[:existing], centroids, items=existing)
+    timer.run("incremental_assign", assign, vectors[existing:], normalize(centroids), items=args.papers - existing)
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    total = sum(s["total_s"] for s in stages.values())
+    quality = {"k": k, "purity": purity(labels.tolist(), topics[:existing].tolist()),
+               "clusters_used": int(len(np.unique(labels)))}
+    print(f"\n   {args.papers:,} papers / {chunks:,} chunks in {total:.1f}s; k={k}, "
+          f"purity vs {args.topics} generating topics {quality['purity']:.3f}", file=sys.stderr)
+
+    params = {"papers": args.papers, "chunks_per_paper": args.chunks_per_paper, "dim": args.dim,
+              "topics": args.topics, "noise": args.noise}
+    write_report(build_report("clustering", params, stages, extra={"quality": quality}), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Near-duplicate detection at library scale.
+
+    python -m benchmarks.bench_dedup --papers 10000 --versions 0.05
+    python -m benchmarks.bench_dedup --papers 100000 --paragraphs 1 --workdir /tmp/dedup_bench
+
+Builds a library of synthetic papers where a fraction are revised versions
+of earlier ones (words edited, a paragraph added, as between arXiv v1 and
+v2). Each paper is looked up in the MinHash LSH index before being added,
+exactly as ingest does. Reports signature/lookup cost, how lookup latency
+evolves as the index grows (flat = no pairwise comparison) and
+precision/recall of the flagged versions.
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_paper_text, _paragraph
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from config import DEDUP_THRESHOLD
+from memory.dedup import DuplicateIndex, minhash_signature
+
+
+def revise(text, rng, edit_rate=0.01):
+    """A later version of the paper: a few words changed and one paragraph added"""
+    words = text.split(" ")
+    for _ in range(int(len(words) * edit_rate)):
+        words[rng.randrange(len(words))] = rng.choice(["improved", "novel", "robust", "revised", "extended"])
+    return " ".join(words) + "\n" + _paragraph(rng, 5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate detection")
+    parser.add_argument("--papers", type=int, default=5000)
+    parser.add_argument("--paragraphs", type=int, default=1, help="Paragraphs per section (paper length)")
+    parser.add_argument("--versions", type=float, default=0.05, help="Fraction of papers that revise an earlier one")
+    parser.add_argument("--edit-rate", type=float, default=0.01, help="Fraction of words changed in a revision")
+    parser.add_argument("--threshold", type=float, default=DEDUP_THRESHOLD)
+    parser.add_argument("--workdir", help="Keep the index here (default: temporary directory)")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    timer = StageTimer()
+    texts, groups = [], []  # groups[i]: id of the first version of paper i
+    true_pairs, flagged_pairs = set(), set()
+    growth = []  # mean lookup latency per tenth of the library
+
+    def run(workdir):
+        index = DuplicateIndex(os.path.join(workdir, "dedup.sqlite"))
+        window = []
+        for i in range(args.papers):
+            if texts and rng.random() < args.versions:
+                original = rng.randrange(len(texts))
+                text = revise(texts[original], rng, args.edit_rate)
+                true_pairs.add((original, i))
+                groups.append(groups[original])
+            else:
+                text = generate_paper_text(seed=i, paragraphs_per_section=args.paragraphs)["text"]
+                groups.append(i)
+            texts.append(text)
+
+            signature = timer.run("signature", minhash_signature, text)
+            with timer.stage("lookup"):
+                matches = index.query(signature, threshold=args.threshold)
+            window.append(timer.samples["lookup"][-1])
+            flagged_pairs.update((int(m["paper_id"]), i) for m in matches)
+            timer.run("add", index.add, str(i), signature)
+
+            if (i + 1) % max(1, args.papers // 10) == 0:
+                growth.append({"papers": i + 1, "mean_lookup_ms": 1000 * sum(window) / len(window)})
+                window.clear()
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        run(args.workdir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="dedup_bench_") as workdir:
+            run(workdir)
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    print(f"\n{'index size':>12} {'lookup ms':>10}", file=sys.stderr)
+    for point in growth:
+        print(f"{point['papers']:>12,} {point['mean_lookup_ms']:>10.3f}", file=sys.stderr)
+
+    # A revision must be linked to the paper it revised; any flag within one version family is correct
+    hits = len(true_pairs & flagged_pairs)
+    correct = sum(1 for a, b in flagged_pairs if groups[a] == groups[b])
+    quality = {
+        "true_versions": len(true_pairs),
+        "flagged": len(flagged_pairs),
+        "recall": hits / len(true_pairs) if true_pairs else None,
+        "precision": correct / len(flagged_pairs) if flagged_pairs else None,
+    }
+    print(f"\n   versions: {quality['true_versions']}  flagged: {quality['flagged']}  "
+          f"recall: {quality['recall']}  precision: {quality['precision']}", file=sys.stderr)
+
+    params = {"papers": args.papers, "versions": args.versions, "edit_rate": args.edit_rate,
+              "threshold": args.threshold}
+    write_report(build_report("dedup", params, stages, extra={"lookup_growth": growth, "quality": quality}),
+                 args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Chunk embedding throughput per CPU backend, with an agreement check.
+
+    python -m benchmarks.bench_embeddings --chunks 2000
+    python -m benchmarks.bench_embeddings --backends torch,onnx,onnx-int8 --threads 4 --batch-sizes 32,64,128
+
+Every backend embeds the same synthetic chunks; the first backend is the
+reference and the others must agree with it (row-wise cosine similarity)
+within --tolerance. Exits non-zero if any backend disagrees.
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_paper_text
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from config import EMBEDDING_MODEL
+from memory.embeddings import load_embedding_model
+from utils.text_chunker import chunk_text
+
+
+def make_chunks(n_chunks):
+    """Chunks of mixed length (like real papers) so length-sorted batching matters"""
+    chunks, seed = [], 0
+    while len(chunks) < n_chunks:
+        text = generate_paper_text(seed=seed, paragraphs_per_section=3)["text"]
+        chunks.extend(chunk_text(text, chunk_size=60 + (seed % 4) * 60, overlap=20))
+        seed += 1
+    return chunks[:n_chunks]
+
+
+def agreement(reference, embeddings):
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    cosine = np.sum(reference * embeddings, axis=1)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8", help="First one is the agreement reference")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = library default)")
+    parser.add_argument("--batch-sizes", default="64")
+    parser.add_argument("--tolerance", type=float, default=0.98, help="Minimum row-wise cosine vs. the reference")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    timer = StageTimer()
+    reference = None
+    results = {}
+
+    for backend in args.backends.split(","):
+        model = timer.run(f"load:{backend}", load_embedding_model, EMBEDDING_MODEL, backend, args.threads)
+        model.encode(chunks[:16])  # warm-up (graph optimization, allocator)
+        for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+            stage = f"encode:{backend}:bs{batch_size}"
+            embeddings = timer.run(stage, model.encode, chunks, batch_size=batch_size,
+                                   convert_to_numpy=True, items=len(chunks))
+            result = {"chunks_per_s": timer.summary()[stage]["items_per_s"]}
+            if reference is None:
+                reference = embeddings
+            else:
+                result.update(agreement(reference, embeddings))
+                result["within_tolerance"] = result["min_cosine"] >= args.tolerance
+            results[stage] = result
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    print(f"\n{'backend / batch':32} {'chunks/s':>10} {'min cos':>9} {'mean cos':>9}", file=sys.stderr)
+    for stage, r in results.items():
+        cos = f"{r['min_cosine']:>9.4f} {r['mean_cosine']:>9.4f}" if "min_cosine" in r else f"{'(ref)':>9} {'':>9}"
+        flag = "" if r.get("within_tolerance", True) else "  ⚠️ below tolerance"
+        print(f"{stage:32} {r['chunks_per_s']:>10.1f} {cos}{flag}", file=sys.stderr)
+
+    params = {"chunks": args.chunks, "backends": args.backends, "threads": args.threads,
+              "batch_sizes": args.batch_sizes, "tolerance": args.tolerance, "model": EMBEDDING_MODEL}
+    write_report(build_report("embeddings", params, stages, extra={"backends": results}), args.output)
+    if not all(r.get("within_tolerance", True) for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Equation page prefilter: share of pages kept and prompt tokens saved.
+
+    python -m benchmarks.bench_equation_pages --papers 10
+    python -m benchmarks.bench_equation_pages --paragraphs 12 --context-blocks -1
+
+Generates papers with equations (and a few without, which should fall back
+to the full text), runs the PyMuPDF prefilter and compares the estimated
+prompt tokens of the equations request with the full extracted text.
+Reports pages kept, token savings, how many of the generated numbered
+equations made it into the excerpt and the prefilter's time per paper.
+"""
+import os
+import re
+import sys
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_paper_pdf
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from config import EQUATION_CONTEXT_BLOCKS
+from extractors.text_extractor import extract_text_from_pdf
+from processors.equation_pages import build_equation_context
+from utils.text_chunker import estimate_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the equation page prefilter")
+    parser.add_argument("--papers", type=int, default=8)
+    parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs per section, controls page count")
+    parser.add_argument("--equations", type=int, default=6, help="Numbered equations per paper")
+    parser.add_argument("--without-equations", type=int, default=2, help="Extra papers with no equations")
+    parser.add_argument("--context-blocks", type=int, default=EQUATION_CONTEXT_BLOCKS,
+                        help="Text blocks kept around each equation (-1 = whole pages)")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    papers = []
+    with tempfile.TemporaryDirectory(prefix="equation_bench_") as workdir:
+        for i in range(args.papers + args.without_equations):
+            n_equations = args.equations if i < args.papers else 0
+            paper = generate_paper_pdf(os.path.join(workdir, f"paper_{i}.pdf"), seed=i,
+                                       paragraphs_per_section=args.paragraphs, n_equations=n_equations)
+            full_text = timer.run("extract_text", extract_text_from_pdf, paper["path"])
+            context, info = timer.run("prefilter", build_equation_context, paper["path"], args.context_blocks)
+            found = set(re.findall(r"\((\d+)\)\s*$", context or "", re.MULTILINE))
+            papers.append({
+                "equations": n_equations,
+                "pages": info["pages"],
+                "kept_pages": len(info["kept_pages"]),
+                "full_tokens": estimate_tokens(full_text),
+                # Fallback sends the full text
+                "prompt_tokens": estimate_tokens(context) if context else estimate_tokens(full_text),
+                "equations_found": sum(1 for n in range(1, n_equations + 1) if str(n) in found),
+                "fallback": info["fallback_reason"],
+            })
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    with_eq = [p for p in papers if p["equations"]]
+    without_eq = [p for p in papers if not p["equations"]]
+    page_share = sum(p["kept_pages"] for p in with_eq) / sum(p["pages"] for p in with_eq)
+    token_share = sum(p["prompt_tokens"] for p in with_eq) / sum(p["full_tokens"] for p in with_eq)
+    recall = sum(p["equations_found"] for p in with_eq) / max(1, sum(p["equations"] for p in with_eq))
+    summary = {
+        "page_share": page_share, "token_share": token_share, "equation_recall": recall,
+        "tokens_saved_per_paper": sum(p["full_tokens"] - p["prompt_tokens"] for p in with_eq) / len(with_eq),
+        "fallbacks_without_equations": sum(1 for p in without_eq if p["fallback"]),
+        "false_positives": sum(1 for p in without_eq if not p["fallback"]),
+    }
+    print(f"\n   {len(with_eq)} papers with equations: {page_share:.0%} of pages kept, prompt at {token_share:.0%} "
+          f"of the full text (~{summary['tokens_saved_per_paper']:,.0f} tokens saved per paper), "
+          f"{recall:.0%} of numbered equations included", file=sys.stderr)
+    if without_eq:
+        print(f"   {len(without_eq)} papers without equations: {summary['fallbacks_without_equations']} fell back "
+              f"to the full text", file=sys.stderr)
+
+    params = {"papers": args.papers, "paragraphs": args.paragraphs, "equations": args.equations,
+              "without_equations": args.without_equations, "context_blocks": args.context_blocks}
+    write_report(build_report("equation_pages", params, stages, extra={"summary": summary, "papers": papers}),
+                 args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Exact brute-force search vs. Chroma's HNSW index.
+
+    python -m benchmarks.bench_exact_search --chunks 20000
+    python -m benchmarks.bench_exact_search --chunks 100000 --workdir /tmp/exact_bench
+
+Fills a store with clustered random embeddings (no embedding model in the
+loop), builds the exact index from it, then runs the same query vectors
+through both engines: single queries, query batches and queries scoped to
+one paper. Reports latency per stage and the recall@k of HNSW against the
+exact results.
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from memory.vector_db import ResearchMemory
+
+INCLUDE = ["documents", "metadatas", "distances"]
+
+
+def fill(memory, chunks, chunks_per_paper, dim, timer, rng, batch_size=5000):
+    if memory.count():
+        print(f"♻️ Reusing existing store with {memory.count()} chunks", file=sys.stderr)
+        return
+    centers = rng.standard_normal((64, dim)).astype(np.float32)
+    for start in range(0, chunks, batch_size):
+        rows = np.arange(start, min(start + batch_size, chunks))
+        vectors = centers[rng.integers(0, len(centers), len(rows))] + 0.5 * rng.standard_normal((len(rows), dim))
+        paper_ids = [f"paper{row // chunks_per_paper:07d}" for row in rows]
+        ids = [f"{pid}_{row % chunks_per_paper}" for pid, row in zip(paper_ids, rows)]
+        metadatas = [{"paper_id": pid, "title": pid} for pid in paper_ids]
+        timer.run("chroma_insert", memory.upsert_chunks, ids, vectors.astype(np.float32),
+                  [f"chunk {i}" for i in ids], metadatas, items=len(rows))
+        print(f"   📥 Stored {rows[-1] + 1:,}/{chunks:,} chunks...", end="\r", file=sys.stderr)
+    print(file=sys.stderr)
+
+
+def recall(approx, exact):
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx, exact))
+    return hits / max(1, sum(len(e) for e in exact))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact search against Chroma HNSW")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--chunks-per-paper", type=int, default=40)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=16, help="Queries per batched call")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--workdir", help="Persist the store here so large corpora are built once")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    timer = StageTimer()
+    quality = {}
+
+    def run(workdir):
+        persist_dir = os.path.join(workdir, "chroma_db")
+        chroma = ResearchMemory(persist_dir=persist_dir)
+        fill(chroma, args.chunks, args.chunks_per_paper, args.dim, timer, rng)
+        exact = timer.run("exact_build", ResearchMemory, persist_dir=persist_dir, engine="exact")
+        if exact.exact.count() != chroma.count():
+            exact.rebuild_exact_index()
+
+        stored = chroma.collections[0].get(limit=args.queries, offset=0, include=["embeddings", "metadatas"])
+        queries = np.asarray(stored["embeddings"], dtype=np.float32)
+        queries += 0.3 * rng.standard_normal(queries.shape).astype(np.float32)
+        papers = [m["paper_id"] for m in stored["metadatas"]]
+
+        results = {"chroma": [], "exact": []}
+        for name, memory in [("chroma", chroma), ("exact", exact)]:
+            for query in queries:
+                result = timer.run(f"{name}:single", memory._query, [query.tolist()], args.k, None, INCLUDE)
+                results[name].append(result["ids"][0])
+            for start in range(0, len(queries), args.batch):
+                batch = queries[start:start + args.batch].tolist()
+                timer.run(f"{name}:batch", memory._query, batch, args.k, None, INCLUDE, items=len(batch))
+            for query, paper_id in zip(queries, papers):
+                timer.run(f"{name}:paper_filter", memory._query, [query.tolist()], args.k,
+                          {"paper_id": paper_id}, INCLUDE)
+        for query in queries:
+            timer.run("exact:matmul_only", exact.exact.search, [query], args.k)
+
+        quality["hnsw_recall_at_k"] = recall(results["chroma"], results["exact"])
+        quality["chunks"] = chroma.count()
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        run(args.workdir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="exact_bench_") as workdir:
+            run(workdir)
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    print(f"\n   HNSW recall@{args.k} vs exact: {quality['hnsw_recall_at_k']:.3f} "
+          f"over {quality['chunks']:,} chunks", file=sys.stderr)
+
+    params = {"chunks": args.chunks, "chunks_per_paper": args.chunks_per_paper, "dim": args.dim,
+              "queries": args.queries, "batch": args.batch, "k": args.k}
+    write_report(build_report("exact_search", params, stages, extra={"quality": quality}), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Figure payload benchmark: bytes sent to Gemini before and after preprocessing.
+
+    python -m benchmarks.bench_figures --figures 5 --size 3000x2200
+    python -m benchmarks.bench_figures --live   # also time real Gemini requests
+
+Without --live only payload size and preprocessing cost are measured.
+"""
+import os
+import sys
+import io
+import argparse
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from benchmarks.synthetic_corpus import _figure_image
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+from processors.figure_preprocessor import prepare_figures_for_gemini, _native_payload_size
+
+
+def make_scan_like_figures(n, width, height, seed=0):
+    """High-resolution RGBA figures with sensor-like noise, as extracted from scanned papers"""
+    rng = random.Random(seed)
+    images = []
+    for _ in range(n):
+        chart = Image.open(io.BytesIO(_figure_image(rng, width, height))).convert("RGBA")
+        noise = Image.effect_noise((width, height), 12).convert("RGBA")
+        figure = Image.blend(chart, noise, 0.08)
+        buf = io.BytesIO()
+        figure.save(buf, format="PNG")
+        data = buf.getvalue()
+        image = Image.open(io.BytesIO(data))
+        image.info["source_bytes"] = len(data)
+        images.append(image)
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark figure preprocessing for Gemini uploads")
+    parser.add_argument("--figures", type=int, default=5)
+    parser.add_argument("--size", default="3000x2200", help="Figure size WIDTHxHEIGHT (default: 3000x2200)")
+    parser.add_argument("--max-dimensions", default="1024,1536,2048")
+    parser.add_argument("--formats", default="JPEG,WEBP,PNG")
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--live", action="store_true", help="Send raw and preprocessed figures to Gemini and time both")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    images = make_scan_like_figures(args.figures, width, height)
+    raw_bytes = sum(_native_payload_size(image) for image in images)
+
+    timer = StageTimer()
+    payloads = {"raw": {"bytes": raw_bytes}}
+    for fmt in args.formats.split(","):
+        for max_dimension in (int(v) for v in args.max_dimensions.split(",")):
+            name = f"{fmt.lower()}_{max_dimension}"
+            _, stats = timer.run(name, prepare_figures_for_gemini, images, max_dimension=max_dimension,
+                                     image_format=fmt, quality=args.quality, items=len(images))
+            payloads[name] = {"bytes": stats["bytes_after"], "ratio": stats["bytes_after"] / raw_bytes}
+
+    latency = {}
+    if args.live:
+        from models.gemini_client import GeminiClient
+        client = GeminiClient()
+        prompt = "Briefly describe what each of these figures shows."
+        # The preprocessed request uses the configured defaults from config.py
+        preprocessed, _ = prepare_figures_for_gemini(images)
+        for name, content in (("raw", [prompt] + images), ("preprocessed", [prompt] + preprocessed)):
+            start = time.perf_counter()
+            client.generate_content(content)
+            latency[name] = time.perf_counter() - start
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    for name, payload in payloads.items():
+        ratio = f" ({payload['ratio']:.1%} of raw)" if "ratio" in payload else ""
+        print(f"   {name:14} {payload['bytes'] / 1e6:8.2f} MB{ratio}", file=sys.stderr)
+    for name, seconds in latency.items():
+        print(f"   Gemini latency {name:12} {seconds:.2f}s", file=sys.stderr)
+
+    params = {"figures": args.figures, "size": args.size, "quality": args.quality}
+    write_report(build_report("figures", params, stages, extra={"payloads": payloads, "latency_s": latency}), args.output)
+
+
+if __name__ == "__main__":
+    main()
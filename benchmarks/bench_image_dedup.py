@@ -0,0 +1,128 @@
+"""
+Image extraction on papers whose pages repeat a header logo.
+
+    python -m benchmarks.bench_image_dedup --papers 3
+    python -m benchmarks.bench_image_dedup --paragraphs 12 --ocr-latency 0.05
+
+Generates papers without a logo, with one shared logo image on every page
+and with a separate copy of the logo per page (identical pixels, different
+xrefs). Runs the deduplicating extractor and the previous one, which decoded
+and OCR'd every placement, and compares image decodes, OCR calls, selected
+figures and time. Without tesseract installed (or with --ocr-latency) OCR is
+replaced by a fake that sleeps for the given time per image.
+"""
+import os
+import io
+import re
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from unittest import mock
+
+import fitz
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_paper_pdf
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from extractors import image_extractor
+from extractors.image_extractor import extract_images_and_captions
+
+LOGOS = [None, "shared", "copies"]
+
+
+def legacy_extract(pdf_path, max_selected=5):
+    """The per-placement extractor this benchmark replaced (selection by caption prefix only)"""
+    doc = fitz.open(pdf_path)
+    figures_info = []
+    for page_num in range(len(doc)):
+        page = doc[page_num]
+        captions = re.findall(r"(Figure\s?\d+[:.].*)", page.get_text("text"), re.IGNORECASE)
+        for img_index, img in enumerate(page.get_images(full=True), start=1):
+            image = Image.open(io.BytesIO(doc.extract_image(img[0])["image"]))
+            ocr_text = image_extractor.pytesseract.image_to_string(image)
+            caption = captions[img_index - 1] if img_index - 1 < len(captions) else "No caption found"
+            figures_info.append({"page": page_num + 1, "caption": caption.strip(), "ocr": ocr_text, "image": image})
+    selected = [fig for fig in figures_info if fig["caption"].lower().startswith(("figure", "table"))]
+    return [f["image"] for f in (selected or figures_info)[:max_selected]]
+
+
+class CountingOCR:
+    def __init__(self, latency=None):
+        self.latency = latency
+        self.calls = 0
+        self._real = image_extractor.pytesseract.image_to_string
+
+    def __call__(self, image, *args, **kwargs):
+        self.calls += 1
+        if self.latency is None:
+            return self._real(image, *args, **kwargs)
+        time.sleep(self.latency)
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image xref/perceptual-hash deduplication")
+    parser.add_argument("--papers", type=int, default=2)
+    parser.add_argument("--paragraphs", type=int, default=8, help="Paragraphs per section, controls page count")
+    parser.add_argument("--figures", type=int, default=3)
+    parser.add_argument("--ocr-latency", type=float,
+                        help="Fake OCR seconds per image (default: real tesseract, or 0.05 if not installed)")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    latency = args.ocr_latency
+    if latency is None and not shutil.which("tesseract"):
+        latency = 0.05
+        print(f"ℹ️ tesseract not found; OCR faked at {latency * 1000:.0f} ms per image", file=sys.stderr)
+
+    timer = StageTimer()
+    counts = {}
+    with tempfile.TemporaryDirectory(prefix="image_bench_") as workdir:
+        for logo in LOGOS:
+            key = logo or "no_logo"
+            papers = [generate_paper_pdf(os.path.join(workdir, f"{key}_{i}.pdf"), seed=i, header_logo=logo,
+                                         paragraphs_per_section=args.paragraphs, n_figures=args.figures)
+                      for i in range(args.papers)]
+            for name, extract in [("dedup", lambda path: extract_images_and_captions(path, max_selected=5)[1]),
+                                  ("legacy", legacy_extract)]:
+                ocr = CountingOCR(latency)
+                decodes = 0
+                selected_figures = 0
+                real_extract_image = fitz.Document.extract_image
+
+                def counting_extract_image(doc, xref):
+                    nonlocal decodes
+                    decodes += 1
+                    return real_extract_image(doc, xref)
+
+                with mock.patch.object(image_extractor.pytesseract, "image_to_string", ocr), \
+                        mock.patch.object(fitz.Document, "extract_image", counting_extract_image):
+                    for paper in papers:
+                        images = timer.run(f"{name}:{key}", extract, paper["path"], items=paper["figures"])
+                        # Figures are 800 px wide; the logo is 240
+                        selected_figures += sum(1 for image in images if image.width > 240)
+                counts[f"{name}:{key}"] = {
+                    "placements": sum(len(page.get_images()) for paper in papers for page in fitz.open(paper["path"])),
+                    "decodes": decodes, "ocr_calls": ocr.calls, "figures": sum(p["figures"] for p in papers),
+                    "selected_figures": selected_figures,
+                }
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    print(f"\n{'run':20} {'placements':>11} {'decodes':>8} {'OCR calls':>10} {'figures':>8} {'selected':>9}",
+          file=sys.stderr)
+    for key, c in counts.items():
+        print(f"{key:20} {c['placements']:>11} {c['decodes']:>8} {c['ocr_calls']:>10} {c['figures']:>8} "
+              f"{c['selected_figures']:>9}", file=sys.stderr)
+
+    params = {"papers": args.papers, "paragraphs": args.paragraphs, "figures": args.figures, "ocr_latency": latency}
+    write_report(build_report("image_dedup", params, stages, extra={"counts": counts}), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-turn retrieval latency for library-wide chat.
+
+    python -m benchmarks.bench_library_chat --papers 1000
+    python -m benchmarks.bench_library_chat --papers 10000 --workdir /tmp/library_bench
+    python -m benchmarks.bench_library_chat --papers 10000 --shards 4
+
+Compares plain top-k retrieval with the diversified (over-fetch + MMR +
+per-paper cap) retrieval used by `main.py --ask-all`, reporting latency and
+how many distinct papers each turn's context covers.
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_paper_text
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from config import LIBRARY_CHAT_RESULTS, LIBRARY_CHAT_FETCH_K, MMR_LAMBDA, MAX_CHUNKS_PER_PAPER
+from memory.vector_db import ResearchMemory
+from utils.text_chunker import chunk_text
+
+QUESTIONS = [
+    "Which papers use convolution for image segmentation?",
+    "Which papers evaluate translation quality on a large corpus?",
+    "What approaches use message passing over graph neighborhoods?",
+    "Which papers study exploration in reinforcement learning agents?",
+    "How do the systems papers improve cache throughput?",
+]
+
+
+def build_library(memory, n_papers, paragraphs, timer):
+    existing = memory.count()
+    if existing:
+        print(f"♻️ Reusing existing library with {existing} chunks", file=sys.stderr)
+        return
+    for i in range(n_papers):
+        paper = generate_paper_text(seed=i, paragraphs_per_section=paragraphs)
+        chunks = chunk_text(paper["text"], chunk_size=200, overlap=40)
+        timer.run("store_paper", memory.store_paper, paper["text"],
+                  {"title": paper["title"], "topic": paper["topic"]}, chunks, items=len(chunks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark library-wide chat retrieval")
+    parser.add_argument("--papers", type=int, default=1000)
+    parser.add_argument("--paragraphs", type=int, default=1, help="Paragraphs per section (paper length)")
+    parser.add_argument("--turns", type=int, default=20, help="Questions asked per retrieval mode")
+    parser.add_argument("--shards", type=int, default=1, help="Vector store shards (parallel fan-out search)")
+    parser.add_argument("--workdir", help="Persist the library here so large corpora are built once")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    coverage = {"top_k": [], "diverse": []}
+
+    def run(workdir):
+        memory = ResearchMemory(persist_dir=os.path.join(workdir, "chroma_db"), shards=args.shards)
+        build_library(memory, args.papers, args.paragraphs, timer)
+        for turn in range(args.turns):
+            question = QUESTIONS[turn % len(QUESTIONS)]
+            plain = timer.run("turn_top_k", memory.get_relevant_context, question, n_results=LIBRARY_CHAT_RESULTS)
+            diverse = timer.run("turn_diverse", memory.get_diverse_context, question,
+                                n_results=LIBRARY_CHAT_RESULTS, fetch_k=LIBRARY_CHAT_FETCH_K,
+                                lambda_mult=MMR_LAMBDA, max_per_paper=MAX_CHUNKS_PER_PAPER)
+            coverage["top_k"].append(len({c["source"]["paper_id"] for c in plain}))
+            coverage["diverse"].append(len({c["source"]["paper_id"] for c in diverse}))
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        run(args.workdir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="library_chat_bench_") as workdir:
+            run(workdir)
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    papers_per_turn = {mode: sum(v) / len(v) for mode, v in coverage.items() if v}
+    for mode, mean in papers_per_turn.items():
+        print(f"   {mode:10} distinct papers per turn: {mean:.1f}", file=sys.stderr)
+
+    params = {"papers": args.papers, "shards": args.shards, "turns": args.turns, "n_results": LIBRARY_CHAT_RESULTS,
+              "fetch_k": LIBRARY_CHAT_FETCH_K, "lambda": MMR_LAMBDA, "max_per_paper": MAX_CHUNKS_PER_PAPER}
+    write_report(build_report("library_chat", params, stages, extra={"papers_per_turn": papers_per_turn}),
+                 args.output)
+
+
+if __name__ == "__main__":
+    main()
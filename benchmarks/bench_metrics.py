@@ -0,0 +1,124 @@
+"""
+Cost of the always-on metrics instrumentation.
+
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --papers 3 --queries 200 --updates 200000
+
+Times single counter/histogram updates with the registry enabled and
+disabled, then runs the instrumented pipeline (ingest_pdfs on a synthetic
+corpus, then retrieval queries, which do the least work per recorded metric)
+alternating between enabled and disabled passes, and reports the relative
+overhead. Also checks that the Prometheus rendering parses line by line.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from ingest_papers import ingest_pdfs
+from memory.vector_db import ResearchMemory
+from utils.metrics import MetricsRegistry, registry
+
+QUERIES = [
+    "What dataset was used for training?",
+    "How does the model compare with the baselines?",
+    "What are the limitations and future work?",
+    "Explain the loss function and optimization.",
+]
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"'
+                       r'(,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*")*\})? -?[0-9.e+\-]+$')
+
+
+def time_updates(updates):
+    """Nanoseconds per update for each kind of metric call, enabled and disabled"""
+    bench_registry = MetricsRegistry(prefix="bench_")
+    plain = bench_registry.counter("plain_total", "bench")
+    labeled = bench_registry.counter("labeled_total", "bench", ["status"])
+    hist = bench_registry.histogram("latency_seconds", "bench", ["engine"])
+    calls = {
+        "counter.inc": lambda: plain.inc(),
+        "counter.inc(label)": lambda: labeled.inc(status="ok"),
+        "histogram.observe": lambda: hist.observe(0.012, engine="chroma"),
+        "histogram.time": lambda: _timed_block(hist),
+    }
+    results = {}
+    for enabled in (True, False):
+        bench_registry.enabled = enabled
+        for name, call in calls.items():
+            start = time.perf_counter()
+            for _ in range(updates):
+                call()
+            results[f"{name}{'' if enabled else ' (disabled)'}"] = (time.perf_counter() - start) / updates * 1e9
+    return results
+
+
+def _timed_block(hist):
+    with hist.time(engine="chroma"):
+        pass
+
+
+def check_exposition(text):
+    bad = [line for line in text.splitlines() if line and not line.startswith("#") and not SAMPLE_RE.match(line)]
+    return {"lines": len(text.splitlines()), "malformed": bad[:5]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics instrumentation overhead")
+    parser.add_argument("--papers", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=100, help="Retrieval queries per pass")
+    parser.add_argument("--passes", type=int, default=4, help="Enabled/disabled pass pairs")
+    parser.add_argument("--updates", type=int, default=100000, help="Calls per micro-benchmark")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    per_update_ns = time_updates(args.updates)
+    print(f"\n   {'metric call':32} {'ns/call':>10}", file=sys.stderr)
+    for name, ns in per_update_ns.items():
+        print(f"   {name:32} {ns:>10.0f}", file=sys.stderr)
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory(prefix="metrics_bench_") as workdir:
+        papers = generate_corpus(os.path.join(workdir, "corpus"), n_papers=args.papers)
+        memory = timer.run("memory_init", ResearchMemory, persist_dir=os.path.join(workdir, "chroma_db"))
+        paths = [paper["path"] for paper in papers]
+        timer.run("warm_up", ingest_pdfs, paths, memory=memory, items=len(papers))  # model, collections, caches
+        for p in range(args.passes):
+            # Alternate which setting goes first so the growing store doesn't favour one
+            for enabled in ((True, False) if p % 2 == 0 else (False, True)):
+                registry.enabled = enabled
+                label = "metrics_on" if enabled else "metrics_off"
+                timer.run(f"ingest:{label}", ingest_pdfs, paths, memory=memory, items=len(papers))
+                with timer.stage(f"retrieve:{label}", items=args.queries):
+                    for i in range(args.queries):
+                        memory.get_relevant_context(QUERIES[i % len(QUERIES)], n_results=3)
+        registry.enabled = True
+        exposition = check_exposition(registry.render())
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    overhead = {}
+    for stage in ("ingest", "retrieve"):
+        on, off = stages[f"{stage}:metrics_on"]["median_s"], stages[f"{stage}:metrics_off"]["median_s"]
+        overhead[stage] = (on - off) / off
+        print(f"   {stage}: {overhead[stage]:+.2%} with metrics enabled (median of {args.passes} passes)",
+              file=sys.stderr)
+    if exposition["malformed"]:
+        print(f"❌ Malformed exposition lines: {exposition['malformed']}", file=sys.stderr)
+
+    params = {"papers": args.papers, "queries": args.queries, "passes": args.passes, "updates": args.updates}
+    write_report(build_report("metrics", params, stages, extra={
+        "ns_per_update": per_update_ns, "overhead": overhead, "exposition": exposition,
+    }), args.output)
+    if exposition["malformed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
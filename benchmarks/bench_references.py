@@ -0,0 +1,97 @@
+"""
+Reference-section segmentation on long bibliographies.
+
+    python -m benchmarks.bench_references --references 500
+    python -m benchmarks.bench_references --references 2000 --no-legacy
+
+Builds documents whose body mentions "references" before the real
+bibliography, in numbered, author-year and ACM styles, both with line
+breaks (as extracted from PDFs, wrapped) and flattened to one line (as
+stored chunks are). Times the single-pass segmenter against the previous
+regex splitter and checks how many entries come back exactly.
+"""
+import os
+import re
+import sys
+import argparse
+import textwrap
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_references, generate_paper_text
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from extractors.citation_extractor import find_references_section, split_references
+
+STYLES = ["numbered", "author-year", "acm"]
+
+
+def legacy_segment(text):
+    """The splitter this benchmark replaced (kept for comparison)"""
+    match = re.search(r"(references|bibliography)(.*)", text, re.IGNORECASE | re.DOTALL)
+    if not match:
+        return []
+    raw_refs = re.split(r"(?=\n?[A-Z][a-zA-Z\-\']+.*\d{4}\.)", match.group(2))
+    references = []
+    for ref in raw_refs:
+        ref = ref.strip().replace("\n", " ")
+        if len(ref) > 50 and re.search(r"\d{4}", ref):
+            references.append(ref)
+    return references
+
+
+def segment(text):
+    refs_text = find_references_section(text)
+    return split_references(refs_text) if refs_text is not None else []
+
+
+def make_document(references, layout):
+    body = generate_paper_text(seed=1, paragraphs_per_section=2)["text"]
+    body += "\nAs the references below show, prior work has studied this problem."
+    if layout == "wrapped":
+        return body + "\nReferences\n" + "\n".join(textwrap.fill(ref, 80) for ref in references)
+    return " ".join(body.split()) + " References " + " ".join(references)
+
+
+def exact_matches(found, expected):
+    expected = set(expected)
+    return sum(1 for ref in found if ref in expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reference-section segmentation")
+    parser.add_argument("--references", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-legacy", action="store_true", help="Skip the (quadratic) legacy splitter")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    accuracy = {}
+    for style in STYLES:
+        references = generate_references(args.references, style=style)
+        for layout in ("wrapped", "flat"):
+            document = make_document(references, layout)
+            key = f"{style}:{layout}"
+            for _ in range(args.repeats):
+                found = timer.run(f"segment:{key}", segment, document, items=args.references)
+            accuracy[key] = {"expected": len(references), "found": len(found),
+                             "exact": exact_matches(found, references)}
+            if not args.no_legacy:
+                legacy = timer.run(f"legacy:{key}", legacy_segment, document, items=args.references)
+                accuracy[key].update({"legacy_found": len(legacy), "legacy_exact": exact_matches(legacy, references)})
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    print(f"\n{'document':22} {'expected':>9} {'found':>7} {'exact':>7} {'legacy found':>13} {'legacy exact':>13}",
+          file=sys.stderr)
+    for key, a in accuracy.items():
+        print(f"{key:22} {a['expected']:>9} {a['found']:>7} {a['exact']:>7} "
+              f"{a.get('legacy_found', '-'):>13} {a.get('legacy_exact', '-'):>13}", file=sys.stderr)
+
+    params = {"references": args.references, "repeats": args.repeats, "legacy": not args.no_legacy}
+    write_report(build_report("references", params, stages, extra={"accuracy": accuracy}), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Cross-encoder reranking: added latency and ranking quality.
+
+    python -m benchmarks.bench_rerank --papers 50 --queries 100
+    python -m benchmarks.bench_rerank --budgets 0,50,100,250 --fetch-k 50
+    python -m benchmarks.bench_rerank --persist-dir ./chroma_db --labels labels.jsonl
+
+Builds a store of synthetic papers and a labeled sample: each query is a
+shuffled handful of words from one stored chunk, which is its only relevant
+result. Alternatively --labels reads JSON lines {"query": ..., "relevant":
+[chunk ids]} against an existing --persist-dir. Each query is answered by
+vector search alone and by vector search + reranking under each latency
+budget (0 = unlimited); reports recall@k, MRR and per-query latency
+(median / p95) for every mode.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_paper_text
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from config import RERANK_FETCH_K
+from memory.vector_db import ResearchMemory
+from utils.text_chunker import chunk_text
+
+
+def build_store(memory, n_papers, paragraphs, timer):
+    for i in range(n_papers):
+        paper = generate_paper_text(seed=i, paragraphs_per_section=paragraphs)
+        chunks = chunk_text(paper["text"], chunk_size=200, overlap=40)
+        timer.run("store_paper", memory.store_paper, paper["text"],
+                  {"title": paper["title"], "topic": paper["topic"]}, chunks, items=len(chunks))
+
+
+def sample_labels(memory, n_queries, words_per_query, seed=0):
+    rng = random.Random(seed)
+    candidates = []
+    for collection in memory.collections:
+        stored = collection.get(include=["documents"])
+        candidates.extend((chunk_id, doc.split()) for chunk_id, doc in zip(stored["ids"], stored["documents"])
+                          if len(doc.split()) >= words_per_query)
+    labels = []
+    for chunk_id, words in rng.sample(candidates, min(n_queries, len(candidates))):
+        start = rng.randrange(len(words) - words_per_query + 1)
+        query = words[start:start + words_per_query]
+        rng.shuffle(query)
+        labels.append({"query": " ".join(query), "relevant": [chunk_id]})
+    return labels
+
+
+def load_labels(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def score(rankings, labels, k):
+    recall, reciprocal_ranks = [], []
+    for ranking, label in zip(rankings, labels):
+        relevant = set(label["relevant"])
+        ranks = [i for i, chunk_id in enumerate(ranking, 1) if chunk_id in relevant]
+        recall.append(1.0 if ranks and ranks[0] <= k else 0.0)
+        reciprocal_ranks.append(1 / ranks[0] if ranks else 0.0)
+    return {f"recall@{k}": statistics.mean(recall), "mrr": statistics.mean(reciprocal_ranks)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder reranking")
+    parser.add_argument("--papers", type=int, default=30)
+    parser.add_argument("--paragraphs", type=int, default=1, help="Paragraphs per section (paper length)")
+    parser.add_argument("--queries", type=int, default=50, help="Labeled queries sampled from stored chunks")
+    parser.add_argument("--query-words", type=int, default=8, help="Words per sampled query")
+    parser.add_argument("--k", type=int, default=3, help="Results kept per query")
+    parser.add_argument("--fetch-k", type=int, default=RERANK_FETCH_K, help="Candidates reranked per query")
+    parser.add_argument("--budgets", default="0,50,250", help="Comma-separated latency budgets in ms (0 = none)")
+    parser.add_argument("--persist-dir", help="Use this existing store instead of a synthetic one")
+    parser.add_argument("--labels", help="JSON lines {query, relevant: [chunk ids]} (default: sampled)")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    budgets = [float(b) for b in args.budgets.split(",")]
+    quality, latency = {}, {}
+
+    def run(persist_dir):
+        memory = ResearchMemory(persist_dir=persist_dir)
+        if not args.persist_dir:
+            build_store(memory, args.papers, args.paragraphs, timer)
+        labels = load_labels(args.labels) if args.labels else sample_labels(memory, args.queries, args.query_words)
+        timer.run("reranker_load", lambda: memory.reranker.model)
+
+        modes = [("vector", False, None)] + [(f"rerank:{b:g}ms", True, b or None) for b in budgets]
+        # One unmeasured pass warms the embedding model, store and cross-encoder
+        memory.get_relevant_context(labels[0]["query"], n_results=args.k, rerank=True)
+        for mode, rerank, budget in modes:
+            memory.reranker.budget_ms = budget
+            rankings, samples = [], []
+            for label in labels:
+                with timer.stage(mode):
+                    if rerank:
+                        # Rank every candidate so MRR covers the whole fetch
+                        contexts = memory.get_relevant_context(label["query"], n_results=args.fetch_k, rerank=False)
+                        contexts = memory.reranker.rerank(label["query"], contexts, args.fetch_k)
+                    else:
+                        contexts = memory.get_relevant_context(label["query"], n_results=args.fetch_k, rerank=False)
+                samples.append(timer.samples[mode][-1])
+                rankings.append([c["id"] for c in contexts])
+            quality[mode] = score(rankings, labels, args.k)
+            samples.sort()
+            latency[mode] = {"median_ms": statistics.median(samples) * 1000,
+                             "p95_ms": samples[int(0.95 * (len(samples) - 1))] * 1000}
+        return len(labels)
+
+    if args.persist_dir:
+        n_labels = run(args.persist_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="rerank_bench_") as workdir:
+            n_labels = run(os.path.join(workdir, "chroma_db"))
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    base = latency["vector"]["median_ms"]
+    print(f"\n   {'mode':16} {f'recall@{args.k}':>10} {'MRR':>7} {'median ms':>10} {'p95 ms':>8} {'added ms':>9}",
+          file=sys.stderr)
+    for mode in quality:
+        q, l = quality[mode], latency[mode]
+        print(f"   {mode:16} {q[f'recall@{args.k}']:>10.3f} {q['mrr']:>7.3f} {l['median_ms']:>10.1f} "
+              f"{l['p95_ms']:>8.1f} {l['median_ms'] - base:>+9.1f}", file=sys.stderr)
+    print(f"   ({n_labels} labeled queries, {args.fetch_k} candidates each)", file=sys.stderr)
+
+    params = {"papers": args.papers, "queries": n_labels, "k": args.k, "fetch_k": args.fetch_k,
+              "budgets_ms": budgets, "labels": args.labels, "persist_dir": args.persist_dir}
+    write_report(build_report("rerank", params, stages, extra={"quality": quality, "latency": latency}),
+                 args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Full-text vs. retrieval-driven section prompts.
+
+    python -m benchmarks.bench_section_context --papers 5 --paragraphs 12
+    python -m benchmarks.bench_section_context --papers 2 --live   # time real Gemini calls
+
+Reports estimated prompt tokens for both paths, the cost of assembling the
+retrieved context and how often retrieval fell back to the full text.
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from benchmarks.fakes import FakeGeminiClient
+from benchmarks.harness import StageTimer, build_report, write_report, print_stage_table
+
+from extractors.text_extractor import extract_text_from_pdf
+from memory.vector_db import ResearchMemory
+from processors.section_context import SECTION_QUERIES, build_section_context
+from processors.section_processor import get_section_from_gemini
+from utils.text_chunker import chunk_text, extract_paper_metadata, estimate_tokens
+
+
+def run(workdir, args, timer):
+    papers = generate_corpus(os.path.join(workdir, "corpus"), n_papers=args.papers,
+                             paragraphs_per_section=args.paragraphs)
+    memory = ResearchMemory(persist_dir=os.path.join(workdir, "chroma_db"))
+    if args.live:
+        from models.gemini_client import GeminiClient
+        client = GeminiClient()
+    else:
+        client = FakeGeminiClient()
+
+    sections = args.sections.split(",") if args.sections else list(SECTION_QUERIES)
+    tokens = {section: {"full": 0, "retrieval": 0, "fallbacks": 0} for section in sections}
+
+    for paper in papers:
+        with timer.stage("ingest"):
+            text = extract_text_from_pdf(paper["path"])
+            paper_id = memory.store_paper(text, extract_paper_metadata(text), chunk_text(text))
+
+        for section in sections:
+            context, info = timer.run(f"build_context:{section}", build_section_context, memory, paper_id, section)
+            tokens[section]["full"] += estimate_tokens(text)
+            tokens[section]["retrieval"] += estimate_tokens(context or text)
+            if context is None:
+                tokens[section]["fallbacks"] += 1
+
+            timer.run(f"llm_full:{section}", get_section_from_gemini, paper["path"], text, section, client)
+            timer.run(f"llm_retrieval:{section}", get_section_from_gemini, paper["path"], context or text,
+                      section, client)
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full-text and retrieval-driven section prompts")
+    parser.add_argument("--papers", type=int, default=3)
+    parser.add_argument("--paragraphs", type=int, default=12, help="Paragraphs per section (paper length)")
+    parser.add_argument("--sections", help="Comma-separated sections (default: all retrieval-enabled sections)")
+    parser.add_argument("--live", action="store_true", help="Use the real Gemini client to time both paths")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory(prefix="section_context_bench_") as workdir:
+        tokens = run(workdir, args, timer)
+
+    stages = timer.summary()
+    print_stage_table(stages)
+    print(f"\n{'section':20} {'full tokens':>12} {'retrieval':>12} {'saved':>7} {'fallbacks':>10}", file=sys.stderr)
+    for section, t in tokens.items():
+        saved = 1 - t["retrieval"] / t["full"] if t["full"] else 0
+        t["saved"] = saved
+        print(f"{section:20} {t['full']:>12,} {t['retrieval']:>12,} {saved:>7.0%} {t['fallbacks']:>10}", file=sys.stderr)
+
+    params = {"papers": args.papers, "paragraphs": args.paragraphs, "live": args.live}
+    write_report(build_report("section_context", params, stages, extra={"prompt_tokens": tokens}), args.output)
+
+
+if __name__ == "__main__":
+    main()
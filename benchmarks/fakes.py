@@ -0,0 +1,75 @@
+import time
+import hashlib
+from contextlib import contextmanager
+from unittest import mock
+
+CANNED_SUMMARY = """## Executive Overview
+**Core Research Question**
+- The paper studies how the proposed model improves accuracy on standard benchmarks.
+- It reports a 4.2% gain over the strongest baseline.
+
+## Methodology Deep Dive
+**Experimental Design**
+The authors train on three datasets and evaluate with accuracy and latency metrics.
+- Ablations isolate each architectural component.
+
+## Key Findings & Results
+- The model converges faster and generalizes better than prior work.
+"""
+
+CANNED_EQUATIONS = """### Loss Equation: $$L(\\theta) = -\\sum_i \\log p(y_i | x_i; \\theta)$$
+* $\\theta$: model parameters
+* The loss is the negative log-likelihood of the training data.
+---
+### Update Equation: $$\\theta_{t+1} = \\theta_t - \\alpha \\nabla L(\\theta_t)$$
+* $\\alpha$: learning rate
+* Standard gradient descent step.
+"""
+
+
+class FakeGeminiClient:
+    """
+    Offline stand-in for GeminiClient. Returns canned markdown and records
+    how much prompt text it was sent, optionally sleeping to mimic network latency.
+    """
+
+    def __init__(self, latency: float = 0.0, response: str = CANNED_SUMMARY):
+        self.latency = latency
+        self.response = response
+        self.calls = 0
+        self.prompt_chars = 0
+        self.images = 0
+
+    def generate_content(self, content):
+        parts = content if isinstance(content, list) else [content]
+        self.calls += 1
+        self.prompt_chars += sum(len(p) for p in parts if isinstance(p, str))
+        self.images += sum(1 for p in parts if not isinstance(p, str))
+        if self.latency:
+            time.sleep(self.latency)
+        return self.response
+
+    def generate_text(self, prompt):
+        return self.generate_content(prompt)
+
+
+class _FakeCrossRefResponse:
+    def __init__(self, payload):
+        self._payload = payload
+        self.status_code = 200
+
+    def json(self):
+        return self._payload
+
+
+def fake_crossref_get(url, headers=None, timeout=None, **kwargs):
+    """Answer CrossRef queries with a deterministic DOI derived from the query URL"""
+    digest = hashlib.md5(url.encode("utf-8")).hexdigest()[:10]
+    return _FakeCrossRefResponse({"message": {"items": [{"DOI": f"10.5555/bench.{digest}"}]}})
+
+
+@contextmanager
+def offline_crossref():
+    """Route citation_extractor's CrossRef lookups to fake_crossref_get"""
+    with mock.patch("extractors.citation_extractor.requests.get", fake_crossref_get):
+        yield
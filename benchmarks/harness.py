@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class StageTimer:
+    """Collects wall-clock samples per named stage"""
+
+    def __init__(self, quiet: bool = True):
+        self.quiet = quiet
+        self.samples: Dict[str, List[float]] = {}
+        self.items: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str, items: int = 1):
+        # The pipeline reports progress with print(); keep that out of the benchmark output
+        sink = io.StringIO() if self.quiet else sys.stdout
+        start = time.perf_counter()
+        try:
+            with redirect_stdout(sink):
+                yield
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - start)
+            self.items[name] = self.items.get(name, 0) + items
+
+    def run(self, name: str, fn, *args, items: int = 1, **kwargs):
+        with self.stage(name, items=items):
+            return fn(*args, **kwargs)
+
+    def summary(self) -> Dict[str, Dict]:
+        stages = {}
+        for name, samples in self.samples.items():
+            total = sum(samples)
+            stages[name] = {
+                "runs": len(samples),
+                "total_s": total,
+                "mean_s": total / len(samples),
+                "median_s": statistics.median(samples),
+                "min_s": min(samples),
+                "max_s": max(samples),
+                "items": self.items.get(name, 0),
+                "items_per_s": self.items.get(name, 0) / total if total else None,
+            }
+        return stages
+
+
+def build_report(name: str, params: Dict, stages: Dict[str, Dict], extra: Optional[Dict] = None) -> Dict:
+    report = {
+        "benchmark": name,
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "stages": stages,
+    }
+    if extra:
+        report.update(extra)
+    return report
+
+
+def write_report(report: Dict, output_path: Optional[str] = None):
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"📄 Benchmark results saved to: {output_path}", file=sys.stderr)
+    else:
+        print(text)
+
+
+def compare_to_baseline(report: Dict, baseline_path: str, threshold: float = 0.2) -> List[Dict]:
+    """
+    Compare stage medians with a previous report. A stage regresses when its
+    median is more than `threshold` (fractional) slower than the baseline median.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous or not previous.get("median_s"):
+            continue
+        change = current["median_s"] / previous["median_s"] - 1
+        status = "🔴 REGRESSION" if change > threshold else ("🟢 faster" if change < -threshold else "⚪ ok")
+        print(f"{status:14} {name:32} {previous['median_s'] * 1000:10.2f} ms -> "
+              f"{current['median_s'] * 1000:10.2f} ms ({change:+.1%})", file=sys.stderr)
+        if change > threshold:
+            regressions.append({"stage": name, "baseline_s": previous["median_s"],
+                                "current_s": current["median_s"], "change": change})
+    return regressions
+
+
+def print_stage_table(stages: Dict[str, Dict]):
+    print(f"\n{'stage':32} {'runs':>5} {'median ms':>12} {'mean ms':>12} {'items/s':>10}", file=sys.stderr)
+    for name, s in stages.items():
+        rate = f"{s['items_per_s']:.1f}" if s["items_per_s"] else "-"
+        print(f"{name:32} {s['runs']:>5} {s['median_s'] * 1000:>12.2f} {s['mean_s'] * 1000:>12.2f} {rate:>10}",
+              file=sys.stderr)
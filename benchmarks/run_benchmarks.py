@@ -0,0 +1,129 @@
+"""
+End-to-end pipeline benchmark on a synthetic corpus.
+
+    python -m benchmarks.run_benchmarks --papers 5 --output bench.json
+    python -m benchmarks.run_benchmarks --papers 5 --baseline bench.json
+
+Gemini and CrossRef are replaced with offline fakes so runs are reproducible
+and free; every other stage runs the real code against a throwaway ChromaDB.
+"""
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_corpus import generate_corpus
+from benchmarks.fakes import FakeGeminiClient, offline_crossref, CANNED_SUMMARY, CANNED_EQUATIONS
+from benchmarks.harness import StageTimer, build_report, write_report, compare_to_baseline, print_stage_table
+
+from extractors.text_extractor import extract_text_from_pdf
+from extractors.image_extractor import extract_images_and_captions
+from extractors.citation_extractor import extract_citations_from_references
+from processors.section_processor import get_section_from_gemini
+from generators.pdf_generator import save_analysis_to_pdf
+from memory.vector_db import ResearchMemory
+from utils.text_chunker import chunk_text, extract_paper_metadata
+
+RETRIEVAL_QUERIES = [
+    "What dataset was used for training?",
+    "How does the model compare with the baselines?",
+    "What are the limitations and future work?",
+    "Explain the loss function and optimization.",
+]
+
+
+def run_pipeline_benchmark(workdir, n_papers, repeat, paper_kwargs, timer):
+    corpus_dir = os.path.join(workdir, "corpus")
+    output_dir = os.path.join(workdir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+
+    with timer.stage("generate_corpus", items=n_papers):
+        papers = generate_corpus(corpus_dir, n_papers=n_papers, **paper_kwargs)
+
+    memory = timer.run("memory_init", ResearchMemory, persist_dir=os.path.join(workdir, "chroma_db"))
+    gemini = FakeGeminiClient()
+
+    for _ in range(repeat):
+        for paper in papers:
+            path = paper["path"]
+            text = timer.run("extract_text_from_pdf", extract_text_from_pdf, path)
+            timer.run("extract_images_and_captions", extract_images_and_captions, path,
+                      max_selected=5, items=paper["figures"])
+
+            chunks = timer.run("chunk_text", chunk_text, text)
+            metadata = extract_paper_metadata(text)
+            metadata.update({"file_path": path, "file_name": os.path.basename(path)})
+            paper_id = timer.run("store_paper", memory.store_paper, text, metadata, chunks, items=len(chunks))
+
+            for query in RETRIEVAL_QUERIES:
+                timer.run("get_relevant_context", memory.get_relevant_context, query,
+                          n_results=3, filter_dict={"paper_id": paper_id})
+
+            with offline_crossref():
+                timer.run("citation_parsing", extract_citations_from_references, path, items=paper["references"])
+
+            timer.run("section_prompt_fake_gemini", get_section_from_gemini, path, text, "methodology", gemini)
+
+            summary_pdf = os.path.join(output_dir, "summary.pdf")
+            timer.run("save_analysis_to_pdf", save_analysis_to_pdf, CANNED_SUMMARY, summary_pdf, content_type="summary")
+            equations_pdf = os.path.join(output_dir, "equations.pdf")
+            timer.run("save_analysis_to_pdf_equations", save_analysis_to_pdf, CANNED_EQUATIONS, equations_pdf,
+                      content_type="equations")
+
+    return papers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the paper pipeline on a synthetic corpus")
+    parser.add_argument("--papers", type=int, default=3, help="Number of synthetic papers (default: 3)")
+    parser.add_argument("--paragraphs", type=int, default=4, help="Paragraphs per section, controls paper length")
+    parser.add_argument("--figures", type=int, default=3, help="Figures per paper")
+    parser.add_argument("--equations", type=int, default=6, help="Equations per paper")
+    parser.add_argument("--references", type=int, default=30, help="References per paper")
+    parser.add_argument("--reference-style", default="numbered", choices=["numbered", "author-year", "acm"])
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="Keep generated PDFs and the ChromaDB here instead of a temp dir")
+    parser.add_argument("--output", "-o", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Flag stages whose median is this fraction slower than baseline (default: 0.2)")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output while timing")
+    args = parser.parse_args()
+
+    paper_kwargs = {
+        "seed": args.seed,
+        "paragraphs_per_section": args.paragraphs,
+        "n_figures": args.figures,
+        "n_equations": args.equations,
+        "n_references": args.references,
+        "reference_style": args.reference_style,
+    }
+    timer = StageTimer(quiet=not args.verbose)
+
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        papers = run_pipeline_benchmark(args.workdir, args.papers, args.repeat, paper_kwargs, timer)
+    else:
+        with tempfile.TemporaryDirectory(prefix="paper_bench_") as workdir:
+            papers = run_pipeline_benchmark(workdir, args.papers, args.repeat, paper_kwargs, timer)
+
+    stages = timer.summary()
+    params = dict(paper_kwargs, papers=args.papers, repeat=args.repeat)
+    report = build_report("pipeline", params, stages, extra={
+        "corpus_bytes": sum(p["bytes"] for p in papers),
+    })
+    print_stage_table(stages)
+    write_report(report, args.output)
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, args.baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} stage(s) regressed beyond {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import io
+import os
+import random
+from typing import List, Dict
+
+from PIL import Image, ImageDraw
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as ReportLabImage
+
+VOCABULARY = [
+    "model", "network", "dataset", "training", "evaluation", "accuracy", "baseline",
+    "transformer", "attention", "embedding", "representation", "gradient", "loss",
+    "optimization", "benchmark", "ablation", "performance", "robustness", "inference",
+    "latency", "architecture", "parameter", "regularization", "generalization", "feature",
+    "sampling", "distribution", "variance", "estimator", "convergence", "objective",
+    "supervised", "unsupervised", "contrastive", "retrieval", "language", "vision",
+    "graph", "sequence", "token", "encoder", "decoder", "layer", "kernel", "signal",
+    "experiment", "hypothesis", "analysis", "framework", "approach", "method", "result",
+]
+
+# Topic vocabularies give papers distinguishable content for retrieval and clustering benchmarks
+TOPICS = {
+    "vision": ["image", "pixel", "convolution", "segmentation", "detection", "imagenet", "resnet", "augmentation"],
+    "nlp": ["sentence", "translation", "corpus", "tokenizer", "bert", "summarization", "parsing", "lexical"],
+    "graphs": ["node", "edge", "neighborhood", "message", "spectral", "adjacency", "community", "walk"],
+    "reinforcement": ["policy", "reward", "agent", "environment", "episode", "exploration", "q-learning", "actor"],
+    "systems": ["throughput", "cache", "cluster", "scheduler", "memory", "distributed", "storage", "replication"],
+}
+
+CONNECTIVES = [
+    "we propose", "we show that", "in contrast to", "building on", "compared with",
+    "as a result", "furthermore", "in particular", "we observe that", "this suggests",
+]
+
+SURNAMES = [
+    "Smith", "Chen", "Garcia", "Kumar", "Müller", "Nakamura", "Okafor", "Rossi",
+    "Ivanova", "Johansson", "Dubois", "Silva", "Kowalski", "Haddad", "Park", "Nguyen",
+]
+
+VENUES = [
+    "Proceedings of NeurIPS", "Proceedings of ICML", "Proceedings of ACL",
+    "Journal of Machine Learning Research", "IEEE Transactions on Pattern Analysis",
+    "Proceedings of CVPR", "Transactions of the ACL", "Proceedings of KDD",
+]
+
+SECTIONS = [
+    "Introduction", "Related Work", "Methodology", "Experiments",
+    "Results", "Conclusion and Future Work",
+]
+
+# Equation templates render their math symbols in the standard Symbol font,
+# which is what real papers' math fonts look like to text extractors
+EQUATION_TEMPLATES = [
+    "L(<font name='Symbol'>θ</font>) = -<font name='Symbol'>Σ</font><sub>i</sub> log p(y<sub>i</sub> | x<sub>i</sub>; <font name='Symbol'>θ</font>) + <font name='Symbol'>λ</font> ||<font name='Symbol'>θ</font>||<super>2</super>",
+    "h<sub>t</sub> = <font name='Symbol'>σ</font>(W<sub>h</sub> h<sub>t-1</sub> + W<sub>x</sub> x<sub>t</sub> + b)",
+    "Attention(Q, K, V) = softmax(QK<super>T</super> / <font name='Symbol'>√</font>d<sub>k</sub>) V",
+    "<font name='Symbol'>θ</font><sub>t+1</sub> = <font name='Symbol'>θ</font><sub>t</sub> - <font name='Symbol'>α ∇</font>L(<font name='Symbol'>θ</font><sub>t</sub>)",
+    "E[x] = <font name='Symbol'>∫</font> x p(x) dx <font name='Symbol'>≈</font> (1/N) <font name='Symbol'>Σ</font><sub>n</sub> x<sub>n</sub>",
+    "m<sub>t</sub> = <font name='Symbol'>β</font><sub>1</sub> m<sub>t-1</sub> + (1 - <font name='Symbol'>β</font><sub>1</sub>) g<sub>t</sub>",
+]
+
+
+def _sentence(rng, min_words=8, max_words=22, topic_words=None):
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(min_words, max_words))]
+    if topic_words:
+        for _ in range(len(words) // 3):
+            words[rng.randrange(len(words))] = rng.choice(topic_words)
+    if rng.random() < 0.4:
+        words.insert(0, rng.choice(CONNECTIVES))
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:] + "."
+
+
+def _paragraph(rng, sentences=5, topic_words=None):
+    return " ".join(_sentence(rng, topic_words=topic_words) for _ in range(sentences))
+
+
+def _title(rng):
+    words = [rng.choice(VOCABULARY).capitalize() for _ in range(rng.randint(4, 7))]
+    return " ".join(words[:2]) + " for " + " ".join(words[2:])
+
+
+def _authors(rng, n):
+    return ", ".join(f"{chr(65 + rng.randint(0, 25))}. {rng.choice(SURNAMES)}" for _ in range(n))
+
+
+def generate_references(n, style="numbered", seed=0) -> List[str]:
+    """
+    Generate n bibliography entries in one of the common citation styles:
+    'numbered' ([1] A. Smith. Title. Venue, 2020.), 'author-year'
+    (Smith, A. and Chen, B. 2020. Title. Venue.) or 'acm'
+    (A. Smith and B. Chen. 2020. Title. In Venue. ACM, 1-10.)
+    """
+    rng = random.Random(seed)
+    references = []
+    for i in range(1, n + 1):
+        year = rng.randint(1995, 2025)
+        title = _title(rng)
+        venue = rng.choice(VENUES)
+        surnames = [rng.choice(SURNAMES) for _ in range(rng.randint(1, 4))]
+        initials = [chr(65 + rng.randint(0, 25)) for _ in surnames]
+
+        if style == "author-year":
+            names = " and ".join(f"{s}, {c}." for s, c in zip(surnames, initials))
+            references.append(f"{names} {year}. {title}. {venue}, {rng.randint(1, 40)}({rng.randint(1, 12)}).")
+        elif style == "acm":
+            names = " and ".join(f"{c}. {s}" for s, c in zip(surnames, initials))
+            start = rng.randint(1, 900)
+            references.append(f"{names}. {year}. {title}. In {venue}. ACM, {start}-{start + rng.randint(5, 15)}.")
+        else:
+            names = ", ".join(f"{c}. {s}" for s, c in zip(surnames, initials))
+            references.append(f"[{i}] {names}. {title}. {venue}, {year}.")
+    return references
+
+
+def generate_paper_text(seed=0, paragraphs_per_section=4, topic=None) -> Dict:
+    """
+    Plain-text synthetic paper (no PDF round-trip) for benchmarks that need
+    thousands of papers. Returns {"title", "topic", "text"}.
+    """
+    rng = random.Random(seed)
+    topic = topic or rng.choice(sorted(TOPICS))
+    topic_words = TOPICS[topic]
+    title = _title(rng)
+    lines = [title, _authors(rng, rng.randint(2, 5)), "Abstract", _paragraph(rng, 6, topic_words)]
+    for section_number, section in enumerate(SECTIONS, 1):
+        lines.append(f"{section_number} {section}")
+        lines.extend(_paragraph(rng, rng.randint(4, 8), topic_words) for _ in range(paragraphs_per_section))
+    return {"title": title, "topic": topic, "text": "\n".join(lines)}
+
+
+def _figure_image(rng, width, height) -> bytes:
+    """Render a simple bar chart so OCR and image extraction have real pixels to chew on"""
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    bars = rng.randint(3, 8)
+    bar_width = width // (bars * 2)
+    for b in range(bars):
+        bar_height = rng.randint(height // 5, height - 60)
+        x0 = bar_width // 2 + b * bar_width * 2
+        color = tuple(rng.randint(30, 220) for _ in range(3))
+        draw.rectangle([x0, height - 30 - bar_height, x0 + bar_width, height - 30], fill=color)
+        draw.text((x0, height - 25), f"M{b + 1}", fill="black")
+    draw.line([(10, height - 30), (width - 10, height - 30)], fill="black", width=2)
+    draw.text((10, 10), f"Accuracy {rng.randint(60, 99)}.{rng.randint(0, 9)}%", fill="black")
+
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _logo_image(variant=0) -> bytes:
+    """Journal logo for page headers; variants differ in one pixel, so they are separate but identical-looking images"""
+    image = Image.new("RGB", (240, 60), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([4, 4, 56, 56], fill=(20, 60, 140))
+    draw.text((70, 22), "Journal of Synthetic Research", fill="black")
+    image.putpixel((239, 59), (255, 255 - variant % 256, 255))
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def generate_paper_pdf(output_path, seed=0, paragraphs_per_section=4, n_figures=3,
+                       n_equations=6, n_references=30, reference_style="numbered",
+                       figure_size=(800, 500), header_logo=None) -> Dict:
+    """
+    Write a synthetic research paper PDF and return a description of its contents.
+    Size scales with paragraphs_per_section; figures, equations and references
+    are spread through the body the way they are in a real paper.
+    header_logo puts a logo on every page: "shared" (one image object) or
+    "copies" (a separate, visually identical image per page).
+    """
+    rng = random.Random(seed)
+    styles = getSampleStyleSheet()
+    body_style = styles["BodyText"]
+    caption_style = ParagraphStyle("Caption", parent=body_style, fontSize=9, alignment=TA_CENTER)
+    equation_style = ParagraphStyle("Equation", parent=body_style, alignment=TA_CENTER, spaceBefore=6, spaceAfter=6)
+
+    title = _title(rng)
+    story = [
+        Paragraph(title, styles["Title"]),
+        Paragraph(_authors(rng, rng.randint(2, 5)), caption_style),
+        Spacer(1, 12),
+        Paragraph("Abstract", styles["Heading2"]),
+        Paragraph(_paragraph(rng, 6), body_style),
+    ]
+
+    figure_sections = [rng.choice(SECTIONS[2:5]) for _ in range(n_figures)]
+    figure_number = 0
+    equation_number = 0
+
+    for section_number, section in enumerate(SECTIONS, 1):
+        story.append(Paragraph(f"{section_number} {section}", styles["Heading2"]))
+        for _ in range(paragraphs_per_section):
+            story.append(Paragraph(_paragraph(rng, rng.randint(4, 8)), body_style))
+
+        if section == "Methodology":
+            for _ in range(n_equations):
+                equation_number += 1
+                template = rng.choice(EQUATION_TEMPLATES)
+                story.append(Paragraph(f"{template}&nbsp;&nbsp;&nbsp;&nbsp;({equation_number})", equation_style))
+                story.append(Paragraph(_paragraph(rng, 2), body_style))
+
+        for _ in range(figure_sections.count(section)):
+            figure_number += 1
+            width, height = figure_size
+            image = ReportLabImage(io.BytesIO(_figure_image(rng, width, height)), width=400, height=400 * height / width)
+            story.append(image)
+            story.append(Paragraph(
+                f"Figure {figure_number}: {rng.choice(['Accuracy', 'Performance', 'Ablation', 'Latency'])} "
+                f"comparison of the proposed {rng.choice(VOCABULARY)} against baselines.",
+                caption_style,
+            ))
+
+    story.append(Paragraph("References", styles["Heading2"]))
+    for reference in generate_references(n_references, style=reference_style, seed=seed):
+        story.append(Paragraph(reference, body_style))
+
+    def draw_header(canvas, doc):
+        variant = canvas.getPageNumber() if header_logo == "copies" else 0
+        canvas.drawImage(ImageReader(io.BytesIO(_logo_image(variant))), 40, A4[1] - 50, width=120, height=30)
+
+    doc = SimpleDocTemplate(output_path, pagesize=A4)
+    if header_logo:
+        doc.build(story, onFirstPage=draw_header, onLaterPages=draw_header)
+    else:
+        doc.build(story)
+
+    return {
+        "path": output_path,
+        "title": title,
+        "figures": figure_number,
+        "equations": equation_number,
+        "references": n_references,
+        "bytes": os.path.getsize(output_path),
+    }
+
+
+def generate_corpus(output_dir, n_papers=5, seed=0, **paper_kwargs) -> List[Dict]:
+    """Generate n_papers reproducible PDFs in output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    papers = []
+    for i in range(n_papers):
+        path = os.path.join(output_dir, f"synthetic_paper_{i:04d}.pdf")
+        papers.append(generate_paper_pdf(path, seed=seed + i, **paper_kwargs))
+    return papers
@@ -4,7 +4,7 @@ def main():
     memory = ResearchMemory()
     
     # Get all papers
-    all_data = memory.collection.get()
+    all_data = memory.get_chunks(include=["metadatas"])
     
     # Count unique papers
     paper_ids = set()
@@ -14,6 +14,9 @@ def main():
     
     print(f"📊 Papers in memory: {len(paper_ids)}")
     print(f"📊 Total chunks: {len(all_data['ids'])}")
+    if memory.shards > 1:
+        for collection in memory.collections:
+            print(f"   • {collection.name}: {collection.count()} chunks")
     
     # Show first few papers if available
     if paper_ids:
@@ -0,0 +1,92 @@
+import argparse
+from memory.vector_db import ResearchMemory
+from extractors.citation_extractor import extract_citations_from_references
+from config import CITATION_CONTEXT_HOPS
+
+def index_library(memory, paper_id=None, refresh=False):
+    """Register every stored paper in the citation graph and parse/resolve references not stored yet"""
+    graph = memory.citations
+    papers = memory.get_all_paper_metadata()
+    if paper_id:
+        papers = [m for m in papers if m.get("paper_id") == paper_id]
+
+    # Register all papers first so references can link to any of them
+    for metadata in papers:
+        graph.add_paper(metadata["paper_id"], metadata.get("title"), metadata.get("doi"))
+
+    for metadata in papers:
+        pid = metadata["paper_id"]
+        if graph.has_references(pid) and not refresh:
+            continue
+        paper = memory.get_paper_by_id(pid)
+        if not paper:
+            continue
+        print(f"\n📄 {metadata.get('title', 'Unknown')} ({pid})")
+        citations = extract_citations_from_references(None, text=paper["content"], doi_cache=graph)
+        graph.store_references(pid, citations)
+
+    stats = graph.stats()
+    print(f"\n📊 {stats['papers_with_references']}/{stats['papers']} papers indexed, "
+          f"{stats['references']} references ({stats['resolved_dois']} with DOI), "
+          f"{stats['in_library_links']} in-library citation links")
+
+def print_papers(graph, paper_ids, empty_message):
+    if not paper_ids:
+        print(empty_message)
+        return
+    titles = graph.titles(paper_ids)
+    for pid in paper_ids:
+        print(f"- {titles.get(pid, 'Unknown Title')} ({pid})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the library citation graph")
+    parser.add_argument("--persist-dir", default="./chroma_db", help="ChromaDB directory (default: ./chroma_db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Parse and resolve references of stored papers")
+    index_parser.add_argument("--paper-id", help="Only this paper")
+    index_parser.add_argument("--refresh", action="store_true", help="Re-parse papers that already have references")
+
+    for name, help_text in [("cites", "Library papers this paper cites"),
+                            ("cited-by", "Library papers citing this paper"),
+                            ("references", "All stored references of a paper")]:
+        subparsers.add_parser(name, help=help_text).add_argument("paper_id")
+
+    neighbors_parser = subparsers.add_parser("neighbors", help="Library papers within k citation hops")
+    neighbors_parser.add_argument("paper_id")
+    neighbors_parser.add_argument("--hops", type=int, default=CITATION_CONTEXT_HOPS)
+    neighbors_parser.add_argument("--direction", choices=["out", "in", "both"], default="both")
+
+    subparsers.add_parser("stats", help="Citation graph size")
+
+    args = parser.parse_args()
+    memory = ResearchMemory(persist_dir=args.persist_dir)
+    graph = memory.citations
+
+    if args.command == "index":
+        index_library(memory, args.paper_id, args.refresh)
+    elif args.command == "cites":
+        print_papers(graph, graph.cites(args.paper_id), "No in-library papers cited (run 'index' first?)")
+    elif args.command == "cited-by":
+        print_papers(graph, graph.cited_by(args.paper_id), "Not cited by any paper in the library")
+    elif args.command == "references":
+        references = graph.get_references(args.paper_id)
+        if not references:
+            print("No stored references (run 'index' first?)")
+        for i, ref in enumerate(references, 1):
+            marker = " 📚 in library" if ref["cited_paper_id"] else ""
+            print(f"{i}. {ref['reference']}{marker}")
+            print(f"   ➡️ {ref['link']}")
+    elif args.command == "neighbors":
+        neighborhood = graph.neighborhood(args.paper_id, hops=args.hops, direction=args.direction)
+        if not neighborhood:
+            print("No linked papers in the library")
+        titles = graph.titles(list(neighborhood))
+        for pid, distance in sorted(neighborhood.items(), key=lambda item: item[1]):
+            print(f"[{distance} hop{'s' if distance > 1 else ''}] {titles.get(pid, 'Unknown Title')} ({pid})")
+    else:
+        for key, value in graph.stats().items():
+            print(f"{key:24} {value}")
+
+if __name__ == "__main__":
+    main()
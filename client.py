@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import argparse
+import urllib.request
+import urllib.error
+
+from config import SERVER_HOST, SERVER_PORT
+
+# Thin client for server.py: no torch/Chroma/Gemini imports, so each call starts instantly
+
+
+def request(base_url, path, body=None, timeout=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, headers={"Content-Type": "application/json"},
+                                 method="POST" if body is not None else "GET")
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read() or b"{}").get("error", str(e)))
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Cannot reach the service at {base_url} ({e.reason}). Start it with: python server.py")
+
+
+def print_status(status):
+    print(f"🟢 Up {status['uptime_s']:.0f}s | workers: {status['workers']} | queued: {status['queue_depth']} "
+          f"| sessions: {status['sessions']} | chunks: {status['chunks']:,}")
+    if status["latency"]:
+        print(f"\n{'endpoint':12} {'requests':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for endpoint, s in sorted(status["latency"].items()):
+            print(f"{endpoint:12} {s['requests']:>9} {s['errors']:>7} {s['p50_ms']:>9.1f} "
+                  f"{s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f}")
+
+
+def chat(base_url, paper_id=None):
+    session_id = None
+    scope = f"paper {paper_id}" if paper_id else "the whole library"
+    print(f"\n💬 Chatting with {scope}. Type 'quit' to exit.\n")
+    while True:
+        question = input("You: ").strip()
+        if question.lower() in ['quit', 'exit', 'q']:
+            print("Ending conversation.")
+            break
+        if not question:
+            continue
+        reply = request(base_url, "/ask", {"question": question, "paper_id": paper_id, "session_id": session_id})
+        session_id = reply["session_id"]
+        if reply["answer"] is None:
+            print("I couldn't find any relevant information to answer that.\n")
+            continue
+        print(f"\nAssistant: {reply['answer']}\n")
+        titles = list(dict.fromkeys(source["title"] for source in reply["sources"]))
+        print(f"   (prompt ~{reply['prompt_tokens']:,} tokens; sources: {'; '.join(titles)})\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client for the research agent service (server.py)")
+    parser.add_argument("--url", default=f"http://{SERVER_HOST}:{SERVER_PORT}", help="Service base URL")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("status", help="Uptime, queue depth and request latency percentiles")
+    subparsers.add_parser("list", help="List papers in memory")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Ingest PDF files")
+    ingest_parser.add_argument("pdfs", nargs="+")
+
+    search_parser = subparsers.add_parser("search", help="Semantic search over stored chunks")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--paper-id")
+    search_parser.add_argument("-n", "--n-results", type=int, default=5)
+
+    ask_parser = subparsers.add_parser("ask", help="Interactive Q&A (one paper with --paper-id, else the library)")
+    ask_parser.add_argument("--paper-id")
+
+    analyze_parser = subparsers.add_parser("analyze", help="Run section analyses on a stored paper")
+    analyze_parser.add_argument("paper_id")
+    analyze_parser.add_argument("--section", default="summary", help="Section, comma-separated list or 'all'")
+    analyze_parser.add_argument("--retrieval", action="store_true")
+    analyze_parser.add_argument("--save", action="store_true", help="Have the service write the PDF reports")
+
+    args = parser.parse_args()
+    base_url = args.url.rstrip("/")
+
+    try:
+        if args.command == "status":
+            print_status(request(base_url, "/status"))
+        elif args.command == "list":
+            papers = request(base_url, "/papers")["papers"]
+            print(f"\n📚 Papers in Memory: {len(papers)}")
+            for metadata in papers:
+                print(f"\n- {metadata.get('title', 'Untitled')}")
+                print(f"   Authors: {metadata.get('authors', 'Unknown')}")
+                print(f"   ID: {metadata.get('paper_id', 'Unknown')}")
+        elif args.command == "ingest":
+            paths = [os.path.abspath(p) for p in args.pdfs]  # the service may run from another directory
+            for result in request(base_url, "/ingest", {"paths": paths})["results"]:
+                if result["success"]:
+                    print(f"✅ {result['title']} ({result['paper_id']}, {result['chunks']} chunks)")
+                else:
+                    print(f"❌ {result['path']}: {result['error']}")
+        elif args.command == "search":
+            results = request(base_url, "/search", {"query": args.query, "paper_id": args.paper_id,
+                                                    "n_results": args.n_results})["results"]
+            for i, ctx in enumerate(results, 1):
+                print(f"\n{i}. [{ctx['similarity']:.3f}] {ctx['source'].get('title', 'Unknown')}")
+                print(f"   {ctx['text'][:300]}...")
+        elif args.command == "ask":
+            chat(base_url, args.paper_id)
+        elif args.command == "analyze":
+            reply = request(base_url, "/analyze", {"paper_id": args.paper_id, "section": args.section,
+                                                   "retrieval": args.retrieval, "save": args.save})
+            for section, result in reply["results"].items():
+                print(f"\n===== {section} =====")
+                if section == "citations":
+                    for i, c in enumerate(result or [], 1):
+                        print(f"{i}. {c['reference']}\n   ➡️ {c['link']}")
+                else:
+                    print(result or f"⚠️ No {section} analysis was generated.")
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,121 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-2.5-flash"
 
+# Embedding model used for chunks and queries (snapshots record it and refuse to mix models).
+# A store switched by migrate_embeddings.py records its own model in chroma_db/embedding_state.json.
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = "torch"      # torch | onnx | onnx-int8
+EMBEDDING_THREADS = 0            # intra-op threads for the embedding model (0 = library default)
+EMBEDDING_BATCH_SIZE = 64        # chunks encoded per forward pass
+EMBEDDING_ONNX_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"  # quantized graph shipped with the model
+
 # Extraction settings
 MAX_IMAGES = 5
 OCR_ENGINE = "pytesseract"
 
+# Retrieval-driven section analysis (--retrieval)
+SECTION_CONTEXT_MAX_CHARS = 24000  # budget for the retrieved excerpts sent per section
+SECTION_RETRIEVAL_RESULTS = 6      # chunks fetched per section query
+RETRIEVAL_MIN_SIMILARITY = 0.25    # below this best-match similarity, fall back to the full text
+
+# Equations section: send only the PDF regions that carry equations (found from
+# math fonts, symbol density and display layout) instead of the full text
+EQUATION_PREFILTER = True
+EQUATION_MIN_SYMBOL_DENSITY = 0.2  # share of a block's characters in math fonts/symbols that marks it as math
+EQUATION_DISPLAY_MAX_LINES = 3     # longer blocks only count through symbol density
+EQUATION_CONTEXT_BLOCKS = 2        # text blocks kept around each equation; -1 keeps whole pages
+
+# Citation graph context added to literature surveys
+CITATION_CONTEXT_HOPS = 2
+CITATION_CONTEXT_MAX_PAPERS = 20
+
+# Library-wide chat (--ask-all)
+LIBRARY_CHAT_RESULTS = 8    # chunks placed in the prompt
+LIBRARY_CHAT_FETCH_K = 40   # candidates over-fetched for MMR diversification
+MMR_LAMBDA = 0.5            # 1.0 = pure relevance, 0.0 = pure diversity
+MAX_CHUNKS_PER_PAPER = 2
+
+# Cross-encoder reranking of retrieved chunks (--rerank): over-fetch, rescore, keep the best
+RERANK_ENABLED = False
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_FETCH_K = 30       # candidates fetched from the vector store per query
+RERANK_BATCH_SIZE = 16    # (query, chunk) pairs scored per forward pass
+RERANK_BUDGET_MS = 250    # per query; candidates not scored in time keep their vector-search order
+RERANK_THREADS = 0        # torch threads for the cross-encoder (0 = default); process-wide, unused with torch embeddings
+
+# Chat history kept between turns (--ask / --ask-all)
+CHAT_HISTORY_TURNS = 3             # most recent turns kept verbatim
+CHAT_HISTORY_TOKEN_BUDGET = 1200   # cap for the whole history block
+CHAT_SUMMARY_TOKEN_BUDGET = 300    # cap for the summary of older turns
+CHAT_CONTEXT_NEIGHBORS = 0         # chunks added before/after each hit (small-to-big); hits are merged either way
+
+# Figure preprocessing before upload to Gemini
+FIGURE_MAX_DIMENSION = 1536  # longest side in pixels
+FIGURE_FORMAT = "JPEG"       # JPEG | WEBP | PNG
+FIGURE_QUALITY = 85
+
+# Figure extraction: images whose difference hashes differ in at most this many of
+# 256 bits are the same picture; one shown on this many pages is a logo/header
+FIGURE_DUPLICATE_MAX_DISTANCE = 3
+FIGURE_DECORATION_MIN_PAGES = 3
+
+# Multi-section analysis settings
+MAX_SECTION_WORKERS = 4  # concurrent Gemini requests when several sections are requested
+
+# Vector store sharding: papers are hashed over this many Chroma collections and
+# searches fan out over them in parallel. Changing it on an existing store needs
+# a snapshot export/import (snapshot_memory.py) to re-route the chunks.
+VECTOR_DB_SHARDS = 1
+
+# Search engine: "chroma" (HNSW, approximate) or "exact" (brute-force matmul over a
+# memory-mapped matrix of normalized embeddings in chroma_db/exact_index). Exact search
+# has perfect recall and makes paper-scoped queries much cheaper; library-wide queries
+# cost grows linearly, so it suits libraries up to ~100k chunks. Chroma still stores the
+# chunks either way, and the exact index is rebuilt from it when they disagree.
+VECTOR_DB_ENGINE = "chroma"
+EXACT_SEARCH_BLOCK_ROWS = 65536  # rows multiplied per step; bounds the score matrix size
+
+# Near-duplicate detection (MinHash + LSH over word shingles, checked at ingest)
+DEDUP_NUM_PERM = 128      # signature length
+DEDUP_BANDS = 32          # LSH bands (rows per band = NUM_PERM / BANDS)
+DEDUP_SHINGLE_SIZE = 5    # words per shingle
+DEDUP_THRESHOLD = 0.7     # estimated Jaccard similarity above which papers are versions of each other
+DUPLICATE_POLICY = "link" # link (record duplicate_of) | keep-newest (delete older versions) | skip
+DUPLICATE_IDENTICAL = 0.999  # at or above this, a match is the same paper again, never an older version
+
+# Ingesting PDFs straight out of zip/tar archives (ingest_papers.py --archive)
+ARCHIVE_MAX_MEMBER_BYTES = 200 * 1024 * 1024  # larger members are skipped; bounds memory per PDF
+ARCHIVE_PREFETCH = 2                          # members read ahead while the previous one is ingested
+
+# Snapshot export/import (snapshot_memory.py)
+SNAPSHOT_BATCH_SIZE = 2000  # chunks read/written per batch; bounds memory use
+
+# Store maintenance (maintain_memory.py)
+MAINTENANCE_BATCH_SIZE = 2000  # chunks scanned/updated/deleted per Chroma call
+BULK_BATCH_PAPERS = 200        # papers per Chroma call in bulk delete/update/re-chunk
+
+# Embedding model migration (migrate_embeddings.py)
+MIGRATION_BATCH_SIZE = 512  # chunks re-embedded per checkpoint
+
+# Topic clustering of the library (main.py --cluster)
+CLUSTER_COUNT = 0                # clusters; 0 = about sqrt(papers / 2)
+CLUSTER_BATCH_SIZE = 2048        # papers per mini-batch k-means step
+CLUSTER_ITERATIONS = 300         # mini-batch steps
+CLUSTER_LABEL_TERMS = 5          # TF-IDF terms in each cluster label
+CLUSTER_REBUILD_FRACTION = 0.2   # recluster from scratch once this share of papers was added or removed
+
+# Analysis service (server.py / client.py)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_WORKERS = 2            # jobs executed concurrently from the work queue
+SERVER_LATENCY_WINDOW = 1000  # recent requests per endpoint kept for percentiles
+SERVER_MAX_SESSIONS = 100     # chat sessions kept resident (least recently used are dropped)
+SERVER_OUTPUT_DIR = "output"  # PDF reports written by /analyze with "save" (output_prefix is a file name in it)
+
+# Metrics (Prometheus text format: --metrics FILE, or GET /metrics on server.py)
+METRICS_PREFIX = "research_agent_"
+METRICS_WRITE_INTERVAL = 15  # seconds between rewrites of the --metrics file during a run
+
 # PDF Generation settings
 PAGE_SIZE = "A4"
 MARGINS = {
@@ -1,66 +1,183 @@
 import re
 import requests
 from extractors.text_extractor import extract_text_from_pdf
+from utils.tracing import span
+from utils.metrics import counter, histogram
 
-def extract_citations_from_references(pdf_path):
+# Bibliography heading on a line of its own, optionally numbered ("7 References", "VII. REFERENCES")
+HEADING_RE = re.compile(
+    r"^[ \t]*(?:(?:\d{1,2}|[IVX]{1,5})\.?[ \t]+)?(references|bibliography|works cited|literature cited)[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+# Fallback for text without line structure (e.g. stored chunks joined with spaces): the capitalized word
+INLINE_HEADING_RE = re.compile(r"\b(References|REFERENCES|Bibliography|BIBLIOGRAPHY)\b")
+# Material that can follow the bibliography
+TRAILER_RE = re.compile(r"^[ \t]*(?:[A-Z]\.?[ \t]+)?(appendix|appendices|supplementary material)\b.{0,80}$",
+                        re.IGNORECASE | re.MULTILINE)
+
+YEAR_RE = re.compile(r"\b(?:1[89]|20)\d{2}[a-z]?\b")
+BRACKET_MARKER_RE = re.compile(r"(?:^|(?<=\s))\[(\d{1,4})\][ \t\n]")
+LINE_NUMBER_MARKER_RE = re.compile(r"^[ \t]*(\d{1,4})\.[ \t]+(?=\S)", re.MULTILINE)
+NAME = r"[A-Z][A-Za-z\u00C0-\u024F'’\-]{1,30}"
+# Entry starts: at a line start or right after the previous entry's closing period
+AUTHOR_YEAR_START_RE = re.compile(rf"(?:^|(?<=[.)][ \t\n]))[ \t]*{NAME}, (?:[A-Z]\.[ \-]?){{1,3}}", re.MULTILINE)
+ACM_START_RE = re.compile(rf"(?:^|(?<=\.[ \t\n]))[ \t]*(?:[A-Z]\.[ \-]?){{1,3}} ?{NAME}(?:,| and|\.)", re.MULTILINE)
+
+CITATIONS = counter("citations_extracted_total", "References split out of bibliography sections")
+DOI_CACHE_LOOKUPS = counter("doi_cache_lookups_total", "DOI cache lookups for references", ["result"])
+CROSSREF_REQUESTS = counter("crossref_requests_total", "CrossRef lookups by outcome", ["status"])
+CROSSREF_SECONDS = histogram("crossref_request_seconds", "CrossRef lookup latency")
+
+def extract_citations_from_references(pdf_path, text=None, doi_cache=None):
     """
     Extract citations from the References section by detecting
     patterns like 'Author, A. Author. YEAR. Title...'.
+    Pass already-extracted text to avoid re-reading the PDF, and a
+    doi_cache (memory.citations) to reuse earlier CrossRef answers.
+    Returns [{"reference", "link", "doi", "resolved_title"}].
     """
-    text = extract_text_from_pdf(pdf_path)
+    if text is None:
+        text = extract_text_from_pdf(pdf_path)
     if not text:
         return []
     
-    match = re.search(r"(references|bibliography)(.*)", text, re.IGNORECASE | re.DOTALL)
-    if not match:
+    refs_text = find_references_section(text)
+    if refs_text is None:
         print("⚠️ Could not find References section.")
         return []
     
-    refs_text = match.group(2)
-    
-    raw_refs = re.split(r"(?=\n?[A-Z][a-zA-Z\-\']+.*\d{4}\.)", refs_text)
-    
-    references = []
-    for ref in raw_refs:
-        ref = ref.strip().replace("\n", " ")
-        if len(ref) > 50 and re.search(r"\d{4}", ref):
-            references.append(ref)
+    with span("segment_references", chars=len(refs_text)) as seg:
+        references = split_references(refs_text)
+        seg.set(references=len(references))
+    CITATIONS.inc(len(references))
     
     print(f"📚 Grouped into {len(references)} citations.")
     
     enriched = []
+    cached = 0
     for ref in references:
-        print(f"🔍 Processing citation: {ref[:80]}...")
-        doi, url = lookup_doi(ref)
+        hit = doi_cache.cached_lookup(ref) if doi_cache is not None else None
+        if doi_cache is not None:
+            DOI_CACHE_LOOKUPS.inc(result="hit" if hit is not None else "miss")
+        if hit is not None:
+            doi, resolved_title = hit
+            cached += 1
+        else:
+            print(f"🔍 Processing citation: {ref[:80]}...")
+            with span("crossref"):
+                doi, resolved_title, ok = lookup_reference(ref)
+            if ok and doi_cache is not None:
+                doi_cache.cache_lookup(ref, doi, resolved_title)
         if doi:
-            enriched.append({
-                "reference": ref,
-                "link": f"https://doi.org/{doi}"
-            })
+            link = f"https://doi.org/{doi}"
         else:
-            enriched.append({
-                "reference": ref,
-                "link": f"https://scholar.google.com/scholar?q={ref.replace(' ', '+')}"
-            })
+            link = f"https://scholar.google.com/scholar?q={ref.replace(' ', '+')}"
+        enriched.append({
+            "reference": ref,
+            "link": link,
+            "doi": doi,
+            "resolved_title": resolved_title
+        })
     
+    if cached:
+        print(f"♻️ {cached} of {len(references)} citations resolved from the DOI cache.")
     return enriched
 
-def lookup_doi(reference_text):
+def find_references_section(text):
+    """
+    Text of the bibliography. Uses the last heading-like "References" /
+    "Bibliography" line (body text mentioning "references" is ignored),
+    falling back to the last capitalized occurrence for text without line
+    breaks, and stops at a trailing appendix. None if there is no heading.
+    """
+    start = None
+    for match in HEADING_RE.finditer(text):
+        start = match.end()
+    if start is None:
+        for match in INLINE_HEADING_RE.finditer(text):
+            start = match.end()
+    if start is None:
+        return None
+
+    trailer = TRAILER_RE.search(text, start)
+    return text[start:trailer.start() if trailer else len(text)]
+
+def _sequential_starts(markers):
+    """Keep numbered markers that continue the sequence 1, 2, 3, ... (ignores '[12]' cited inside entries)"""
+    starts, expected = [], 1
+    for match in markers:
+        if int(match.group(1)) == expected:
+            starts.append(match.start())
+            expected += 1
+    return starts
+
+def _unnumbered_starts(refs_text, start_re):
+    """
+    Entry starts for author-year / ACM styles: a candidate only opens a new
+    entry once the current one contains a year, so author names inside an
+    entry don't split it. Year positions are walked with one pointer, keeping
+    the whole pass linear.
+    """
+    years = [m.start() for m in YEAR_RE.finditer(refs_text)]
+    starts, y = [], 0
+    for match in start_re.finditer(refs_text):
+        position = match.start()
+        if not starts:
+            starts.append(position)
+            continue
+        while y < len(years) and years[y] < starts[-1]:
+            y += 1
+        if y < len(years) and years[y] < position:
+            starts.append(position)
+    return starts
+
+def split_references(refs_text):
+    """
+    Split a bibliography into entries in a single pass over the text.
+    Supports numbered ("[1] ..." or "1. ..." per line), author-year
+    ("Smith, A. and Chen, B. 2020. Title ...") and ACM
+    ("A. Smith and B. Chen. 2020. Title ...") styles; the style with the
+    most entry starts wins. All patterns are bounded, so cost is linear in
+    the bibliography length.
+    """
+    candidates = [
+        _sequential_starts(BRACKET_MARKER_RE.finditer(refs_text)),
+        _sequential_starts(LINE_NUMBER_MARKER_RE.finditer(refs_text)),
+        _unnumbered_starts(refs_text, AUTHOR_YEAR_START_RE),
+        _unnumbered_starts(refs_text, ACM_START_RE),
+    ]
+    starts = max(candidates, key=len)
+    if not starts:
+        return []
+
+    references = []
+    for begin, end in zip(starts, starts[1:] + [len(refs_text)]):
+        ref = " ".join(refs_text[begin:end].split())
+        if len(ref) > 20:
+            references.append(ref)
+    return references
+
+def lookup_reference(reference_text):
     """
-    Try to fetch DOI from CrossRef API.
+    Look a reference up on CrossRef. Returns (doi, title, ok); ok is False
+    when the request itself failed, so the miss shouldn't be cached.
     """
     try:
         headers = {"User-Agent": "ResearchAgent/1.0"}
         url = f"https://api.crossref.org/works?query.bibliographic={reference_text}&rows=1"
-        r = requests.get(url, headers=headers, timeout=10)
-        data = r.json()
+        with CROSSREF_SECONDS.time():
+            r = requests.get(url, headers=headers, timeout=10)
+            data = r.json()
         
         if data.get("message", {}).get("items"):
             item = data["message"]["items"][0]
-            doi = item.get("DOI")
-            link = f"https://doi.org/{doi}" if doi else None
-            return doi, link
+            titles = item.get("title") or [None]
+            CROSSREF_REQUESTS.inc(status="found")
+            return item.get("DOI"), titles[0], True
+        CROSSREF_REQUESTS.inc(status="not_found")
+        return None, None, True
     except Exception as e:
+        CROSSREF_REQUESTS.inc(status="error")
         print("⚠️ DOI lookup failed:", e)
     
-    return None, None
\ No newline at end of file
+    return None, None, False
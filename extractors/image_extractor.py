@@ -1,16 +1,69 @@
-import fitz  # PyMuPDF
 import pytesseract
 from PIL import Image
 import io
 import re
+from utils.archives import open_pdf
+from utils.tracing import span
+from utils.metrics import counter
+from config import FIGURE_DUPLICATE_MAX_DISTANCE, FIGURE_DECORATION_MIN_PAGES
 
-def extract_images_and_captions(pdf_path, max_selected=7, manual=False):
+PDF_IMAGES = counter("pdf_images_total", "Images in extracted PDFs: placements, unique pictures, "
+                     "decorations excluded from figures", ["kind"])
+
+def extract_images_and_captions(pdf_path, max_selected=7, manual=False, data=None):
+    """data: the PDF's bytes if already read (pdf_path then only names it)"""
+    with span("extract_images", file=pdf_path) as s:
+        figures_text, images, stats = _extract_images_and_captions(pdf_path, max_selected, manual, data)
+        s.set(selected=len(images), chars=len(figures_text), **stats)
+        return figures_text, images
+
+def dhash(image, hash_size=16):
+    """
+    Difference hash: one bit per horizontally adjacent pixel pair of a small
+    grayscale thumbnail. Re-encoded or rescaled copies of a picture hash the
+    same or within a few bits.
+    """
+    pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+def _decode_image(doc, xref, unique):
+    """
+    Decode an image stream and return its record in unique, adding one if no
+    visually identical picture (another xref with a near-equal dHash) is there yet
+    """
+    base_image = doc.extract_image(xref)
+    image_bytes = base_image["image"]
+    image = Image.open(io.BytesIO(image_bytes))
+    image.info["source_bytes"] = len(image_bytes)
+    image_hash = dhash(image)
+    for record in unique:
+        if _hamming(record["hash"], image_hash) <= FIGURE_DUPLICATE_MAX_DISTANCE:
+            return record
+    record = {"image": image, "hash": image_hash, "bytes": len(image_bytes), "pages": set()}
+    unique.append(record)
+    return record
+
+def _extract_images_and_captions(pdf_path, max_selected, manual, data=None):
     print(f"🖼️  Starting image and caption extraction from: {pdf_path}")
     
-    doc = fitz.open(pdf_path)
+    doc = open_pdf(pdf_path, data)
     figures_info = []
     
     try:
+        # Pass 1: decode each image stream once per document (xref memo) and
+        # fold visually identical images together, noting the pages they appear on
+        unique = []
+        by_xref = {}
+        placements = []
+        total = 0
         for page_num in range(len(doc)):
             page = doc[page_num]
             image_list = page.get_images(full=True)
@@ -18,23 +71,49 @@ def extract_images_and_captions(pdf_path, max_selected=7, manual=False):
             page_text = page.get_text("text")
             captions = re.findall(r"(Figure\s?\d+[:.].*)", page_text, re.IGNORECASE)
             
-            for img_index, img in enumerate(image_list, start=1):
+            page_images = []
+            for img in image_list:
+                total += 1
                 xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                image = Image.open(io.BytesIO(image_bytes))
+                if xref not in by_xref:
+                    by_xref[xref] = _decode_image(doc, xref, unique)
+                record = by_xref[xref]
+                record["pages"].add(page_num + 1)
+                if all(record is not other for other in page_images):
+                    page_images.append(record)
+            placements.append((page_num + 1, page_images, captions))
+        
+        # Pass 2: OCR each picture once; logos and headers repeated across pages are not figures
+        decorations = [r for r in unique if len(r["pages"]) >= FIGURE_DECORATION_MIN_PAGES]
+        done = set()
+        for page, page_images, captions in placements:
+            figures = [r for r in page_images if len(r["pages"]) < FIGURE_DECORATION_MIN_PAGES]
+            for img_index, record in enumerate(figures):
+                if id(record) in done:
+                    continue
+                done.add(id(record))
+                image = record["image"]
                 
-                ocr_text = pytesseract.image_to_string(image)
+                with span("ocr", page=page, bytes=record["bytes"], pixels=image.width * image.height):
+                    ocr_text = pytesseract.image_to_string(image)
                 
-                caption = captions[img_index-1] if img_index-1 < len(captions) else "No caption found"
+                caption = captions[img_index] if img_index < len(captions) else "No caption found"
                 
                 figures_info.append({
-                    "page": page_num + 1,
+                    "page": page,
                     "caption": caption.strip(),
                     "ocr": ocr_text.strip(),
                     "image": image
                 })
         
+        stats = {"images": total, "unique_images": len(unique), "decorations": len(decorations)}
+        PDF_IMAGES.inc(total, kind="placement")
+        PDF_IMAGES.inc(len(unique), kind="unique")
+        PDF_IMAGES.inc(len(decorations), kind="decoration")
+        if total:
+            print(f"🧮 {total} image placements, {len(unique)} unique images"
+                  f" ({len(decorations)} repeated decorations excluded)")
+        
         # Selection logic
         selected = [fig for fig in figures_info if fig["caption"].lower().startswith(("figure", "table"))]
         
@@ -65,8 +144,8 @@ def extract_images_and_captions(pdf_path, max_selected=7, manual=False):
         else:
             print("⚠️  No images found in the PDF.")
             
-        return figures_text, [f["image"] for f in selected]
+        return figures_text, [f["image"] for f in selected], stats
         
     except Exception as e:
         print(f"❌ An error occurred during image extraction: {e}")
-        return "", []
\ No newline at end of file
+        return "", [], {}
\ No newline at end of file
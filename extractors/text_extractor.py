@@ -1,22 +1,29 @@
+import io
+import os
 from pypdf import PdfReader
+from utils.tracing import span
 
-def extract_text_from_pdf(pdf_path):
+def extract_text_from_pdf(pdf_path, data=None):
+    """Text of a PDF file, or of the PDF bytes in data (pdf_path then only names it)"""
     print(f"Reading text from: {pdf_path}")
-    try:
-        reader = PdfReader(pdf_path)
-        full_text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                full_text += page_text + "\n"
+    with span("extract", file=os.path.basename(pdf_path)) as s:
+        try:
+            reader = PdfReader(io.BytesIO(data) if data is not None else pdf_path)
+            full_text = ""
+            for page in reader.pages:
+                page_text = page.extract_text()
+                if page_text:
+                    full_text += page_text + "\n"
+            s.set(pages=len(reader.pages), bytes=len(data) if data is not None else os.path.getsize(pdf_path),
+                  chars=len(full_text))
+            
+            if not full_text:
+                print("Warning: No text could be extracted from the PDF.")
+                return None
+
+            print("Text extracted successfully.")
+            return full_text
         
-        if not full_text:
-            print("Warning: No text could be extracted from the PDF.")
+        except Exception as e:
+            print(f"An unexpected error occurred during text extraction: {e}")
             return None
-
-        print("Text extracted successfully.")
-        return full_text
-    
-    except Exception as e:
-        print(f"An unexpected error occurred during text extraction: {e}")
-        return None
\ No newline at end of file
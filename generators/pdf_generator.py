@@ -10,8 +10,13 @@ from reportlab.lib.utils import ImageReader
 import io
 import re
 import matplotlib.pyplot as plt
+from utils.tracing import span
 
 def save_analysis_to_pdf(analysis_text, output_pdf_name, content_type='summary'):
+    with span("render", content_type=content_type, chars=len(analysis_text or "")):
+        _save_analysis_to_pdf(analysis_text, output_pdf_name, content_type)
+
+def _save_analysis_to_pdf(analysis_text, output_pdf_name, content_type):
     print(f"📄 Saving {content_type} analysis to {output_pdf_name}...")
     doc = SimpleDocTemplate(output_pdf_name, pagesize=A4,
                             rightMargin=50, leftMargin=50, topMargin=50, bottomMargin=50)
@@ -1,66 +1,149 @@
 import os
 import glob
+import time
 import argparse
 from datetime import datetime
 from memory.vector_db import ResearchMemory
 from extractors.text_extractor import extract_text_from_pdf
 from utils.text_chunker import chunk_text, extract_paper_metadata
+from utils.tracing import span, enable_tracing, export_trace
+from utils.metrics import counter, histogram, MetricsFileWriter
+from utils.archives import iter_archive, prefetch
+from memory.embeddings import BACKENDS
+from config import (EMBEDDING_BACKEND, EMBEDDING_THREADS, EMBEDDING_BATCH_SIZE, DUPLICATE_POLICY, DUPLICATE_IDENTICAL,
+                    ARCHIVE_MAX_MEMBER_BYTES)
 
-def ingest_pdfs(pdf_paths):
-    """Ingest multiple PDF files into memory"""
-    memory = ResearchMemory()
+DUPLICATE_POLICIES = ("link", "keep-newest", "skip")
+
+PAPERS_INGESTED = counter("papers_ingested_total", "PDFs processed by ingest_pdfs()", ["status"])
+INGEST_SECONDS = histogram("ingest_paper_seconds", "Time to extract, chunk, embed and store one PDF")
+ARCHIVE_BYTES = counter("archive_pdf_bytes_total", "Uncompressed PDF bytes read from archives")
+
+def _ingest_status(result):
+    if result["success"]:
+        return "stored"
+    return "skipped_duplicate" if result.get("duplicate_of") else "failed"
+
+def ingest_pdfs(pdf_paths, memory=None, on_duplicate=DUPLICATE_POLICY):
+    """
+    Ingest multiple PDF files into memory (pass memory to reuse an open ResearchMemory).
+    on_duplicate decides what happens when a PDF is a near-duplicate (another
+    version) of a stored paper: link it, keep only the newest, or skip it.
+    """
+    if memory is None:
+        with span("init", component="memory"):
+            memory = ResearchMemory()
     results = []
     
     for pdf_path in pdf_paths:
-        try:
-            if not os.path.exists(pdf_path):
-                print(f"❌ File not found: {pdf_path}")
-                results.append({"success": False, "error": "File not found", "path": pdf_path})
-                continue
-            
-            print(f"📥 Ingesting: {os.path.basename(pdf_path)}...")
-            
-            # Extract text
-            text = extract_text_from_pdf(pdf_path)
-            if not text:
-                error_msg = "Text extraction failed"
-                print(f"   ❌ {error_msg}")
-                results.append({"success": False, "error": error_msg, "path": pdf_path})
-                continue
-            
-            # Extract metadata
-            metadata = extract_paper_metadata(text)
-            metadata.update({
-                "file_path": os.path.abspath(pdf_path),
-                "file_name": os.path.basename(pdf_path),
-                "file_size": os.path.getsize(pdf_path),
-                "ingestion_date": datetime.now().isoformat(),
-                "processed": False
-            })
-            
-            # Chunk and store
-            chunks = chunk_text(text)
-            paper_id = memory.store_paper(text, metadata, chunks)
-            
-            print(f"   ✅ Success! ID: {paper_id}, Chunks: {len(chunks)}")
-            print(f"   📝 Title: {metadata.get('title', 'Unknown')}")
-            
-            results.append({
-                "success": True, 
-                "paper_id": paper_id, 
-                "path": pdf_path,
-                "title": metadata.get("title", "Unknown"),
-                "authors": metadata.get("authors", "Unknown"),
-                "chunks": len(chunks)
-            })
-            
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-            results.append({"success": False, "error": str(e), "path": pdf_path})
+        results.append(ingest_pdf(pdf_path, memory, on_duplicate))
     
     return results
 
-def ingest_folder(folder_path, pattern="*.pdf"):
+def ingest_pdf(pdf_path, memory, on_duplicate=DUPLICATE_POLICY, data=None, text=None):
+    """
+    Ingest one PDF and return its result record (see _ingest_pdf). text is
+    the PDF's already extracted text, if the caller has it.
+    """
+    with span("ingest_paper", file=os.path.basename(pdf_path)), INGEST_SECONDS.time():
+        result = _ingest_pdf(memory, pdf_path, on_duplicate, data=data, text=text)
+    PAPERS_INGESTED.inc(status=_ingest_status(result))
+    return result
+
+def _already_stored(memory, duplicates, metadata):
+    """Matches that are this very file or an identical copy of it, not an older version"""
+    stored = memory.get_papers_metadata([d["paper_id"] for d in duplicates])
+    return [d for d in duplicates
+            if d["similarity"] >= DUPLICATE_IDENTICAL
+            or (stored.get(d["paper_id"], {}).get("file_path") == metadata["file_path"]
+                and stored.get(d["paper_id"], {}).get("file_size") == metadata["file_size"])]
+
+def _ingest_pdf(memory, pdf_path, on_duplicate=DUPLICATE_POLICY, data=None, text=None):
+    """
+    Extract, chunk and store a single PDF, returning its result record. With
+    data (the PDF's bytes, e.g. an archive member) nothing is read from disk
+    and pdf_path is stored as the paper's file_path as given. A file that is
+    already stored is not stored again, whatever on_duplicate says; the
+    record then has success False and duplicate_of set to the stored paper.
+    """
+    try:
+        if data is None and not os.path.exists(pdf_path):
+            print(f"❌ File not found: {pdf_path}")
+            return {"success": False, "error": "File not found", "path": pdf_path}
+        
+        print(f"📥 Ingesting: {os.path.basename(pdf_path)}...")
+        
+        # Extract text
+        if text is None:
+            text = extract_text_from_pdf(pdf_path, data=data)
+        if not text:
+            error_msg = "Text extraction failed"
+            print(f"   ❌ {error_msg}")
+            return {"success": False, "error": error_msg, "path": pdf_path}
+        
+        # Extract metadata
+        metadata = extract_paper_metadata(text)
+        metadata.update({
+            "file_path": os.path.abspath(pdf_path) if data is None else pdf_path,
+            "file_name": os.path.basename(pdf_path),
+            "file_size": os.path.getsize(pdf_path) if data is None else len(data),
+            "ingestion_date": datetime.now().isoformat(),
+            "processed": False
+        })
+        
+        # Near-duplicate check (other versions of the same paper)
+        duplicates = memory.find_near_duplicates(text)
+        if duplicates:
+            best = duplicates[0]
+            print(f"   🔁 Near-duplicate of '{best['title']}' ({best['paper_id']}, similarity {best['similarity']:.2f})")
+            # The same file again is never stored twice (and under keep-newest must not
+            # delete itself, losing its processed_* flags and citation references)
+            same = _already_stored(memory, duplicates, metadata)
+            if same:
+                print(f"   ⏭️ Already stored as {same[0]['paper_id']}, skipping")
+                return {"success": False, "error": "Already stored",
+                        "duplicate_of": same[0]["paper_id"], "path": pdf_path}
+            if on_duplicate == "skip":
+                return {"success": False, "error": "Near-duplicate of a stored paper",
+                        "duplicate_of": best["paper_id"], "path": pdf_path}
+            if on_duplicate == "keep-newest":
+                # The older versions are deleted below, so point at them as replaced, not as duplicates
+                metadata["replaces"] = ",".join(d["paper_id"] for d in duplicates)
+            else:
+                metadata["duplicate_of"] = best["paper_id"]
+                metadata["duplicate_similarity"] = round(best["similarity"], 3)
+        
+        # Chunk and store
+        chunks = chunk_text(text)
+        paper_id = memory.store_paper(text, metadata, chunks)
+        
+        print(f"   ✅ Success! ID: {paper_id}, Chunks: {len(chunks)}")
+        print(f"   📝 Title: {metadata.get('title', 'Unknown')}")
+        
+        # The paper ingested last is treated as the newest version
+        replaced = []
+        if duplicates and on_duplicate == "keep-newest":
+            for duplicate in duplicates:
+                removed = memory.delete_paper(duplicate["paper_id"])
+                replaced.append(duplicate["paper_id"])
+                print(f"   🗑️ Removed older version {duplicate['paper_id']} ({removed} chunks)")
+        
+        return {
+            "success": True, 
+            "paper_id": paper_id, 
+            "path": pdf_path,
+            "title": metadata.get("title", "Unknown"),
+            "authors": metadata.get("authors", "Unknown"),
+            "chunks": len(chunks),
+            "duplicate_of": metadata.get("duplicate_of"),
+            "replaced": replaced
+        }
+        
+    except Exception as e:
+        print(f"   ❌ Error: {e}")
+        return {"success": False, "error": str(e), "path": pdf_path}
+
+def ingest_folder(folder_path, pattern="*.pdf", memory=None, on_duplicate=DUPLICATE_POLICY):
     """Ingest all PDFs from a folder"""
     pdf_files = glob.glob(os.path.join(folder_path, pattern))
     
@@ -69,7 +152,71 @@ def ingest_folder(folder_path, pattern="*.pdf"):
         return []
     
     print(f"📚 Found {len(pdf_files)} PDF files in {folder_path}")
-    return ingest_pdfs(pdf_files)
+    return ingest_pdfs(pdf_files, memory=memory, on_duplicate=on_duplicate)
+
+def ingest_archive(archive_path, pattern="*.pdf", memory=None, on_duplicate=DUPLICATE_POLICY):
+    """
+    Ingest the PDFs inside a zip or tar(.gz/.bz2/.xz) archive without extracting
+    it to disk. Members are streamed into memory a few at a time (see
+    utils/archives.py) and stored with file_path "<archive>::<member>".
+    """
+    if memory is None:
+        with span("init", component="memory"):
+            memory = ResearchMemory()
+    print(f"📦 Reading {archive_path}")
+    results = []
+    pdf_bytes = 0
+    too_large = 0
+    start = time.perf_counter()
+    for member in prefetch(iter_archive(archive_path, pattern)):
+        if member.data is None:
+            print(f"⚠️ Skipping {member.path}: {member.size / 1e6:.0f} MB is over the archive member limit")
+            results.append({"success": False, "error": "Archive member too large", "path": member.path})
+            PAPERS_INGESTED.inc(status="failed")
+            too_large += 1
+            continue
+        pdf_bytes += member.size
+        ARCHIVE_BYTES.inc(member.size)
+        results.append(ingest_pdf(member.path, memory, on_duplicate, data=member.data))
+    
+    elapsed = time.perf_counter() - start
+    if not results:
+        print(f"❌ No files matching {pattern} in {archive_path}")
+        return []
+    archived = os.path.getsize(archive_path)
+    # Rates cover the members actually read and ingested, not the ones skipped for size
+    ingested = len(results) - too_large
+    print(f"📦 {archive_path}: {ingested} PDFs, {pdf_bytes / 1e6:.1f} MB ({archived / 1e6:.1f} MB archived) "
+          f"in {elapsed:.1f}s, {ingested / elapsed:.2f} PDFs/s, {pdf_bytes / 1e6 / elapsed:.2f} MB/s")
+    if too_large:
+        print(f"⚠️ {too_large} PDF(s) skipped as larger than {ARCHIVE_MAX_MEMBER_BYTES / 1e6:.0f} MB "
+              f"(ARCHIVE_MAX_MEMBER_BYTES)")
+    return results
+
+def report_duplicates(memory):
+    """Print groups of stored papers that are near-duplicates of each other"""
+    added = memory.index_missing_signatures()
+    if added:
+        print(f"🔢 Indexed {added} papers stored before near-duplicate detection")
+    
+    seen = set()
+    groups = 0
+    for metadata in memory.get_all_paper_metadata():
+        paper_id = metadata.get("paper_id")
+        if paper_id in seen:
+            continue
+        paper = memory.get_paper_by_id(paper_id)
+        duplicates = memory.find_near_duplicates(paper["content"], exclude=paper_id) if paper else []
+        duplicates = [d for d in duplicates if d["paper_id"] not in seen]
+        seen.add(paper_id)
+        if not duplicates:
+            continue
+        groups += 1
+        print(f"\n🔁 {metadata.get('title', 'Unknown')} ({paper_id})")
+        for duplicate in duplicates:
+            seen.add(duplicate["paper_id"])
+            print(f"   ≈ {duplicate['title']} ({duplicate['paper_id']}, similarity {duplicate['similarity']:.2f})")
+    print(f"\n📊 {groups} near-duplicate group(s) found")
 
 def main():
     parser = argparse.ArgumentParser(description="Ingest PDFs into research memory")
@@ -77,13 +224,62 @@ def main():
                        help="Folder path (default: current directory)")
     parser.add_argument("--pattern", "-p", default="*.pdf", 
                        help="File pattern (default: *.pdf)")
+    parser.add_argument("--archive", "-a", action="append", metavar="ARCHIVE",
+                       help="Ingest the PDFs (matching --pattern) inside this zip/tar archive without "
+                            "extracting it, instead of --folder; repeatable")
     parser.add_argument("--output", "-o", 
                        help="Output report file (optional)")
+    parser.add_argument("--on-duplicate", choices=DUPLICATE_POLICIES, default=DUPLICATE_POLICY,
+                       help="Near-duplicate (other version) of a stored paper: link it, keep only the "
+                            "newest (by ingestion order: the file ingested last replaces the stored versions), "
+                            f"or skip it. Identical copies are always skipped (default: {DUPLICATE_POLICY})")
+    parser.add_argument("--find-duplicates", action="store_true",
+                       help="Report near-duplicate groups among stored papers instead of ingesting")
+    parser.add_argument("--embedding-backend", choices=BACKENDS, default=EMBEDDING_BACKEND,
+                       help=f"Embedding inference backend (default: {EMBEDDING_BACKEND})")
+    parser.add_argument("--embedding-threads", type=int, default=EMBEDDING_THREADS,
+                       help="Intra-op threads for embedding (default: library default)")
+    parser.add_argument("--embedding-batch-size", type=int, default=EMBEDDING_BATCH_SIZE,
+                       help=f"Chunks per embedding batch (default: {EMBEDDING_BATCH_SIZE})")
+    parser.add_argument("--profile", metavar="TRACE_FILE",
+                       help="Time each ingestion stage and write the trace to TRACE_FILE")
+    parser.add_argument("--profile-format", choices=["json", "chrome"], default="json",
+                       help="Trace format: json (spans + per-stage summary) or chrome (trace-event file)")
+    parser.add_argument("--profile-memory", action="store_true",
+                       help="Also record tracemalloc peak memory per stage (slower)")
+    parser.add_argument("--metrics", metavar="METRICS_FILE",
+                       help="Write counters and histograms in Prometheus text format to METRICS_FILE "
+                            "(rewritten during the run, e.g. for node_exporter's textfile collector)")
     
     args = parser.parse_args()
     
+    if args.profile:
+        enable_tracing(track_memory=args.profile_memory)
+    metrics_writer = MetricsFileWriter(args.metrics) if args.metrics else None
+    if metrics_writer:
+        metrics_writer.start()
+    
     # Ingest papers
-    results = ingest_folder(args.folder, args.pattern)
+    try:
+        with span("init", component="memory"):
+            memory = ResearchMemory(embedding_backend=args.embedding_backend,
+                                    embedding_threads=args.embedding_threads,
+                                    embedding_batch_size=args.embedding_batch_size)
+        if args.find_duplicates:
+            report_duplicates(memory)
+            return
+        if args.archive:
+            results = []
+            for archive_path in args.archive:
+                results.extend(ingest_archive(archive_path, args.pattern, memory=memory,
+                                              on_duplicate=args.on_duplicate))
+        else:
+            results = ingest_folder(args.folder, args.pattern, memory=memory, on_duplicate=args.on_duplicate)
+    finally:
+        if args.profile:
+            export_trace(args.profile, args.profile_format)
+        if metrics_writer:
+            metrics_writer.stop()
     
     # Print summary
     success_count = sum(1 for r in results if r["success"])
@@ -107,7 +303,10 @@ def main():
             f.write("PDF Ingestion Report\n")
             f.write("=" * 50 + "\n\n")
             f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Folder: {os.path.abspath(args.folder)}\n")
+            if args.archive:
+                f.write(f"Archives: {', '.join(os.path.abspath(path) for path in args.archive)}\n")
+            else:
+                f.write(f"Folder: {os.path.abspath(args.folder)}\n")
             f.write(f"Total files: {total_count}\n")
             f.write(f"Successful: {success_count}\n")
             f.write(f"Failed: {total_count - success_count}\n\n")
@@ -1,6 +1,7 @@
 import os
 import argparse
 import sys
+import time
 from dotenv import load_dotenv
 from datetime import datetime
 
@@ -10,17 +11,36 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Now import from your modules
 from models.gemini_client import GeminiClient
 from extractors.text_extractor import extract_text_from_pdf
-from extractors.citation_extractor import extract_citations_from_references
-from processors.summarizer import get_multimodal_summary_from_gemini
-from processors.section_processor import get_section_from_gemini
+from processors.multi_section import parse_sections, analyze_sections
+from processors.conversation import ConversationMemory
 from generators.pdf_generator import save_analysis_to_pdf
 
 # Memory components
-from memory.vector_db import ResearchMemory
-from utils.text_chunker import chunk_text, extract_paper_metadata
+from memory.vector_db import ResearchMemory, merge_contexts
+from utils.text_chunker import estimate_tokens
+from utils.tracing import span, enable_tracing, export_trace
+from utils.metrics import MetricsFileWriter
+from utils.archives import pdf_exists, split_member_path, read_member
+from memory.retrieval import group_contexts_by_paper
+from memory.clustering import cluster_library, print_clusters
+from ingest_papers import ingest_pdf, DUPLICATE_POLICIES
+from config import (LIBRARY_CHAT_RESULTS, LIBRARY_CHAT_FETCH_K, MMR_LAMBDA, MAX_CHUNKS_PER_PAPER, RERANK_ENABLED,
+                    CHAT_CONTEXT_NEIGHBORS, DUPLICATE_POLICY)
 
-def process_stored_paper(paper_id, section, gemini_client, memory):
-    """Process a paper that's already stored in memory"""
+# Output file suffix and PDF layout for each section
+SECTION_OUTPUTS = {
+    "summary": ("summary", "summary"),
+    "methodology": ("methodology", "summary"),
+    "equations": ("equation_analysis", "equations"),
+    "future_scope": ("future_scope", "summary"),
+    "literature_survey": ("literature_survey", "summary"),
+}
+
+def process_stored_paper(paper_id, sections, gemini_client, memory, retrieval=False):
+    """
+    Process a paper that's already stored in memory.
+    Returns {section: result} for the requested sections, or None if the paper is missing.
+    """
     # Retrieve paper from memory
     paper_data = memory.get_paper_by_id(paper_id)
     if not paper_data:
@@ -30,46 +50,56 @@ def process_stored_paper(paper_id, section, gemini_client, memory):
     print(f"📖 Processing: {paper_data['metadata'].get('title', 'Unknown')}")
     
     # Check if we have the original PDF path for multimodal processing
+    # (papers ingested from an archive are read back from it: "<archive>::<member>")
     pdf_path = paper_data['metadata'].get('file_path')
-    
-    if not pdf_path or not os.path.exists(pdf_path):
+    text_only = not pdf_exists(pdf_path)
+    pdf_data = None
+    if not text_only and split_member_path(pdf_path):
+        # Read the member once for figures and the equation prefilter
+        try:
+            pdf_data = read_member(pdf_path)
+        except Exception as e:
+            print(f"⚠️ Could not read {pdf_path} ({e})")
+            text_only = True
+    if text_only:
         print("⚠️ Original PDF not found, using text-only processing")
-        # Fallback to text-only processing
-        if section == "summary":
-            result = get_multimodal_summary_from_gemini(
-                None, paper_data['content'], gemini_client, text_only=True
-            )
-        elif section == "citations":
-            # For citations, we need the PDF, so we can't process without it
-            print("❌ Citations extraction requires original PDF file")
-            return None
-        else:
-            result = get_section_from_gemini(
-                None, paper_data['content'], section, gemini_client, text_only=True
-            )
-    else:
-        # Process with original PDF for multimodal
-        if section == "summary":
-            result = get_multimodal_summary_from_gemini(
-                pdf_path, paper_data['content'], gemini_client
-            )
-        elif section == "citations":
-            result = extract_citations_from_references(pdf_path)
-        else:
-            result = get_section_from_gemini(
-                pdf_path, paper_data['content'], section, gemini_client
-            )
+    
+    outcomes = analyze_sections(pdf_path, paper_data['content'], sections, gemini_client, text_only=text_only,
+                                memory=memory, paper_id=paper_id, retrieval=retrieval, pdf_data=pdf_data)
+    results = {section: outcome["result"] for section, outcome in outcomes.items()}
     
     # Update metadata to mark as processed (if method exists)
     if hasattr(memory, 'update_paper_metadata'):
-        memory.update_paper_metadata(paper_id, {
-            "processed": True,
-            f"processed_{section}": datetime.now().isoformat()
-        })
+        updates = {"processed": True}
+        for section, result in results.items():
+            if result:
+                updates[f"processed_{section}"] = datetime.now().isoformat()
+        memory.update_paper_metadata(paper_id, updates)
     else:
         print("ℹ️ Paper processed (metadata update not available)")
     
-    return result
+    return results
+
+def save_section_result(section, result, output_prefix):
+    """Save one section's analysis as a PDF named <output_prefix>_<suffix>.pdf (citations are printed)"""
+    if section == "citations":
+        if not result:
+            print("\n⚠️ No citations found.")
+            return
+        print(f"\n📚 Extracted {len(result)} Citations with Links:\n")
+        for i, c in enumerate(result, 1):
+            print(f"{i}. {c['reference']}")
+            print(f"   ➡️ {c['link']}")
+        return
+    
+    if not result:
+        print(f"⚠️ No {section} analysis was generated.")
+        return
+    
+    suffix, content_type = SECTION_OUTPUTS[section]
+    output_name = f"{output_prefix}_{suffix}.pdf"
+    save_analysis_to_pdf(result, output_name, content_type=content_type)
+    print(f"✅ Saved: {output_name}")
 
 def list_available_papers(memory, show_numbers=False):
     """List all papers in the database"""
@@ -100,6 +130,96 @@ def list_available_papers(memory, show_numbers=False):
     
     return papers_metadata
 
+def format_excerpts(contexts):
+    return "\n\n---\n\n".join([f"From the section '{ctx['source'].get('title', 'Unknown')}':\n{ctx['text']}" for ctx in contexts])
+
+def answer_paper_question(memory, gemini_client, paper_id, paper_title, question, conversation):
+    """
+    One Q&A turn about a single paper: retrieve, build the prompt, ask Gemini and
+    record the turn in the conversation. Returns {"answer", "prompt_tokens",
+    "saved_tokens", "contexts"}, or None when nothing relevant was found.
+    saved_tokens is what merging overlapping and adjacent excerpts saved.
+    """
+    # 1. RETRIEVAL: Use the new method to find relevant context
+    # (follow-up questions are expanded with the previous one before searching)
+    filter_dict = {"paper_id": paper_id} # Search only within this paper
+    search_query = conversation.rewrite_query(question)
+    relevant_contexts = memory.get_relevant_context(search_query, n_results=3, filter_dict=filter_dict)
+    
+    if not relevant_contexts:
+        return None
+
+    # 2. AUGMENTATION: Prepare the context for the LLM
+    # (neighbouring chunks are joined into one passage so overlaps are sent once)
+    chunks = memory.expand_contexts(relevant_contexts, neighbors=CHAT_CONTEXT_NEIGHBORS)
+    context_for_llm = format_excerpts(merge_contexts(chunks))
+    saved_tokens = estimate_tokens(format_excerpts(chunks)) - estimate_tokens(context_for_llm)
+    
+    # 3. GENERATION: Craft a prompt and ask Gemini
+    prompt = f"""
+    You are a helpful research assistant. Answer the user's question based ONLY on the following excerpts from a research paper.
+    Do not use any outside knowledge. If the answer isn't in the text, say so.
+
+    PAPER TITLE: {paper_title}
+
+    EXCERPTS FROM THE PAPER:
+    {context_for_llm}
+
+    CONVERSATION SO FAR (use it to resolve follow-up questions):
+    {conversation.render() or "None"}
+
+    USER'S QUESTION: {question}
+
+    ANSWER:
+    """
+    
+    # Use your existing Gemini client to get the answer
+    answer = gemini_client.generate_content(prompt) 
+    conversation.add_turn(question, answer or "")
+    return {"answer": answer, "prompt_tokens": estimate_tokens(prompt), "saved_tokens": saved_tokens,
+            "contexts": relevant_contexts}
+
+def answer_library_question(memory, gemini_client, question, conversation):
+    """
+    One Q&A turn across the whole library. Same return shape as answer_paper_question.
+    """
+    # 1. RETRIEVAL: over-fetch, diversify with MMR and cap chunks per paper
+    relevant_contexts = memory.get_diverse_context(
+        conversation.rewrite_query(question), n_results=LIBRARY_CHAT_RESULTS, fetch_k=LIBRARY_CHAT_FETCH_K,
+        lambda_mult=MMR_LAMBDA, max_per_paper=MAX_CHUNKS_PER_PAPER
+    )
+    
+    if not relevant_contexts:
+        return None
+
+    # 2. AUGMENTATION: one block per paper so the model can attribute its answer
+    paper_blocks = []
+    for paper in group_contexts_by_paper(relevant_contexts):
+        excerpts = "\n\n".join(ctx['text'] for ctx in paper['contexts'])
+        paper_blocks.append(f"PAPER: {paper['title']} (ID: {paper['paper_id']})\n{excerpts}")
+    context_for_llm = "\n\n---\n\n".join(paper_blocks)
+    
+    # 3. GENERATION
+    prompt = f"""
+    You are a helpful research assistant with access to excerpts from several research papers.
+    Answer the user's question based ONLY on these excerpts, naming the paper(s) each part of
+    your answer comes from. If the excerpts don't contain the answer, say so.
+
+    EXCERPTS GROUPED BY PAPER:
+    {context_for_llm}
+
+    CONVERSATION SO FAR (use it to resolve follow-up questions):
+    {conversation.render() or "None"}
+
+    USER'S QUESTION: {question}
+
+    ANSWER:
+    """
+    
+    answer = gemini_client.generate_content(prompt)
+    conversation.add_turn(question, answer or "")
+    return {"answer": answer, "prompt_tokens": estimate_tokens(prompt), "contexts": relevant_contexts}
+
 def ask_question_about_paper(memory, gemini_client, paper_id=None):
     """
     Interactive Q&A about a paper using semantic search and Gemini.
@@ -121,6 +241,7 @@ def ask_question_about_paper(memory, gemini_client, paper_id=None):
     print(f"\n💬 You are now chatting about: {paper_title}")
     print("Type your questions (e.g., 'What was the methodology?', 'Explain the results'). Type 'quit' to exit.\n")
 
+    conversation = ConversationMemory()
     while True:
         user_question = input("You: ").strip()
         
@@ -134,35 +255,51 @@ def ask_question_about_paper(memory, gemini_client, paper_id=None):
         print("🤖 Thinking...")
         
         try:
-            # 1. RETRIEVAL: Use the new method to find relevant context
-            filter_dict = {"paper_id": paper_id} # Search only within this paper
-            relevant_contexts = memory.get_relevant_context(user_question, n_results=3, filter_dict=filter_dict)
+            turn_start = time.perf_counter()
+            turn = answer_paper_question(memory, gemini_client, paper_id, paper_title, user_question, conversation)
             
-            if not relevant_contexts:
+            if turn is None:
                 print("I couldn't find any relevant information in the paper to answer that.")
                 continue
 
-            # 2. AUGMENTATION: Prepare the context for the LLM
-            context_for_llm = "\n\n---\n\n".join([f"From the section '{ctx['source'].get('title', 'Unknown')}':\n{ctx['text']}" for ctx in relevant_contexts])
+            print(f"\nAssistant: {turn['answer']}\n")
+            print(f"   (prompt ~{turn['prompt_tokens']:,} tokens, ~{turn['saved_tokens']:,} saved by merging "
+                  f"excerpts, {time.perf_counter() - turn_start:.1f}s)\n")
             
-            # 3. GENERATION: Craft a prompt and ask Gemini
-            prompt = f"""
-            You are a helpful research assistant. Answer the user's question based ONLY on the following excerpts from a research paper.
-            Do not use any outside knowledge. If the answer isn't in the text, say so.
-
-            PAPER TITLE: {paper_title}
+        except Exception as e:
+            print(f"❌ An error occurred: {e}")
 
-            EXCERPTS FROM THE PAPER:
-            {context_for_llm}
+def ask_question_about_library(memory, gemini_client):
+    """
+    Interactive Q&A across every paper in memory (e.g. "Which papers use dataset X?").
+    Retrieval is diversified so the answer can cite many papers without repeating passages.
+    """
+    print("\n💬 You are now chatting with the whole library.")
+    print("Ask questions that span papers (e.g., 'Which papers use ImageNet?'). Type 'quit' to exit.\n")
 
-            USER'S QUESTION: {user_question}
+    conversation = ConversationMemory()
+    while True:
+        user_question = input("You: ").strip()
+        
+        if user_question.lower() in ['quit', 'exit', 'q']:
+            print("Ending conversation.")
+            break
+            
+        if not user_question:
+            continue
 
-            ANSWER:
-            """
+        print("🤖 Thinking...")
+        
+        try:
+            turn_start = time.perf_counter()
+            turn = answer_library_question(memory, gemini_client, user_question, conversation)
             
-            # Use your existing Gemini client to get the answer
-            answer = gemini_client.generate_content(prompt) 
-            print(f"\nAssistant: {answer}\n")
+            if turn is None:
+                print("I couldn't find any relevant information in the library to answer that.")
+                continue
+
+            print(f"\nAssistant: {turn['answer']}\n")
+            print(f"   (prompt ~{turn['prompt_tokens']:,} tokens, {time.perf_counter() - turn_start:.1f}s)\n")
             
         except Exception as e:
             print(f"❌ An error occurred: {e}")
@@ -193,26 +330,82 @@ def select_paper_interactively(memory):
         return None
 
 def main():
-    load_dotenv()
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        print("❌ Error: Gemini API key not found.")
-        return
-    
-    gemini_client = GeminiClient()
-    memory = ResearchMemory()
-    
     parser = argparse.ArgumentParser(description="AI Research Paper Agent")
     parser.add_argument("--section", type=str, default="summary",
-                        help="summary | methodology | equation | citations | future_scope | literature_survey")
+                        help="summary | methodology | equation | citations | future_scope | literature_survey, "
+                             "a comma-separated list of these, or 'all'")
     parser.add_argument("--pdf", type=str, help="Path to new PDF file")
     parser.add_argument("--paper-id", type=str, help="Process paper from memory (use --select for interactive)")
     parser.add_argument("--select", action="store_true", help="Select paper interactively from list")
     parser.add_argument("--list", action="store_true", help="List papers in memory")
     parser.add_argument("--all", action="store_true", help="Process all papers in memory for the given section")
     parser.add_argument("--ask", action="store_true", help="Start interactive Q&A about a paper")
+    parser.add_argument("--ask-all", action="store_true", help="Start interactive Q&A across all papers in memory")
+    parser.add_argument("--cluster", action="store_true",
+                        help="Group the library into topics (incremental after the first run) and list them")
+    parser.add_argument("--clusters", type=int, default=0, metavar="K",
+                        help="Number of topics for --cluster (default: about sqrt(papers / 2))")
+    parser.add_argument("--recluster", action="store_true",
+                        help="With --cluster: rerun k-means instead of adding new papers to existing topics")
+    parser.add_argument("--retrieval", action="store_true",
+                        help="Send retrieved excerpts instead of the full paper for narrow sections "
+                             "(methodology, equations, future_scope, literature_survey)")
+    parser.add_argument("--on-duplicate", choices=DUPLICATE_POLICIES, default=DUPLICATE_POLICY,
+                        help=f"With --pdf: near-duplicate of a stored paper, as in ingest_papers.py "
+                             f"(default: {DUPLICATE_POLICY})")
+    parser.add_argument("--rerank", action=argparse.BooleanOptionalAction, default=RERANK_ENABLED,
+                        help="Rescore retrieved excerpts with a CPU cross-encoder before they reach Gemini")
+    parser.add_argument("--profile", type=str, metavar="TRACE_FILE",
+                        help="Time each pipeline stage and write the trace to TRACE_FILE")
+    parser.add_argument("--profile-format", choices=["json", "chrome"], default="json",
+                        help="Trace format: json (spans + per-stage summary) or chrome (trace-event file)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Also record tracemalloc peak memory per stage (slower)")
+    parser.add_argument("--metrics", type=str, metavar="METRICS_FILE",
+                        help="Write counters and histograms (Gemini calls, tokens, retrieval latency, ...) "
+                             "in Prometheus text format to METRICS_FILE, rewritten during the run")
     args = parser.parse_args()
     
+    if args.profile:
+        enable_tracing(track_memory=args.profile_memory)
+    metrics_writer = MetricsFileWriter(args.metrics) if args.metrics else None
+    if metrics_writer:
+        metrics_writer.start()
+    try:
+        with span("main"):
+            run(args)
+    finally:
+        if args.profile:
+            export_trace(args.profile, args.profile_format)
+        if metrics_writer:
+            metrics_writer.stop()
+
+def run(args):
+    if args.cluster:
+        # Clustering needs only the stored embeddings, not Gemini
+        with span("init", component="memory"):
+            memory = ResearchMemory()
+        state = cluster_library(memory, k=args.clusters, rebuild=args.recluster)
+        print_clusters(memory, state)
+        return
+    
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        print("❌ Error: Gemini API key not found.")
+        return
+    
+    try:
+        sections = parse_sections(args.section)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    
+    with span("init", component="gemini"):
+        gemini_client = GeminiClient()
+    with span("init", component="memory"):
+        memory = ResearchMemory(rerank=args.rerank)
+    
     if args.list:
         list_available_papers(memory)
         return
@@ -220,6 +413,9 @@ def main():
         # This starts the interactive chat/Q&A feature
         ask_question_about_paper(memory, gemini_client)
         return
+    elif args.ask_all:
+        ask_question_about_library(memory, gemini_client)
+        return
     
     # Handle paper selection
     paper_id = None
@@ -237,39 +433,29 @@ def main():
             print("❌ No papers found in memory to process")
             return
         
-        print(f"🔍 Processing {len(papers_metadata)} papers for section: {args.section}")
+        print(f"🔍 Processing {len(papers_metadata)} papers for section(s): {', '.join(sections)}")
         for paper_metadata in papers_metadata:
             paper_id = paper_metadata.get('paper_id')
             if paper_id:
                 print(f"\n📄 Processing paper: {paper_metadata.get('title', 'Unknown')}")
-                result = process_stored_paper(paper_id, args.section, gemini_client, memory)
-                if result:
-                    output_name = f"{paper_id}_{args.section}.pdf"
-                    save_analysis_to_pdf(result, output_name, content_type=args.section)
-                    print(f"✅ Saved: {output_name}")
+                results = process_stored_paper(paper_id, sections, gemini_client, memory, retrieval=args.retrieval)
+                for section, result in (results or {}).items():
+                    save_section_result(section, result, paper_id)
         return
     
     if paper_id:
         # Process paper from memory
-        result = process_stored_paper(paper_id, args.section, gemini_client, memory)
-        if result:
-            # Save or display results
-            if args.section == "citations":
-                print(f"\n📚 Citations found: {len(result)}")
-                for i, citation in enumerate(result, 1):
-                    print(f"{i}. {citation['text']}")
-                    print(f"   🔗 {citation['link']}")
-            else:
-                # Get paper title for better output naming
-                paper_data = memory.get_paper_by_id(paper_id)
-                paper_title = paper_data['metadata'].get('title', paper_id) if paper_data else paper_id
-                # Clean title for filename
-                clean_title = "".join(c for c in paper_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-                clean_title = clean_title.replace(' ', '_')[:50]  # Limit length and replace spaces
-                
-                output_name = f"{clean_title}_{args.section}.pdf"
-                save_analysis_to_pdf(result, output_name, content_type=args.section)
-                print(f"✅ Analysis saved to: {output_name}")
+        results = process_stored_paper(paper_id, sections, gemini_client, memory, retrieval=args.retrieval)
+        if results:
+            # Get paper title for better output naming
+            paper_data = memory.get_paper_by_id(paper_id)
+            paper_title = paper_data['metadata'].get('title', paper_id) if paper_data else paper_id
+            # Clean title for filename
+            clean_title = "".join(c for c in paper_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+            clean_title = clean_title.replace(' ', '_')[:50]  # Limit length and replace spaces
+            
+            for section, result in results.items():
+                save_section_result(section, result, clean_title)
         return
     
     if args.pdf:
@@ -280,83 +466,42 @@ def main():
             print(f"❌ PDF file not found: {input_pdf_path}")
             return
 
-        # Extract text
+        # Extract text once; every requested section reuses it
         print(f"📄 Processing new PDF: {os.path.basename(input_pdf_path)}")
         extracted_text = extract_text_from_pdf(input_pdf_path)
         if not extracted_text:
             print("Ending process due to text extraction failure.")
             return
 
-        # Also store in memory while processing
-        metadata = extract_paper_metadata(extracted_text)
-        metadata.update({
-            "file_path": os.path.abspath(input_pdf_path),
-            "file_name": os.path.basename(input_pdf_path),
-            "section_processed": [args.section]
-        })
-
-        chunks = chunk_text(extracted_text)
-        paper_id = memory.store_paper(extracted_text, metadata, chunks)
-        print(f"📚 Also stored in memory with ID: {paper_id}")
+        # Also store in memory while processing (with the ingest duplicate policy, so
+        # running --pdf again on the same file reuses the stored paper)
+        result = ingest_pdf(input_pdf_path, memory, args.on_duplicate, text=extracted_text)
+        if result["success"]:
+            paper_id = result["paper_id"]
+            print(f"📚 Also stored in memory with ID: {paper_id}")
+        elif result.get("duplicate_of"):
+            paper_id = result["duplicate_of"]
+            print(f"📚 Already in memory as {paper_id}")
+        else:
+            print(f"❌ Could not store the paper: {result.get('error')}")
+            return
+        # Chroma metadata values must be scalars
+        memory.update_paper_metadata(paper_id, {"section_processed": ",".join(sections)})
 
-        # Run selected mode
+        # Run selected sections concurrently
         base_name = os.path.basename(input_pdf_path)
         file_name_without_ext = os.path.splitext(base_name)[0]
 
-        if args.section == "summary":
-            summary = get_multimodal_summary_from_gemini(input_pdf_path, extracted_text, gemini_client)
-            if not summary:
-                print("Ending process due to summary generation failure.")
-                return
-            output_pdf_name = f"{file_name_without_ext}_summary.pdf"
-            save_analysis_to_pdf(summary, output_pdf_name, content_type='summary')
-
-        elif args.section == "methodology":
-            section_text = get_section_from_gemini(input_pdf_path, extracted_text, "methodology", gemini_client)
-            if not section_text:
-                return
-            output_pdf_name = f"{file_name_without_ext}_methodology.pdf"
-            save_analysis_to_pdf(section_text, output_pdf_name, content_type='summary')
-
-        elif args.section in ["equation", "equations"]:
-            section_text = get_section_from_gemini(input_pdf_path, extracted_text, "equations", gemini_client)
-            if not section_text:
-                return
-            output_pdf_name = f"{file_name_without_ext}_equation_analysis.pdf"
-            save_analysis_to_pdf(section_text, output_pdf_name, content_type='equations')
-
-        elif args.section == "citations":
-            citations = extract_citations_from_references(input_pdf_path)
-            if not citations:
-                print("\n⚠️ No citations found.")
-            else:
-                print(f"\n📚 Extracted {len(citations)} Citations with Links:\n")
-                for i, c in enumerate(citations, 1):
-                    print(f"{i}. {c['text']}")
-                    print(f"   ➡️ {c['link']}")
-
-        elif args.section == "future_scope":
-            section_text = get_section_from_gemini(input_pdf_path, extracted_text, "future_scope", gemini_client)
-            if not section_text:
-                return
-            output_pdf_name = f"{file_name_without_ext}_future_scope.pdf"
-            save_analysis_to_pdf(section_text, output_pdf_name, content_type='summary')
-
-        elif args.section == "literature_survey":
-            section_text = get_section_from_gemini(input_pdf_path, extracted_text, "literature_survey", gemini_client)
-            if not section_text:
-                return
-            output_pdf_name = f"{file_name_without_ext}_literature_survey.pdf"
-            save_analysis_to_pdf(section_text, output_pdf_name, content_type='summary')
-
-        else:
-            print("❌ Unknown section. Use one of: summary | methodology | equation | citations | future_scope | literature_survey")
-            return
+        outcomes = analyze_sections(input_pdf_path, extracted_text, sections, gemini_client,
+                                    memory=memory, paper_id=paper_id, retrieval=args.retrieval)
+        for section, outcome in outcomes.items():
+            save_section_result(section, outcome["result"], file_name_without_ext)
     
     else:
         print("❌ Please specify either --pdf, --paper-id, or --select")
         print("   Usage examples:")
         print("   - Process new PDF: python main.py --pdf paper.pdf --section summary")
+        print("   - Several sections in one run: python main.py --pdf paper.pdf --section summary,methodology,equations")
         print("   - Process with paper ID: python main.py --paper-id YOUR_PAPER_ID --section methodology")
         print("   - Select paper interactively: python main.py --select --section summary")
         print("   - List papers: python main.py --list")
@@ -0,0 +1,163 @@
+import json
+import time
+import argparse
+from memory.vector_db import ResearchMemory
+from memory.maintenance import (scan_store, storage_sizes, find_duplicate_papers, stale_index_entries,
+                                slim_metadata, rebuild_collections, vacuum)
+from config import MAINTENANCE_BATCH_SIZE, VECTOR_DB_SHARDS
+
+def _human_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1000:
+            return f"{size:,.0f} {unit}" if unit == "B" else f"{size:,.1f} {unit}"
+        size /= 1000
+    return f"{size:,.1f} GB"
+
+def report(memory, batch_size, top):
+    """Per-paper chunk counts and storage, plus what 'clean' and 'slim' would remove"""
+    scan = scan_store(memory, batch_size=batch_size)
+    papers, totals = scan["papers"], scan["totals"]
+    sizes = storage_sizes(memory.persist_dir)
+
+    print(f"\n📊 {totals['papers']:,} papers, {totals['chunks']:,} chunks "
+          f"(text {_human_size(totals['text_bytes'])}, metadata {_human_size(totals['metadata_bytes'])})")
+    for name, size in sizes.items():
+        print(f"   • {name:20} {_human_size(size):>12}")
+
+    largest = sorted(papers.items(), key=lambda item: -(item[1]["text_bytes"] + item[1]["metadata_bytes"]))
+    if largest:
+        print("\n📚 Largest papers:")
+        print(f"   {'chunks':>7} {'text':>10} {'metadata':>10}  title")
+        for paper_id, paper in largest[:top]:
+            print(f"   {paper['chunks']:>7} {_human_size(paper['text_bytes']):>10} {_human_size(paper['metadata_bytes']):>10}  "
+                  f"{(paper['title'] or 'Unknown')[:60]} ({paper_id})")
+
+    duplicates = find_duplicate_papers(papers)
+    stale = stale_index_entries(memory, papers)
+    print(f"\n🧹 Orphaned chunks: {totals['orphans']:,}")
+    print(f"🧹 Papers stored more than once: {sum(len(group) - 1 for group in duplicates):,} extra copies")
+    print(f"🧹 Stale index entries: {len(stale['dedup']):,} dedup, {len(stale['citations']):,} citations")
+    if totals["misrouted"]:
+        print(f"⚠️ {totals['misrouted']:,} chunks are in the wrong shard; re-route them with "
+              f"snapshot_memory.py export/import")
+
+    return {
+        "totals": totals,
+        "storage": sizes,
+        "papers": [{"paper_id": pid, **{k: v for k, v in paper.items() if k != "fingerprint"}}
+                   for pid, paper in largest],
+        "duplicate_groups": duplicates,
+        "stale_index_entries": stale,
+    }
+
+def clean(memory, batch_size, dry_run):
+    """Delete orphaned chunks, extra copies of papers and stale index entries"""
+    verb = "Would delete" if dry_run else "Deleted"
+    scan = scan_store(memory, batch_size=batch_size, delete_orphans=not dry_run)
+    papers = scan["papers"]
+    print(f"🧹 {verb} {scan['totals']['orphans']:,} orphaned chunks")
+
+    duplicates = find_duplicate_papers(papers)
+    extra = [paper_id for group in duplicates for paper_id in group[1:]]
+    for group in duplicates:
+        print(f"   🔁 {papers[group[0]]['title'] or 'Unknown'}: keeping {group[0]}, "
+              f"dropping {len(group) - 1} cop{'y' if len(group) == 2 else 'ies'}")
+    removed = sum(papers[pid]["chunks"] for pid in extra)
+    if extra and not dry_run:
+        removed = memory.delete_papers(extra)
+    print(f"🧹 {verb} {len(extra):,} duplicate papers ({removed:,} chunks)")
+
+    stale = stale_index_entries(memory, papers)
+    if not dry_run:
+        for paper_id in stale["dedup"]:
+            memory.duplicates.remove(paper_id)
+        for paper_id in stale["citations"]:
+            memory.citations.remove_paper(paper_id)
+    print(f"🧹 {verb} {len(stale['dedup']):,} stale dedup and {len(stale['citations']):,} stale citation entries")
+    return {"orphans": scan["totals"]["orphans"], "duplicate_papers": extra, "duplicate_chunks": removed,
+            "stale_index_entries": stale, "dry_run": dry_run}
+
+def slim(memory, batch_size, dry_run):
+    """Drop metadata retrieval doesn't read from all but each paper's first chunk"""
+    papers = scan_store(memory, batch_size=batch_size)["papers"]
+    stats = slim_metadata(memory, papers, batch_size=batch_size, dry_run=dry_run)
+    print(f"✂️ {'Would slim' if dry_run else 'Slimmed'} {stats['chunks']:,} chunks "
+          f"({_human_size(stats['bytes'])} of metadata)")
+    return {**stats, "dry_run": dry_run}
+
+def rechunk(memory, chunk_size, overlap, paper_ids):
+    """Re-split stored papers with new chunk settings (re-embeds only the new chunks)"""
+    start = time.perf_counter()
+    stats = memory.rechunk(chunk_size=chunk_size, overlap=overlap, paper_ids=paper_ids or None)
+    seconds = time.perf_counter() - start
+    print(f"✂️ Re-chunked {stats['papers']:,} papers: {stats['old_chunks']:,} → {stats['new_chunks']:,} chunks "
+          f"in {seconds:.1f}s")
+    return {**stats, "seconds": seconds}
+
+def delete(memory, paper_ids):
+    removed = memory.delete_papers(paper_ids)
+    print(f"🗑️ Deleted {len(paper_ids):,} papers ({removed:,} chunks)")
+    return {"papers": paper_ids, "chunks": removed}
+
+def compact(memory, batch_size, rebuild):
+    """Optionally rebuild the collections, then reclaim disk space"""
+    rebuilt = rebuild_collections(memory, batch_size=batch_size) if rebuild else []
+    sizes = vacuum(memory)
+    print(f"🗜️ Store size: {_human_size(sizes['before'])} → {_human_size(sizes['after'])}")
+    return {"rebuilt": rebuilt, **sizes}
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and compact the research memory store")
+    parser.add_argument("--persist-dir", default="./chroma_db",
+                       help="ChromaDB directory (default: ./chroma_db)")
+    parser.add_argument("--shards", type=int, default=VECTOR_DB_SHARDS,
+                       help=f"Shard count of the store (default: {VECTOR_DB_SHARDS})")
+    parser.add_argument("--batch-size", type=int, default=MAINTENANCE_BATCH_SIZE,
+                       help=f"Chunks per Chroma call (default: {MAINTENANCE_BATCH_SIZE})")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    report_parser = subparsers.add_parser("report", help="Per-paper chunk counts, storage and cleanup candidates")
+    report_parser.add_argument("--top", type=int, default=20, help="Largest papers to list (default: 20)")
+
+    for name, help_text in [("clean", "Delete orphaned chunks, duplicate papers and stale index entries"),
+                            ("slim", "Keep full metadata only on each paper's first chunk")]:
+        subparsers.add_parser(name, help=help_text).add_argument(
+            "--dry-run", action="store_true", help="Only report what would change")
+
+    rechunk_parser = subparsers.add_parser("rechunk", help="Re-split stored papers with new chunk settings")
+    rechunk_parser.add_argument("--chunk-size", type=int, default=1000, help="Words per chunk (default: 1000)")
+    rechunk_parser.add_argument("--overlap", type=int, default=200, help="Words shared by neighbors (default: 200)")
+    rechunk_parser.add_argument("paper_ids", nargs="*", help="Only these papers (default: all)")
+
+    delete_parser = subparsers.add_parser("delete", help="Delete papers and all their chunks")
+    delete_parser.add_argument("paper_ids", nargs="+")
+
+    compact_parser = subparsers.add_parser("compact", help="VACUUM the store and remove leftover segment files")
+    compact_parser.add_argument("--rebuild", action="store_true",
+                                help="Also copy each collection into a fresh index first (stop other "
+                                     "processes using the store)")
+
+    args = parser.parse_args()
+    memory = ResearchMemory(persist_dir=args.persist_dir, shards=args.shards)
+
+    if args.command == "report":
+        result = report(memory, args.batch_size, args.top)
+    elif args.command == "clean":
+        result = clean(memory, args.batch_size, args.dry_run)
+    elif args.command == "slim":
+        result = slim(memory, args.batch_size, args.dry_run)
+    elif args.command == "rechunk":
+        result = rechunk(memory, args.chunk_size, args.overlap, args.paper_ids)
+    elif args.command == "delete":
+        result = delete(memory, args.paper_ids)
+    else:
+        result = compact(memory, args.batch_size, args.rebuild)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+# Library titles are indexed by their first few words; a reference is matched by sliding
+# a window of that size over its words, so matching costs O(words in the reference)
+TITLE_KEY_WORDS = 4
+MIN_TITLE_WORDS = 4
+
+
+def normalize_title(text: Optional[str]) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def title_keys(norm_text: str) -> set:
+    """Every TITLE_KEY_WORDS-word window of a normalized text"""
+    words = norm_text.split()
+    return {" ".join(words[i:i + TITLE_KEY_WORDS]) for i in range(len(words) - TITLE_KEY_WORDS + 1)}
+
+
+def normalize_doi(doi: Optional[str]) -> Optional[str]:
+    if not doi:
+        return None
+    doi = doi.strip().lower()
+    return re.sub(r"^(https?://(dx\.)?doi\.org/|doi:)", "", doi) or None
+
+
+class CitationGraph:
+    """
+    Persistent citation index for the library (SQLite). Stores each paper's
+    parsed references with their resolved DOIs, caches CrossRef answers by
+    normalized reference text, and links references to papers in the library
+    by DOI or normalized title. The references table doubles as the adjacency
+    list, indexed in both directions for cites / cited-by / k-hop queries.
+    """
+
+    def __init__(self, path: str):
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS papers (
+                paper_id TEXT PRIMARY KEY,
+                title TEXT,
+                norm_title TEXT,
+                title_key TEXT,
+                doi TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers (doi);
+            CREATE INDEX IF NOT EXISTS idx_papers_norm_title ON papers (norm_title);
+            CREATE INDEX IF NOT EXISTS idx_papers_title_key ON papers (title_key);
+
+            CREATE TABLE IF NOT EXISTS refs (
+                paper_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                norm_text TEXT NOT NULL,
+                doi TEXT,
+                resolved_title TEXT,
+                link TEXT,
+                cited_paper_id TEXT,
+                PRIMARY KEY (paper_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS idx_refs_cited ON refs (cited_paper_id);
+            CREATE INDEX IF NOT EXISTS idx_refs_doi ON refs (doi);
+
+            -- Word windows of each unlinked reference (text and CrossRef title), so a newly
+            -- added paper finds the references naming it through its title_key
+            CREATE TABLE IF NOT EXISTS ref_keys (
+                key TEXT NOT NULL,
+                paper_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (key, paper_id, position)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS doi_cache (
+                norm_text TEXT PRIMARY KEY,
+                doi TEXT,
+                title TEXT,
+                fetched TEXT
+            );
+        """)
+        with self.lock, self.conn:
+            if (self.conn.execute("SELECT 1 FROM refs WHERE cited_paper_id IS NULL LIMIT 1").fetchone()
+                    and not self.conn.execute("SELECT 1 FROM ref_keys LIMIT 1").fetchone()):
+                # Graph written before ref_keys existed
+                rows = self.conn.execute("SELECT paper_id, position, norm_text, resolved_title FROM refs "
+                                         "WHERE cited_paper_id IS NULL").fetchall()
+                self.conn.executemany("INSERT OR IGNORE INTO ref_keys VALUES (?, ?, ?)",
+                                      [key_row for row in rows for key_row in self._key_rows(*row)])
+
+    @staticmethod
+    def _key_rows(paper_id: str, position: int, norm_text: str, resolved_title: Optional[str]) -> List[Tuple]:
+        keys = title_keys(norm_text) | title_keys(normalize_title(resolved_title))
+        return [(key, paper_id, position) for key in keys]
+
+    # DOI cache (used by extract_citations_from_references)
+
+    def cached_lookup(self, reference_text: str) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """(doi, title) from an earlier CrossRef lookup of this reference, or None if never looked up"""
+        with self.lock:
+            row = self.conn.execute("SELECT doi, title FROM doi_cache WHERE norm_text = ?",
+                                    (normalize_title(reference_text),)).fetchone()
+        return tuple(row) if row else None
+
+    def cache_lookup(self, reference_text: str, doi: Optional[str], title: Optional[str]):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO doi_cache VALUES (?, ?, ?, ?)",
+                              (normalize_title(reference_text), normalize_doi(doi), title,
+                               datetime.now().isoformat()))
+
+    # Library papers
+
+    def add_paper(self, paper_id: str, title: Optional[str], doi: Optional[str] = None):
+        """
+        Register a library paper and link any stored references (from other
+        papers) that point to it by DOI or title.
+        """
+        norm_title = normalize_title(title)
+        words = norm_title.split()
+        title_key = " ".join(words[:TITLE_KEY_WORDS]) if len(words) >= MIN_TITLE_WORDS else None
+        doi = normalize_doi(doi)
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?, ?)",
+                              (paper_id, title, norm_title, title_key, doi))
+            if doi:
+                self.conn.execute("UPDATE refs SET cited_paper_id = ? WHERE cited_paper_id IS NULL AND doi = ? "
+                                  "AND paper_id != ?", (paper_id, doi, paper_id))
+            if title_key:
+                # Candidates share the title's first words; confirm the whole title as _match does
+                candidates = self.conn.execute(
+                    "SELECT r.paper_id, r.position, r.norm_text, r.resolved_title FROM ref_keys k "
+                    "JOIN refs r ON r.paper_id = k.paper_id AND r.position = k.position "
+                    "WHERE k.key = ? AND k.paper_id != ? AND r.cited_paper_id IS NULL",
+                    (title_key, paper_id)).fetchall()
+                linked = [(citing, position) for citing, position, norm_text, resolved_title in candidates
+                          if norm_title in norm_text or normalize_title(resolved_title) == norm_title]
+                self.conn.executemany("UPDATE refs SET cited_paper_id = ? WHERE paper_id = ? AND position = ?",
+                                      [(paper_id, citing, position) for citing, position in linked])
+
+    def remove_paper(self, paper_id: str):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM papers WHERE paper_id = ?", (paper_id,))
+            self.conn.execute("DELETE FROM refs WHERE paper_id = ?", (paper_id,))
+            self.conn.execute("DELETE FROM ref_keys WHERE paper_id = ?", (paper_id,))
+            unlinked = self.conn.execute("SELECT paper_id, position, norm_text, resolved_title FROM refs "
+                                         "WHERE cited_paper_id = ?", (paper_id,)).fetchall()
+            self.conn.execute("UPDATE refs SET cited_paper_id = NULL WHERE cited_paper_id = ?", (paper_id,))
+            self.conn.executemany("INSERT OR IGNORE INTO ref_keys VALUES (?, ?, ?)",
+                                  [key_row for row in unlinked for key_row in self._key_rows(*row)])
+
+    def _match(self, norm_text: str, doi: Optional[str], resolved_title: Optional[str],
+               citing_paper_id: str) -> Optional[str]:
+        """Library paper a reference points to: by DOI, then CrossRef title, then title inside the text"""
+        if doi:
+            row = self.conn.execute("SELECT paper_id FROM papers WHERE doi = ? AND paper_id != ?",
+                                    (doi, citing_paper_id)).fetchone()
+            if row:
+                return row[0]
+        norm_resolved = normalize_title(resolved_title)
+        if norm_resolved:
+            row = self.conn.execute("SELECT paper_id FROM papers WHERE norm_title = ? AND paper_id != ?",
+                                    (norm_resolved, citing_paper_id)).fetchone()
+            if row:
+                return row[0]
+
+        for key in title_keys(norm_text):
+            for paper_id, norm_title in self.conn.execute(
+                    "SELECT paper_id, norm_title FROM papers WHERE title_key = ? AND paper_id != ?",
+                    (key, citing_paper_id)):
+                if norm_title in norm_text:
+                    return paper_id
+        return None
+
+    # References
+
+    def store_references(self, paper_id: str, citations: List[Dict]):
+        """Replace a paper's references with extract_citations_from_references() output"""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM refs WHERE paper_id = ?", (paper_id,))
+            self.conn.execute("DELETE FROM ref_keys WHERE paper_id = ?", (paper_id,))
+            rows = []
+            key_rows = []
+            for position, citation in enumerate(citations):
+                norm_text = normalize_title(citation["reference"])
+                doi = normalize_doi(citation.get("doi"))
+                cited = self._match(norm_text, doi, citation.get("resolved_title"), paper_id)
+                rows.append((paper_id, position, citation["reference"], norm_text, doi,
+                             citation.get("resolved_title"), citation.get("link"), cited))
+                if cited is None:
+                    key_rows.extend(self._key_rows(paper_id, position, norm_text, citation.get("resolved_title")))
+            self.conn.executemany("INSERT INTO refs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany("INSERT OR IGNORE INTO ref_keys VALUES (?, ?, ?)", key_rows)
+
+    def has_references(self, paper_id: str) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM refs WHERE paper_id = ? LIMIT 1", (paper_id,)).fetchone() is not None
+
+    def get_references(self, paper_id: str) -> List[Dict]:
+        """Stored references in extract_citations_from_references() format (plus cited_paper_id)"""
+        with self.lock:
+            rows = self.conn.execute("SELECT text, doi, resolved_title, link, cited_paper_id FROM refs "
+                                     "WHERE paper_id = ? ORDER BY position", (paper_id,)).fetchall()
+        return [{"reference": text, "doi": doi, "resolved_title": resolved_title, "link": link,
+                 "cited_paper_id": cited} for text, doi, resolved_title, link, cited in rows]
+
+    # Graph queries
+
+    def cites(self, paper_id: str) -> List[str]:
+        """Library papers this paper cites"""
+        with self.lock:
+            rows = self.conn.execute("SELECT DISTINCT cited_paper_id FROM refs WHERE paper_id = ? "
+                                     "AND cited_paper_id IS NOT NULL", (paper_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def cited_by(self, paper_id: str) -> List[str]:
+        """Library papers citing this paper"""
+        with self.lock:
+            rows = self.conn.execute("SELECT DISTINCT paper_id FROM refs WHERE cited_paper_id = ?",
+                                     (paper_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def neighborhood(self, paper_id: str, hops: int = 2, direction: str = "both") -> Dict[str, int]:
+        """
+        Breadth-first k-hop neighborhood: {paper_id: hop distance} for library
+        papers reachable within `hops` citation links. direction is "out"
+        (papers it cites, transitively), "in" (papers citing it) or "both".
+        Each hop is one batched query per direction over the indexed edges.
+        """
+        if direction not in ("out", "in", "both"):
+            raise ValueError("direction must be 'out', 'in' or 'both'")
+        distances = {paper_id: 0}
+        frontier = [paper_id]
+        for hop in range(1, hops + 1):
+            if not frontier:
+                break
+            found = set()
+            with self.lock:
+                for start in range(0, len(frontier), 500):
+                    batch = frontier[start:start + 500]
+                    marks = ",".join("?" * len(batch))
+                    if direction in ("out", "both"):
+                        found.update(row[0] for row in self.conn.execute(
+                            f"SELECT DISTINCT cited_paper_id FROM refs WHERE paper_id IN ({marks}) "
+                            f"AND cited_paper_id IS NOT NULL", batch))
+                    if direction in ("in", "both"):
+                        found.update(row[0] for row in self.conn.execute(
+                            f"SELECT DISTINCT paper_id FROM refs WHERE cited_paper_id IN ({marks})", batch))
+            frontier = [p for p in found if p not in distances]
+            for p in frontier:
+                distances[p] = hop
+        del distances[paper_id]
+        return distances
+
+    def paper_ids(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT paper_id FROM papers")]
+
+    def titles(self, paper_ids: List[str]) -> Dict[str, str]:
+        if not paper_ids:
+            return {}
+        with self.lock:
+            marks = ",".join("?" * len(paper_ids))
+            rows = self.conn.execute(f"SELECT paper_id, title FROM papers WHERE paper_id IN ({marks})",
+                                     list(paper_ids)).fetchall()
+        return dict(rows)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            one = lambda sql: self.conn.execute(sql).fetchone()[0]
+            return {
+                "papers": one("SELECT COUNT(*) FROM papers"),
+                "papers_with_references": one("SELECT COUNT(DISTINCT paper_id) FROM refs"),
+                "references": one("SELECT COUNT(*) FROM refs"),
+                "resolved_dois": one("SELECT COUNT(*) FROM refs WHERE doi IS NOT NULL"),
+                "in_library_links": one("SELECT COUNT(*) FROM refs WHERE cited_paper_id IS NOT NULL"),
+                "cached_lookups": one("SELECT COUNT(*) FROM doi_cache"),
+            }
@@ -0,0 +1,389 @@
+import os
+import re
+import json
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.tracing import span
+from memory.retrieval import normalize
+from memory.vector_db import shard_index
+from config import (SNAPSHOT_BATCH_SIZE, CLUSTER_COUNT, CLUSTER_BATCH_SIZE, CLUSTER_ITERATIONS,
+                    CLUSTER_LABEL_TERMS, CLUSTER_REBUILD_FRACTION)
+
+CLUSTER_DIR = "clusters"
+STATE_FILE = "state.json"
+VECTORS_FILE = "paper_vectors.npy"
+CENTROIDS_FILE = "centroid_sums.npy"
+# Words of a paper's first chunk (title, abstract, introduction) used for cluster labels
+LABEL_WORDS = 300
+
+TERM_RE = re.compile(r"[a-z][a-z\-]{2,}")
+STOPWORDS = frozenset("""
+    the and for are was were with that this these those from into onto over under than then there their
+    which while where when what who whom how also can could may might must should would will shall not
+    but nor has have had been being its our out use used using based via per each such both more most
+    less least other another many much some any all one two three first second new show shows shown
+    paper papers propose proposed approach approaches method methods result results work works study
+    studies present presents provide provides introduce introduced however therefore thus here well
+    between among within without across about above below after before during through further
+    university department email abstract introduction section figure table et al
+""".split())
+
+
+def _cluster_dir(memory) -> str:
+    return os.path.join(memory.persist_dir, CLUSTER_DIR)
+
+
+def _save_array(path: str, array: np.ndarray):
+    tmp_path = f"{path}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def _paper_id(chunk_id: str) -> str:
+    return chunk_id.rsplit("_", 1)[0]
+
+
+class _PaperMeans:
+    """Running per-paper sums of chunk embeddings, one vectorized reduceat per batch"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.sums = None
+        self.counts = None
+
+    def add(self, paper_ids: List[str], embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not len(paper_ids):
+            return
+        codes = np.fromiter((self.index.setdefault(pid, len(self.index)) for pid in paper_ids),
+                            dtype=np.int64, count=len(paper_ids))
+        if self.sums is None:
+            self.sums = np.zeros((1024, embeddings.shape[1]), dtype=np.float64)
+            self.counts = np.zeros(1024, dtype=np.int64)
+        if len(self.index) > len(self.counts):
+            capacity = max(len(self.index), 2 * len(self.counts))
+            self.sums = np.concatenate([self.sums, np.zeros((capacity - len(self.sums), self.sums.shape[1]))])
+            self.counts = np.concatenate([self.counts, np.zeros(capacity - len(self.counts), dtype=np.int64)])
+
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        rows = sorted_codes[starts]
+        self.sums[rows] += np.add.reduceat(embeddings[order], starts, axis=0)
+        self.counts[rows] += np.diff(np.r_[starts, len(codes)])
+
+    def result(self) -> Tuple[List[str], np.ndarray]:
+        n = len(self.index)
+        if not n:
+            return [], np.zeros((0, 0), dtype=np.float32)
+        vectors = self.sums[:n] / self.counts[:n, None]
+        return list(self.index), normalize(vectors.astype(np.float32))
+
+
+def paper_vectors(memory, paper_ids: Optional[List[str]] = None,
+                  batch_size: int = SNAPSHOT_BATCH_SIZE) -> Tuple[List[str], np.ndarray]:
+    """
+    Normalized mean chunk embedding per paper. Without paper_ids every shard
+    is read once in insertion order; with them only those papers' chunks.
+    """
+    means = _PaperMeans()
+    with span("paper_vectors", papers=len(paper_ids) if paper_ids is not None else None) as s:
+        if paper_ids is None:
+            for collection in memory.collections:
+                offset = 0
+                while True:
+                    batch = collection.get(limit=batch_size, offset=offset, include=["embeddings"])
+                    if not batch["ids"]:
+                        break
+                    means.add([_paper_id(chunk_id) for chunk_id in batch["ids"]], batch["embeddings"])
+                    offset += len(batch["ids"])
+        else:
+            for _, chunks in memory._paper_chunks(paper_ids, include=["embeddings"]):
+                for pid, paper_chunks in chunks.items():
+                    means.add([pid] * len(paper_chunks), [fields["embeddings"] for _, fields in paper_chunks])
+        ids, vectors = means.result()
+        s.set(papers=len(ids))
+    return ids, vectors
+
+
+def _first_chunks(memory, paper_ids: List[str], batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict[str, Tuple[str, str]]:
+    """{paper_id: (title, first chunk text)}; chunk 0 carries the full paper metadata"""
+    by_shard = {}
+    for pid in paper_ids:
+        by_shard.setdefault(shard_index(pid, memory.shards), []).append(f"{pid}_0")
+    texts = {}
+    for shard, chunk_ids in by_shard.items():
+        for start in range(0, len(chunk_ids), batch_size):
+            result = memory.collections[shard].get(ids=chunk_ids[start:start + batch_size],
+                                                   include=["documents", "metadatas"])
+            for chunk_id, document, metadata in zip(result["ids"], result["documents"], result["metadatas"]):
+                texts[_paper_id(chunk_id)] = ((metadata or {}).get("title") or "", document or "")
+    return texts
+
+
+def paper_terms(title: str, text: str) -> set:
+    """Distinct content words of the title and the start of the first chunk"""
+    words = " ".join(text.split()[:LABEL_WORDS])
+    return {term.strip("-") for term in TERM_RE.findall(f"{title} {words}".lower())
+            if term.strip("-") not in STOPWORDS and len(term.strip("-")) > 2}
+
+
+def kmeans(vectors: np.ndarray, k: int, batch_size: int = CLUSTER_BATCH_SIZE,
+           iterations: int = CLUSTER_ITERATIONS, seed: int = 0) -> np.ndarray:
+    """
+    Spherical mini-batch k-means (Sculley 2010) on normalized vectors:
+    k-means++ seeding on a sample, then per-center learning rates of
+    1/assignments so far. Each step costs one batch x k matrix product,
+    independent of library size. Returns normalized centers.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    k = min(k, n)
+
+    # k-means++ on a sample (distance = 1 - cosine)
+    sample = vectors[rng.choice(n, size=min(n, max(20 * k, 10000)), replace=False)]
+    centers = [sample[rng.integers(len(sample))]]
+    closest = 1 - sample @ centers[0]
+    for _ in range(1, k):
+        weights = np.maximum(closest, 0)
+        total = weights.sum()
+        pick = rng.choice(len(sample), p=weights / total) if total > 0 else rng.integers(len(sample))
+        centers.append(sample[pick])
+        closest = np.minimum(closest, 1 - sample @ sample[pick])
+    centers = np.array(centers, dtype=np.float32)
+
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(iterations):
+        batch = vectors[rng.integers(0, n, size=min(batch_size, n))]
+        assignment = np.argmax(batch @ centers.T, axis=1)
+        batch_counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, assignment, batch)
+        counts += batch_counts
+        moved = batch_counts > 0
+        centers[moved] += (sums[moved] - batch_counts[moved, None] * centers[moved]) / counts[moved, None]
+        centers = normalize(centers)
+    return centers
+
+
+def assign(vectors: np.ndarray, centers: np.ndarray, block_rows: int = 65536) -> np.ndarray:
+    """Nearest center (cosine) per vector, in row blocks to bound the score matrix"""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_rows):
+        labels[start:start + block_rows] = np.argmax(vectors[start:start + block_rows] @ centers.T, axis=1)
+    return labels
+
+
+def label_terms(term_counts: Counter, size: int, df: Dict[str, int], papers: int,
+                top_n: int = CLUSTER_LABEL_TERMS) -> List[str]:
+    """
+    Class-based TF-IDF: share of the cluster's papers using a term times the
+    term's inverse document frequency over the library. Terms used by a single
+    paper are ignored (names, typos).
+    """
+    scores = {term: count / size * math.log(papers / df.get(term, count))
+              for term, count in term_counts.items() if count > 1}
+    return [term for term, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_n]]
+
+
+def auto_cluster_count(papers: int) -> int:
+    return max(2, min(200, round(math.sqrt(papers / 2))))
+
+
+def load_clusters(memory) -> Optional[Dict]:
+    """The persisted clustering with its vectors and centroid sums, or None"""
+    directory = _cluster_dir(memory)
+    try:
+        with open(os.path.join(directory, STATE_FILE), "r", encoding="utf-8") as f:
+            state = json.load(f)
+        vectors = np.load(os.path.join(directory, VECTORS_FILE))
+        centroid_sums = np.load(os.path.join(directory, CENTROIDS_FILE))
+    except (OSError, ValueError):
+        return None
+    if len(vectors) != len(state["paper_ids"]) or len(centroid_sums) != len(state["clusters"]):
+        return None
+    state["vectors"] = vectors
+    state["centroid_sums"] = centroid_sums
+    return state
+
+
+def _save_clusters(memory, state: Dict):
+    directory = _cluster_dir(memory)
+    os.makedirs(directory, exist_ok=True)
+    _save_array(os.path.join(directory, VECTORS_FILE), state["vectors"])
+    _save_array(os.path.join(directory, CENTROIDS_FILE), state["centroid_sums"])
+    record = {key: value for key, value in state.items() if key not in ("vectors", "centroid_sums")}
+    tmp_path = os.path.join(directory, STATE_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, os.path.join(directory, STATE_FILE))
+
+
+def _cluster_terms(memory, paper_ids: List[str], labels: np.ndarray, k: int) -> Tuple[List[Counter], Counter]:
+    """Per-cluster term counts (papers using each term) and library document frequencies"""
+    term_counts = [Counter() for _ in range(k)]
+    df = Counter()
+    row = {pid: i for i, pid in enumerate(paper_ids)}
+    with span("cluster_terms", papers=len(paper_ids)):
+        for pid, (title, text) in _first_chunks(memory, paper_ids).items():
+            terms = paper_terms(title, text)
+            term_counts[labels[row[pid]]].update(terms)
+            df.update(terms)
+    return term_counts, df
+
+
+def _build(memory, paper_ids: List[str], vectors: np.ndarray, k: int) -> Dict:
+    with span("kmeans", papers=len(paper_ids), k=k):
+        centers = kmeans(vectors, k)
+        labels = assign(vectors, centers)
+    # Drop clusters that ended up empty and renumber the rest
+    used, labels = np.unique(labels, return_inverse=True)
+    k = len(used)
+    centroid_sums = np.zeros((k, vectors.shape[1]), dtype=np.float64)
+    np.add.at(centroid_sums, labels, vectors)
+    term_counts, df = _cluster_terms(memory, paper_ids, labels, k)
+    sizes = np.bincount(labels, minlength=k)
+    now = datetime.now().isoformat()
+    return {
+        "model": memory.embedding_model_name,
+        "created": now,
+        "updated": now,
+        "built_papers": len(paper_ids),
+        "paper_ids": paper_ids,
+        "labels": labels.tolist(),
+        "clusters": [{"id": c, "size": int(sizes[c]), "term_counts": dict(term_counts[c])}
+                     for c in range(k)],
+        "df": dict(df),
+        "vectors": vectors,
+        "centroid_sums": centroid_sums,
+    }
+
+
+def _label_clusters(state: Dict, cluster_ids: Optional[set] = None):
+    """Label the given clusters (default: all); unlabeled ones are always labeled"""
+    papers = len(state["paper_ids"])
+    for cluster in state["clusters"]:
+        if cluster_ids is not None and cluster["id"] not in cluster_ids and "terms" in cluster:
+            continue
+        cluster["terms"] = label_terms(Counter(cluster["term_counts"]), max(cluster["size"], 1), state["df"],
+                                       max(papers, 1))
+
+
+def cluster_library(memory, k: int = CLUSTER_COUNT, rebuild: bool = False,
+                    rebuild_fraction: float = CLUSTER_REBUILD_FRACTION) -> Dict:
+    """
+    Cluster the library by topic and persist the result under
+    persist_dir/clusters. Later calls are incremental: new papers get their
+    vector computed from their own chunks and join the nearest centroid,
+    deleted papers leave theirs (centroids are kept as exact sums), and only
+    the changed clusters are relabeled. Once more than rebuild_fraction of
+    the papers changed (or with rebuild=True, or after an embedding model
+    switch) k-means runs again, reusing the stored paper vectors.
+    Removed papers' terms stay in the label statistics until that rebuild.
+    """
+    state = load_clusters(memory)
+    if state and state["model"] != memory.embedding_model_name:
+        print(f"🔄 Clusters were built with {state['model']}; rebuilding for {memory.embedding_model_name}")
+        state = None
+
+    with span("cluster_library") as s:
+        stored = memory.stored_paper_ids()
+        known = set(state["paper_ids"]) if state else set()
+        new = [pid for pid in stored if pid not in known]
+        gone = known - set(stored)
+        s.set(papers=len(stored), new=len(new), removed=len(gone))
+
+        if not stored:
+            return {"clusters": [], "paper_ids": [], "labels": []}
+
+        if state is None:
+            print(f"🧮 Computing paper vectors for {len(stored):,} papers...")
+            paper_ids, vectors = paper_vectors(memory)
+            k = k or auto_cluster_count(len(paper_ids))
+            print(f"🗺️ Clustering {len(paper_ids):,} papers into {k} topics...")
+            state = _build(memory, paper_ids, vectors, k)
+            touched = None
+        else:
+            keep = np.array([pid not in gone for pid in state["paper_ids"]], dtype=bool)
+            labels = np.asarray(state["labels"], dtype=np.int64)
+            new_ids, new_vectors = paper_vectors(memory, new) if new else ([], None)
+            changed = len(new) + len(gone)
+            if rebuild or changed > rebuild_fraction * max(state["built_papers"], 1):
+                paper_ids = [pid for pid, kept in zip(state["paper_ids"], keep) if kept] + new_ids
+                vectors = state["vectors"][keep]
+                if new_ids:
+                    vectors = np.concatenate([vectors, new_vectors])
+                k = k or auto_cluster_count(len(paper_ids))
+                print(f"🗺️ Re-clustering {len(paper_ids):,} papers into {k} topics "
+                      f"({len(new):,} added, {len(gone):,} removed since the last build)...")
+                state = _build(memory, paper_ids, vectors, k)
+                touched = None
+            else:
+                touched = set()
+                # Removed papers: subtract from their centroid sums
+                for row in np.flatnonzero(~keep):
+                    state["centroid_sums"][labels[row]] -= state["vectors"][row]
+                    state["clusters"][labels[row]]["size"] -= 1
+                    touched.add(int(labels[row]))
+                paper_ids = [pid for pid, kept in zip(state["paper_ids"], keep) if kept]
+                vectors = state["vectors"][keep]
+                labels = labels[keep]
+
+                if new_ids:
+                    centers = normalize(state["centroid_sums"].astype(np.float32))
+                    new_labels = assign(new_vectors, centers)
+                    np.add.at(state["centroid_sums"], new_labels, new_vectors)
+                    texts = _first_chunks(memory, new_ids)
+                    for pid, label in zip(new_ids, new_labels):
+                        cluster = state["clusters"][label]
+                        cluster["size"] += 1
+                        for term in paper_terms(*texts.get(pid, ("", ""))):
+                            cluster["term_counts"][term] = cluster["term_counts"].get(term, 0) + 1
+                            state["df"][term] = state["df"].get(term, 0) + 1
+                        touched.add(int(label))
+                    paper_ids += new_ids
+                    vectors = np.concatenate([vectors, new_vectors])
+                    labels = np.concatenate([labels, new_labels])
+
+                state.update(paper_ids=paper_ids, vectors=vectors, labels=labels.tolist(),
+                             updated=datetime.now().isoformat())
+                if changed:
+                    print(f"➕ {len(new):,} papers added, {len(gone):,} removed; "
+                          f"{len(touched)} cluster(s) updated")
+
+        # Unchanged clusters keep their labels (library-wide df drifts slightly until the next rebuild)
+        _label_clusters(state, touched)
+        _save_clusters(memory, state)
+    return state
+
+
+def cluster_members(state: Dict, per_cluster: int = 3) -> Dict[int, List[str]]:
+    """Papers closest to each centroid: {cluster id: [paper_id, ...]}"""
+    centers = normalize(state["centroid_sums"].astype(np.float32))
+    labels = np.asarray(state["labels"])
+    similarity = np.einsum("ij,ij->i", state["vectors"], centers[labels]) if len(labels) else np.zeros(0)
+    members = {}
+    for cluster in state["clusters"]:
+        rows = np.flatnonzero(labels == cluster["id"])
+        rows = rows[np.argsort(-similarity[rows])[:per_cluster]]
+        members[cluster["id"]] = [state["paper_ids"][row] for row in rows]
+    return members
+
+
+def print_clusters(memory, state: Dict, per_cluster: int = 3):
+    clusters = sorted((c for c in state["clusters"] if c["size"] > 0), key=lambda c: -c["size"])
+    if not clusters:
+        print("❌ No papers found in memory to cluster")
+        return
+    members = cluster_members(state, per_cluster)
+    titles = _first_chunks(memory, [pid for c in clusters for pid in members[c["id"]]])
+    print(f"\n🗺️ {len(clusters)} topics over {len(state['paper_ids']):,} papers (updated {state['updated']})")
+    for cluster in clusters:
+        print(f"\n[{cluster['id']}] {', '.join(cluster['terms']) or 'unlabeled'} — {cluster['size']:,} papers")
+        for pid in members[cluster["id"]]:
+            print(f"   • {titles.get(pid, ('Unknown Title', ''))[0] or 'Unknown Title'} ({pid})")
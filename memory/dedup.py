@@ -0,0 +1,147 @@
+import re
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from config import DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def _permutations(num_perm: int, seed: int = 1):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+_PERMUTATIONS = {}
+
+
+def minhash_signature(text: str, num_perm: int = DEDUP_NUM_PERM, shingle_size: int = DEDUP_SHINGLE_SIZE) -> np.ndarray:
+    """
+    MinHash signature over word shingles of the text (lowercased, alphanumeric
+    words only, so extraction noise like hyphenation and punctuation doesn't
+    matter). Two signatures agree in a fraction of positions that estimates
+    the Jaccard similarity of the shingle sets.
+    """
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) < shingle_size:
+        words = words + [""] * (shingle_size - len(words))
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+
+    if num_perm not in _PERMUTATIONS:
+        _PERMUTATIONS[num_perm] = _permutations(num_perm)
+    a, b = _PERMUTATIONS[num_perm]
+    # (a * h + b) mod p, truncated to 32 bits, minimized over shingles: one row per permutation.
+    # Shingles are processed in blocks so very long papers don't allocate num_perm x n at once.
+    signature = np.full(num_perm, _MAX_HASH, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for start in range(0, len(hashes), 4096):
+            block = hashes[start:start + 4096]
+            permuted = ((np.outer(a, block) + b[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+
+def signature_similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(sig_a == sig_b))
+
+
+class DuplicateIndex:
+    """
+    Persistent MinHash LSH index (SQLite) for near-duplicate papers such as
+    arXiv v1/v2 and camera-ready versions. Signatures are cut into bands; each
+    band is hashed to a bucket, and papers sharing any bucket are candidates,
+    verified against the full signature. A lookup is one indexed query per
+    band, independent of library size, so there is no pairwise comparison.
+    """
+
+    def __init__(self, path: str, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                paper_id TEXT PRIMARY KEY,
+                signature BLOB NOT NULL,
+                title TEXT,
+                added TEXT
+            );
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                paper_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON lsh_buckets (band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_lsh_paper ON lsh_buckets (paper_id);
+        """)
+
+    def _buckets(self, signature: np.ndarray) -> List[tuple]:
+        band_bytes = signature.astype("<u4").tobytes()
+        width = self.rows * 4
+        return [
+            (band, int.from_bytes(hashlib.blake2b(band_bytes[band * width:(band + 1) * width],
+                                                  digest_size=8).digest(), "little", signed=True))
+            for band in range(self.bands)
+        ]
+
+    def add(self, paper_id: str, signature: np.ndarray, title: Optional[str] = None):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM lsh_buckets WHERE paper_id = ?", (paper_id,))
+            self.conn.execute("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?)",
+                              (paper_id, signature.astype("<u4").tobytes(), title, datetime.now().isoformat()))
+            self.conn.executemany("INSERT INTO lsh_buckets VALUES (?, ?, ?)",
+                                  [(band, bucket, paper_id) for band, bucket in self._buckets(signature)])
+
+    def remove(self, paper_id: str):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM lsh_buckets WHERE paper_id = ?", (paper_id,))
+            self.conn.execute("DELETE FROM signatures WHERE paper_id = ?", (paper_id,))
+
+    def query(self, signature: np.ndarray, threshold: float = DEDUP_THRESHOLD,
+              exclude: Optional[str] = None) -> List[Dict]:
+        """
+        Stored papers whose estimated similarity to signature is >= threshold,
+        most similar first: [{"paper_id", "title", "similarity", "added"}]
+        """
+        with self.lock:
+            candidates = set()
+            for band, bucket in self._buckets(signature):
+                rows = self.conn.execute("SELECT paper_id FROM lsh_buckets WHERE band = ? AND bucket = ?",
+                                         (band, bucket)).fetchall()
+                candidates.update(row[0] for row in rows)
+            candidates.discard(exclude)
+
+            matches = []
+            for paper_id in candidates:
+                row = self.conn.execute("SELECT signature, title, added FROM signatures WHERE paper_id = ?",
+                                        (paper_id,)).fetchone()
+                if row is None:
+                    continue
+                similarity = signature_similarity(signature, np.frombuffer(row[0], dtype="<u4"))
+                if similarity >= threshold:
+                    matches.append({"paper_id": paper_id, "title": row[1], "similarity": similarity, "added": row[2]})
+        return sorted(matches, key=lambda m: -m["similarity"])
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def paper_ids(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT paper_id FROM signatures")]
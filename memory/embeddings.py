@@ -0,0 +1,55 @@
+from typing import Optional
+
+from sentence_transformers import SentenceTransformer, CrossEncoder
+
+from config import (EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_THREADS, EMBEDDING_ONNX_INT8_FILE,
+                    RERANK_MODEL, RERANK_THREADS)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_embedding_model(model_name: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND,
+                         threads: Optional[int] = EMBEDDING_THREADS) -> SentenceTransformer:
+    """
+    Load the sentence embedding model on the requested CPU backend:
+    - torch:     default PyTorch inference
+    - onnx:      ONNX Runtime with the model's exported fp32 graph
+    - onnx-int8: ONNX Runtime with the dynamically int8-quantized graph
+    threads caps intra-op parallelism (0/None keeps the library default, which
+    uses every core and oversubscribes when ingestion itself runs in parallel).
+    SentenceTransformer.encode already sorts each call's texts by length before
+    batching, so batches carry little padding.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Valid: {', '.join(BACKENDS)}")
+
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name, device="cpu")
+
+    model_kwargs = {"provider": "CPUExecutionProvider"}
+    if backend == "onnx-int8":
+        model_kwargs["file_name"] = EMBEDDING_ONNX_INT8_FILE
+    if threads:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+        model_kwargs["session_options"] = session_options
+    return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+
+def load_reranker(model_name: str = RERANK_MODEL, threads: Optional[int] = RERANK_THREADS,
+                  embedding_backend: str = EMBEDDING_BACKEND) -> CrossEncoder:
+    """
+    Cross-encoder for reranking (query, passage) pairs on CPU. threads is
+    applied with torch.set_num_threads, which is process-wide, so it is
+    skipped when the embedding model also runs on torch and its own thread
+    setting should win.
+    """
+    if threads and embedding_backend != "torch":
+        import torch
+        torch.set_num_threads(threads)
+    return CrossEncoder(model_name, device="cpu")
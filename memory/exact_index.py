@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from memory.retrieval import normalize
+from config import EXACT_SEARCH_BLOCK_ROWS
+
+_EMPTY_ROWS = np.zeros(0, dtype=np.int64)
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the k largest scores per row, best first"""
+    if k < scores.shape[1]:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    values = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+class ExactIndex:
+    """
+    Exact cosine search over every stored chunk: normalized float32
+    embeddings in one contiguous, memory-mapped matrix (vectors.f32), with
+    chunk ids and paper ids in SQLite (rows.sqlite). A query batch is one
+    matmul per block of rows plus argpartition, so there is no index to build
+    and results are exact. Each paper's row numbers are kept in memory, so a
+    paper_id filter only multiplies that paper's rows.
+    Deleted rows are masked out and reclaimed by compact(), which runs by
+    itself once they outnumber live ones.
+    """
+
+    def __init__(self, path: str, block_rows: int = EXACT_SEARCH_BLOCK_ROWS):
+        os.makedirs(path, exist_ok=True)
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.block_rows = block_rows
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(os.path.join(path, "rows.sqlite"), check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL,
+                paper_id TEXT NOT NULL,
+                alive INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_rows_chunk ON rows (chunk_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._load()
+
+    def _load(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+        rows = self.conn.execute("SELECT chunk_id, paper_id, alive FROM rows ORDER BY row").fetchall()
+        self.chunk_ids = [r[0] for r in rows]
+        self.paper_of_row = [r[1] for r in rows]
+        self.alive = np.fromiter((r[2] for r in rows), dtype=bool, count=len(rows))
+        self.row_of_chunk = {chunk_id: i for i, (chunk_id, _, alive) in enumerate(rows) if alive}
+
+        paper_rows = {}
+        for i, (_, paper_id, alive) in enumerate(rows):
+            if alive:
+                paper_rows.setdefault(paper_id, []).append(i)
+        self.paper_rows = {paper_id: np.asarray(r, dtype=np.int64) for paper_id, r in paper_rows.items()}
+        self._map_vectors()
+
+    def _map_vectors(self):
+        n = len(self.chunk_ids)
+        if n == 0 or self.dim is None:
+            self.vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+            return
+        expected = n * self.dim * 4
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if size < expected:
+            # Vectors lost: drop the rows so the owner sees an empty index and rebuilds it
+            with self.conn:
+                self.conn.execute("DELETE FROM rows")
+            self._load()
+            return
+        if size > expected:
+            # Vectors appended by a write whose rows never committed
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(expected)
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+
+    def count(self) -> int:
+        """Live (searchable) chunks"""
+        return len(self.row_of_chunk)
+
+    def add(self, chunk_ids: List[str], paper_ids: List[str], embeddings):
+        """Append chunks (a chunk id already present is replaced)"""
+        if not chunk_ids:
+            return
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(chunk_ids), -1))
+        with self.lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with self.conn:
+                    self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (str(self.dim),))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({self.dim})")
+
+            replaced = [chunk_id for chunk_id in chunk_ids if chunk_id in self.row_of_chunk]
+            if replaced:
+                self.remove(replaced, compact=False)
+
+            start = len(self.chunk_ids)
+            # Vectors first: rows that never get committed are truncated away on load
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors).tobytes())
+            with self.conn:
+                self.conn.executemany("INSERT INTO rows (row, chunk_id, paper_id) VALUES (?, ?, ?)",
+                                      [(start + i, chunk_id, paper_id)
+                                       for i, (chunk_id, paper_id) in enumerate(zip(chunk_ids, paper_ids))])
+
+            self.chunk_ids.extend(chunk_ids)
+            self.paper_of_row.extend(paper_ids)
+            self.alive = np.concatenate([self.alive, np.ones(len(chunk_ids), dtype=bool)])
+            new_rows = {}
+            for i, (chunk_id, paper_id) in enumerate(zip(chunk_ids, paper_ids)):
+                self.row_of_chunk[chunk_id] = start + i
+                new_rows.setdefault(paper_id, []).append(start + i)
+            for paper_id, rows in new_rows.items():
+                self.paper_rows[paper_id] = np.concatenate([self.paper_rows.get(paper_id, _EMPTY_ROWS),
+                                                            np.asarray(rows, dtype=np.int64)])
+            self._map_vectors()
+
+    def remove(self, chunk_ids: List[str], compact: bool = True):
+        with self.lock:
+            rows = [self.row_of_chunk.pop(chunk_id) for chunk_id in chunk_ids if chunk_id in self.row_of_chunk]
+            if not rows:
+                return
+            with self.conn:
+                self.conn.executemany("UPDATE rows SET alive = 0 WHERE row = ?", [(row,) for row in rows])
+            self.alive[rows] = False
+            for paper_id in {self.paper_of_row[row] for row in rows}:
+                remaining = self.paper_rows[paper_id][self.alive[self.paper_rows[paper_id]]]
+                if len(remaining):
+                    self.paper_rows[paper_id] = remaining
+                else:
+                    del self.paper_rows[paper_id]
+            if compact and len(self.chunk_ids) - self.count() > self.count():
+                self.compact()
+
+    def remove_papers(self, paper_ids: List[str]):
+        with self.lock:
+            chunk_ids = [self.chunk_ids[row] for paper_id in paper_ids
+                         for row in self.paper_rows.get(paper_id, _EMPTY_ROWS)]
+            self.remove(chunk_ids)
+
+    def compact(self):
+        """Rewrite the matrix and row table without deleted rows"""
+        with self.lock:
+            live = np.flatnonzero(self.alive)
+            tmp_path = self.vectors_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                for start in range(0, len(live), self.block_rows):
+                    f.write(np.ascontiguousarray(self.vectors[live[start:start + self.block_rows]]).tobytes())
+            # File first: if the row table update is lost, the file is shorter than the rows and the
+            # index is rebuilt instead of pairing rows with the wrong vectors
+            self.vectors = None
+            os.replace(tmp_path, self.vectors_path)
+            with self.conn:
+                self.conn.execute("DELETE FROM rows")
+                self.conn.executemany("INSERT INTO rows (row, chunk_id, paper_id) VALUES (?, ?, ?)",
+                                      [(i, self.chunk_ids[row], self.paper_of_row[row]) for i, row in enumerate(live)])
+            self._load()
+
+    def clear(self):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM rows")
+                self.conn.execute("DELETE FROM meta")
+            self.vectors = None
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+            self._load()
+
+    def search(self, query_embeddings, k: int,
+               paper_ids: Optional[List[str]] = None) -> List[List[Dict]]:
+        """
+        Top-k chunks per query by cosine similarity, best first:
+        [[{"id", "paper_id", "similarity", "embedding"}, ...], ...].
+        paper_ids restricts the search to those papers' rows.
+        """
+        queries = normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dim or 1))
+        # Writers replace these objects rather than resizing them (remove() only clears alive flags,
+        # which at worst hides a row deleted mid-search), so the scan runs outside the lock
+        with self.lock:
+            vectors, alive = self.vectors, self.alive
+            chunk_ids, paper_of_row = self.chunk_ids, self.paper_of_row
+            if paper_ids is None:
+                candidates = None
+                n = len(alive)
+            else:
+                candidates = np.concatenate([self.paper_rows.get(p, _EMPTY_ROWS) for p in paper_ids] or [_EMPTY_ROWS])
+                n = len(candidates)
+        if n == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, n, self.block_rows):
+            rows = np.arange(start, min(start + self.block_rows, n)) if candidates is None \
+                else candidates[start:start + self.block_rows]
+            block = vectors[start:start + len(rows)] if candidates is None else vectors[rows]
+            scores = queries @ block.T
+            if candidates is None and not alive[rows].all():
+                scores[:, ~alive[rows]] = -np.inf
+            top, values = _top_k(scores, min(k, len(rows)))
+            # Merge this block's winners with the best so far
+            merged_rows = np.concatenate([best_rows, rows[top]], axis=1)
+            merged_scores = np.concatenate([best_scores, values], axis=1)
+            keep, best_scores = _top_k(merged_scores, min(k, merged_scores.shape[1]))
+            best_rows = np.take_along_axis(merged_rows, keep, axis=1)
+
+        results = []
+        for q in range(len(queries)):
+            hits = []
+            for row, score in zip(best_rows[q], best_scores[q]):
+                if not np.isfinite(score):
+                    continue  # fewer live rows than k
+                hits.append({"id": chunk_ids[row], "paper_id": paper_of_row[row],
+                             "similarity": float(score), "embedding": np.array(vectors[row])})
+            results.append(hits)
+        return results
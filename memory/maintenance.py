@@ -0,0 +1,264 @@
+import os
+import re
+import shutil
+import sqlite3
+import hashlib
+from typing import Dict, List, Optional
+
+from utils.tracing import span
+from memory.vector_db import CHUNK_METADATA_KEYS, shard_index
+
+REBUILD_SUFFIX = "_rebuild"
+_SEGMENT_DIR_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def _size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+def storage_sizes(persist_dir: str) -> Dict[str, int]:
+    """Bytes on disk per store file: chroma.sqlite3, HNSW segment directories, side indexes"""
+    sizes = {"segments": 0}
+    for name in sorted(os.listdir(persist_dir)):
+        path = os.path.join(persist_dir, name)
+        if os.path.isdir(path) and _SEGMENT_DIR_RE.match(name):
+            sizes["segments"] += _size(path)
+        else:
+            sizes[name] = _size(path)
+    sizes["total"] = sum(sizes.values())
+    return sizes
+
+
+def _chunk_index(chunk_id: str, paper_id: str) -> Optional[int]:
+    """Position of a chunk in its paper from its id ("<paper_id>_<i>"), None if the id doesn't belong to paper_id"""
+    prefix, _, index = chunk_id.rpartition("_")
+    return int(index) if prefix == paper_id and index.isdigit() else None
+
+
+def _scan(memory, batch_size: int, on_batch=None):
+    """
+    Stream every chunk of every shard in batches of (shard, collection, ids,
+    documents, metadatas). on_batch may delete rows it was given and returns
+    how many, so the next offset still lands on the first unread chunk
+    (Chroma pages in insertion order).
+    """
+    for shard, collection in enumerate(memory.collections):
+        offset = 0
+        while True:
+            batch = collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            if not batch["ids"]:
+                break
+            deleted = on_batch(shard, collection, batch["ids"], batch["documents"], batch["metadatas"]) or 0
+            offset += len(batch["ids"]) - deleted
+
+
+def scan_store(memory, batch_size: int = 2000, delete_orphans: bool = False) -> Dict:
+    """
+    One streaming pass over the store. Only per-paper aggregates are kept
+    (chunk count, text/metadata bytes, first chunk, a content fingerprint),
+    so memory grows with the number of papers, not chunks.
+    Orphans are chunks without a paper_id or whose id doesn't belong to the
+    paper in their metadata (they can't be retrieved as part of any paper);
+    with delete_orphans they are deleted batch by batch during the scan.
+    """
+    papers = {}
+    totals = {"chunks": 0, "orphans": 0, "misrouted": 0, "text_bytes": 0, "metadata_bytes": 0}
+
+    def on_batch(shard, collection, ids, documents, metadatas):
+        orphans = []
+        for chunk_id, document, metadata in zip(ids, documents, metadatas):
+            metadata = metadata or {}
+            paper_id = metadata.get("paper_id")
+            index = _chunk_index(chunk_id, paper_id) if paper_id else None
+            if index is None:
+                orphans.append(chunk_id)
+                continue
+
+            document = document or ""
+            text_bytes = len(document.encode("utf-8"))
+            metadata_bytes = sum(len(str(key)) + len(str(value)) for key, value in metadata.items())
+            paper = papers.get(paper_id)
+            if paper is None:
+                paper = papers[paper_id] = {"shard": shard, "chunks": 0, "text_bytes": 0, "metadata_bytes": 0,
+                                            "first_chunk": index, "fingerprint": 0, "title": None,
+                                            "ingestion_date": None}
+            paper["chunks"] += 1
+            paper["text_bytes"] += text_bytes
+            paper["metadata_bytes"] += metadata_bytes
+            paper["first_chunk"] = min(paper["first_chunk"], index)
+            # Order-independent: sum of per-chunk digests, so equal chunk sets give equal fingerprints
+            digest = hashlib.blake2b(document.encode("utf-8"), digest_size=16).digest()
+            paper["fingerprint"] = (paper["fingerprint"] + int.from_bytes(digest, "little")) % (1 << 128)
+            paper["title"] = paper["title"] or metadata.get("title")
+            paper["ingestion_date"] = paper["ingestion_date"] or metadata.get("ingestion_date")
+
+            totals["chunks"] += 1
+            totals["text_bytes"] += text_bytes
+            totals["metadata_bytes"] += metadata_bytes
+            if memory.shards > 1 and shard_index(paper_id, memory.shards) != shard:
+                totals["misrouted"] += 1
+
+        totals["orphans"] += len(orphans)
+        if orphans and delete_orphans:
+            collection.delete(ids=orphans)
+            if memory.exact is not None:
+                memory.exact.remove(orphans)
+            return len(orphans)
+        return 0
+
+    with span("maintenance_scan") as s:
+        _scan(memory, batch_size, on_batch)
+        s.set(chunks=totals["chunks"], papers=len(papers))
+    totals["papers"] = len(papers)
+    return {"papers": papers, "totals": totals}
+
+
+def find_duplicate_papers(papers: Dict[str, Dict]) -> List[List[str]]:
+    """
+    Groups of papers stored more than once with identical chunks, earliest
+    ingested first (that copy is the one kept: chat history and citation
+    links are most likely to point at it).
+    """
+    groups = {}
+    for paper_id, paper in papers.items():
+        groups.setdefault((paper["fingerprint"], paper["chunks"]), []).append(paper_id)
+    return [sorted(ids, key=lambda pid: (papers[pid]["ingestion_date"] or "~", pid))
+            for ids in groups.values() if len(ids) > 1]
+
+
+def stale_index_entries(memory, papers: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """Near-duplicate signatures and citation-graph papers whose paper is no longer in Chroma"""
+    return {
+        "dedup": [pid for pid in memory.duplicates.paper_ids() if pid not in papers],
+        "citations": [pid for pid in memory.citations.paper_ids() if pid not in papers],
+    }
+
+
+def slim_metadata(memory, papers: Dict[str, Dict], batch_size: int = 2000, dry_run: bool = False) -> Dict:
+    """
+    Strip every chunk except each paper's first down to CHUNK_METADATA_KEYS
+    (paper readers merge the chunks' metadata back together). Updates go out
+    in batches as the scan proceeds, so memory stays bounded.
+    """
+    stats = {"chunks": 0, "bytes": 0}
+    pending_ids, pending_metadatas = [], []
+
+    def flush(collection):
+        if pending_ids and not dry_run:
+            collection.update(ids=list(pending_ids), metadatas=list(pending_metadatas))
+        pending_ids.clear()
+        pending_metadatas.clear()
+
+    def on_batch(shard, collection, ids, documents, metadatas):
+        for chunk_id, metadata in zip(ids, metadatas):
+            paper = papers.get((metadata or {}).get("paper_id"))
+            if paper is None or _chunk_index(chunk_id, metadata["paper_id"]) == paper["first_chunk"]:
+                continue
+            extra = [key for key in metadata if key not in CHUNK_METADATA_KEYS]
+            if not extra:
+                continue
+            pending_ids.append(chunk_id)
+            pending_metadatas.append({key: None for key in extra})  # None removes the key
+            stats["chunks"] += 1
+            stats["bytes"] += sum(len(str(key)) + len(str(metadata[key])) for key in extra)
+        flush(collection)
+
+    with span("maintenance_slim") as s:
+        _scan(memory, batch_size, on_batch)
+        s.set(chunks=stats["chunks"])
+    return stats
+
+
+def rebuild_collections(memory, batch_size: int = 2000) -> List[Dict]:
+    """
+    Copy each collection (stored embeddings, no re-embedding) into a fresh one
+    and swap it in under the same name, dropping the HNSW index's deleted
+    entries. A copy left by an interrupted rebuild is finished if the
+    original is already gone, and discarded otherwise. Other processes
+    holding the store open must be restarted afterwards.
+    """
+    client = memory.client
+    results = []
+    for shard, collection in enumerate(memory.collections):
+        name = collection.name
+        rebuild_name = name + REBUILD_SUFFIX
+        existing = [c.name for c in client.list_collections()]
+        if rebuild_name in existing:
+            leftover = client.get_collection(rebuild_name)
+            if collection.count() == 0 and leftover.count() > 0:
+                print(f"   ♻️ Finishing interrupted rebuild of {name}")
+                client.delete_collection(name)
+                leftover.modify(name=name)
+                memory.collections[shard] = leftover
+                results.append({"collection": name, "chunks": leftover.count(), "resumed": True})
+                continue
+            client.delete_collection(rebuild_name)
+
+        with span("maintenance_rebuild", collection=name) as s:
+            fresh = client.create_collection(name=rebuild_name, metadata=collection.metadata)
+            offset = 0
+            while True:
+                batch = collection.get(limit=batch_size, offset=offset,
+                                       include=["embeddings", "documents", "metadatas"])
+                if not batch["ids"]:
+                    break
+                fresh.add(ids=batch["ids"], embeddings=batch["embeddings"],
+                          documents=batch["documents"], metadatas=batch["metadatas"])
+                offset += len(batch["ids"])
+                print(f"   🔨 {name}: copied {offset:,} chunks...", end="\r")
+            if fresh.count() != collection.count():
+                client.delete_collection(rebuild_name)
+                raise RuntimeError(f"Rebuild of {name} copied {offset} of {collection.count()} chunks "
+                                   f"(store written to during rebuild?); original left untouched")
+            client.delete_collection(name)
+            fresh.modify(name=name)
+            memory.collections[shard] = fresh
+            s.set(chunks=offset)
+        print(f"\n   🔨 {name}: rebuilt with {offset:,} chunks")
+        results.append({"collection": name, "chunks": offset, "resumed": False})
+
+    if memory.shards == 1:
+        memory.collection = memory.collections[0]
+    return results
+
+
+def orphan_segment_dirs(persist_dir: str) -> List[str]:
+    """HNSW segment directories of deleted collections that Chroma left on disk"""
+    conn = sqlite3.connect(os.path.join(persist_dir, "chroma.sqlite3"))
+    try:
+        live = {row[0] for row in conn.execute("SELECT id FROM segments")}
+    finally:
+        conn.close()
+    return [os.path.join(persist_dir, name) for name in os.listdir(persist_dir)
+            if _SEGMENT_DIR_RE.match(name) and name not in live
+            and os.path.isdir(os.path.join(persist_dir, name))]
+
+
+def vacuum(memory) -> Dict[str, int]:
+    """
+    Reclaim disk space: remove orphaned segment directories, compact the
+    exact search index and VACUUM Chroma's SQLite file and the side indexes.
+    Returns bytes before/after.
+    """
+    before = storage_sizes(memory.persist_dir)["total"]
+    with span("maintenance_vacuum"):
+        for path in orphan_segment_dirs(memory.persist_dir):
+            shutil.rmtree(path)
+        conn = sqlite3.connect(os.path.join(memory.persist_dir, "chroma.sqlite3"))
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        indexes = [memory.duplicates, memory.citations]
+        if memory.exact is not None:
+            memory.exact.compact()
+            indexes.append(memory.exact)
+        for index in indexes:
+            with index.lock:
+                index.conn.execute("VACUUM")
+    return {"before": before, "after": storage_sizes(memory.persist_dir)["total"]}
@@ -0,0 +1,280 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.tracing import span
+from memory.embeddings import load_embedding_model
+from memory.vector_db import read_embedding_state, write_embedding_state, collection_suffix, collection_names
+from config import EMBEDDING_BACKEND, EMBEDDING_THREADS, MIGRATION_BATCH_SIZE
+
+
+def _targets(memory, migration: Dict) -> List:
+    return [memory.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+            for name in collection_names(memory.shards, migration["suffix"])]
+
+
+def _progress(done: int, total: int, start: float, migrated: int):
+    rate = migrated / max(time.perf_counter() - start, 1e-9)
+    eta = (total - done) / rate if rate else 0
+    print(f"   🔄 {done:,}/{total:,} chunks ({rate:,.0f} chunks/s, ETA {eta / 60:.1f} min)   ", end="\r")
+
+
+def migration_status(memory) -> Optional[Dict]:
+    """The migration in progress (model, per-shard offsets, counts) or None"""
+    migration = read_embedding_state(memory.persist_dir).get("migration")
+    if migration:
+        migration = dict(migration, source_chunks=memory.count(),
+                         target_chunks=sum(c.count() for c in _targets(memory, migration)))
+    return migration
+
+
+def _check_no_previous(state: Dict):
+    # The state file tracks one set of previous collections; a second cutover would orphan them
+    previous = state.get("previous")
+    if previous:
+        raise ValueError(f"The collections of {previous['model']} from the last cutover still exist; "
+                         f"delete them with 'drop-old' first")
+
+
+def start_migration(memory, model_name: str) -> Dict:
+    """
+    Record a migration to model_name in the state file (or return the one
+    already in progress for the same model). Queries keep using the current
+    collections until cutover(). Refused while a previous cutover's
+    collections have not been dropped.
+    """
+    state = read_embedding_state(memory.persist_dir)
+    migration = state.get("migration")
+    if migration:
+        if migration["model"] != model_name:
+            raise ValueError(f"A migration to {migration['model']} is in progress; finish or abort it first")
+        return migration
+    _check_no_previous(state)
+    if model_name == memory.embedding_model_name:
+        raise ValueError(f"The store already uses {model_name}")
+    suffix = collection_suffix(model_name)
+    if suffix == memory.collection_suffix:
+        suffix += "_v2"
+    migration = {"model": model_name, "suffix": suffix, "shards": memory.shards,
+                 "offsets": [0] * memory.shards, "migrated": 0, "started": datetime.now().isoformat()}
+    state["migration"] = migration
+    write_embedding_state(memory.persist_dir, state)
+    return migration
+
+
+def _checked_migration(memory) -> Dict:
+    migration = read_embedding_state(memory.persist_dir).get("migration")
+    if not migration:
+        raise ValueError("No migration in progress (start one with 'run --model MODEL')")
+    if migration["shards"] != memory.shards:
+        raise ValueError(f"Migration was started with {migration['shards']} shards, memory has {memory.shards}")
+    return migration
+
+
+def run_migration(memory, batch_size: int = MIGRATION_BATCH_SIZE, backend: str = EMBEDDING_BACKEND,
+                  threads: int = EMBEDDING_THREADS, max_chunks: Optional[int] = None) -> Dict:
+    """
+    Re-embed stored chunk text (no PDFs) with the migration's model into its
+    own collections, shard by shard in insertion order. The read offset is
+    checkpointed in the state file after every batch and upserts are
+    idempotent, so an interrupted run resumes where it stopped. Chunks added
+    to the store meanwhile are picked up by later runs; sync() catches the
+    rest before cutover.
+    """
+    migration = _checked_migration(memory)
+    model = load_embedding_model(migration["model"], backend, threads)
+    targets = _targets(memory, migration)
+    total = memory.count()
+    start = time.perf_counter()
+    migrated = 0
+
+    with span("embedding_migration", model=migration["model"]) as s:
+        for shard, (source, target) in enumerate(zip(memory.collections, targets)):
+            while max_chunks is None or migrated < max_chunks:
+                offset = migration["offsets"][shard]
+                batch = source.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+                if not batch["ids"]:
+                    break
+                with span("embed", texts=len(batch["ids"])):
+                    embeddings = model.encode(batch["documents"], batch_size=memory.embedding_batch_size,
+                                              convert_to_numpy=True)
+                target.upsert(ids=batch["ids"], embeddings=embeddings, documents=batch["documents"],
+                              metadatas=batch["metadatas"])
+
+                migration["offsets"][shard] = offset + len(batch["ids"])
+                migration["migrated"] += len(batch["ids"])
+                migrated += len(batch["ids"])
+                state = read_embedding_state(memory.persist_dir)
+                state["migration"] = migration
+                write_embedding_state(memory.persist_dir, state)
+                _progress(sum(migration["offsets"]), total, start, migrated)
+        s.set(chunks=migrated)
+
+    seconds = time.perf_counter() - start
+    print(f"\n✅ Re-embedded {migrated:,} chunks in {seconds:.1f}s ({migrated / max(seconds, 1e-9):,.0f} chunks/s)")
+    return {"chunks": migrated, "seconds": seconds, "done": sum(migration["offsets"]) >= total}
+
+
+def sync_migration(memory, batch_size: int = MIGRATION_BATCH_SIZE, backend: str = EMBEDDING_BACKEND,
+                   threads: int = EMBEDDING_THREADS) -> Dict:
+    """
+    Reconcile the new collections with the live ones: re-embed chunks that
+    are missing or whose text changed (deletes shift the offsets a run
+    resumes from), copy changed metadata, and delete chunks that no longer
+    exist. Only the differences are embedded.
+    """
+    migration = _checked_migration(memory)
+    model = None
+    targets = _targets(memory, migration)
+    stats = {"embedded": 0, "metadata": 0, "deleted": 0}
+
+    with span("embedding_migration_sync"):
+        for source, target in zip(memory.collections, targets):
+            offset = 0
+            while True:
+                batch = source.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+                if not batch["ids"]:
+                    break
+                offset += len(batch["ids"])
+                current = target.get(ids=batch["ids"], include=["documents", "metadatas"])
+                current = {chunk_id: (document, metadata) for chunk_id, document, metadata
+                           in zip(current["ids"], current["documents"], current["metadatas"])}
+
+                embed_rows, metadata_rows = [], []
+                for i, chunk_id in enumerate(batch["ids"]):
+                    if chunk_id not in current or current[chunk_id][0] != batch["documents"][i]:
+                        embed_rows.append(i)
+                    elif current[chunk_id][1] != batch["metadatas"][i]:
+                        metadata_rows.append(i)
+
+                def metadata_for(i):
+                    # Chroma merges metadata on write: clear keys the live chunk no longer has
+                    metadata = dict(batch["metadatas"][i] or {})
+                    old = current.get(batch["ids"][i], (None, {}))[1] or {}
+                    metadata.update({key: None for key in old if key not in metadata})
+                    return metadata
+
+                if embed_rows:
+                    if model is None:
+                        model = load_embedding_model(migration["model"], backend, threads)
+                    documents = [batch["documents"][i] for i in embed_rows]
+                    target.upsert(ids=[batch["ids"][i] for i in embed_rows],
+                                  embeddings=model.encode(documents, batch_size=memory.embedding_batch_size,
+                                                          convert_to_numpy=True),
+                                  documents=documents, metadatas=[metadata_for(i) for i in embed_rows])
+                    stats["embedded"] += len(embed_rows)
+                if metadata_rows:
+                    target.update(ids=[batch["ids"][i] for i in metadata_rows],
+                                  metadatas=[metadata_for(i) for i in metadata_rows])
+                    stats["metadata"] += len(metadata_rows)
+
+            offset = 0
+            while True:
+                batch = target.get(limit=batch_size, offset=offset, include=[])
+                if not batch["ids"]:
+                    break
+                live = set(source.get(ids=batch["ids"], include=[])["ids"])
+                gone = [chunk_id for chunk_id in batch["ids"] if chunk_id not in live]
+                if gone:
+                    target.delete(ids=gone)
+                    stats["deleted"] += len(gone)
+                offset += len(batch["ids"]) - len(gone)
+    return stats
+
+
+def compare_indexes(memory, queries: List[str], k: int = 5, backend: str = EMBEDDING_BACKEND,
+                    threads: int = EMBEDDING_THREADS) -> Dict:
+    """
+    Shadow-read: run the queries against the live and the migrated
+    collections and report how much their top-k chunks overlap.
+    """
+    migration = _checked_migration(memory)
+    model = load_embedding_model(migration["model"], backend, threads)
+    targets = _targets(memory, migration)
+    old_embeddings = memory.embedding_model.encode(queries).tolist()
+    new_embeddings = model.encode(queries).tolist()
+
+    def top_k(collections, embeddings):
+        hits = [[] for _ in queries]
+        for collection in collections:
+            if collection.count() == 0:
+                continue
+            result = collection.query(query_embeddings=embeddings, n_results=k, include=["distances"])
+            for q in range(len(queries)):
+                hits[q].extend(zip(result["distances"][q], result["ids"][q]))
+        return [[chunk_id for _, chunk_id in sorted(h)[:k]] for h in hits]
+
+    old_hits = top_k(memory.collections, old_embeddings)
+    new_hits = top_k(targets, new_embeddings)
+    overlaps = [len(set(a) & set(b)) / max(1, len(a)) for a, b in zip(old_hits, new_hits)]
+    return {"queries": len(queries), "k": k, "mean_overlap": float(np.mean(overlaps)) if overlaps else None,
+            "old": old_hits, "new": new_hits}
+
+
+def sample_queries(memory, n: int = 20) -> List[str]:
+    """First sentence of a spread of stored chunks, for compare_indexes()"""
+    collection = max(memory.collections, key=lambda c: c.count())
+    total = collection.count()
+    queries = []
+    for offset in np.linspace(0, max(total - 1, 0), num=min(n, total), dtype=int):
+        document = collection.get(limit=1, offset=int(offset), include=["documents"])["documents"][0]
+        queries.append(" ".join(document.split()[:25]))
+    return queries
+
+
+def cutover(memory, batch_size: int = MIGRATION_BATCH_SIZE, backend: str = EMBEDDING_BACKEND,
+            threads: int = EMBEDDING_THREADS) -> Dict:
+    """
+    Finish the migration (catch up on new chunks, then sync) and switch the
+    store to the migrated model and collections with one atomic replace of
+    the state file. The previous collections are kept (see drop_previous());
+    processes already running keep the old ones until restarted. Refused
+    while an earlier cutover's collections are still kept.
+    """
+    _checked_migration(memory)
+    _check_no_previous(read_embedding_state(memory.persist_dir))
+    run_migration(memory, batch_size=batch_size, backend=backend, threads=threads)
+    stats = sync_migration(memory, batch_size=batch_size, backend=backend, threads=threads)
+    print(f"🔁 Synced: {stats['embedded']:,} re-embedded, {stats['metadata']:,} metadata updates, "
+          f"{stats['deleted']:,} deleted")
+    migration = _checked_migration(memory)
+    state = {
+        "model": migration["model"],
+        "suffix": migration["suffix"],
+        "switched": datetime.now().isoformat(),
+        "previous": {"model": memory.embedding_model_name, "suffix": memory.collection_suffix,
+                     "shards": memory.shards},
+    }
+    write_embedding_state(memory.persist_dir, state)
+    return state
+
+
+def drop_previous(memory) -> List[str]:
+    """Delete the collections a cutover switched away from"""
+    state = read_embedding_state(memory.persist_dir)
+    previous = state.get("previous")
+    if not previous:
+        return []
+    existing = {c.name for c in memory.client.list_collections()}
+    dropped = [name for name in collection_names(previous["shards"], previous["suffix"]) if name in existing]
+    for name in dropped:
+        memory.client.delete_collection(name)
+    state.pop("previous")
+    write_embedding_state(memory.persist_dir, state)
+    return dropped
+
+
+def abort_migration(memory) -> List[str]:
+    """Forget the migration in progress and delete its collections"""
+    state = read_embedding_state(memory.persist_dir)
+    migration = state.pop("migration", None)
+    if not migration:
+        return []
+    existing = {c.name for c in memory.client.list_collections()}
+    dropped = [name for name in collection_names(migration["shards"], migration["suffix"]) if name in existing]
+    for name in dropped:
+        memory.client.delete_collection(name)
+    write_embedding_state(memory.persist_dir, state)
+    return dropped
@@ -0,0 +1,76 @@
+import time
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from memory.embeddings import load_reranker
+from utils.tracing import span
+from utils.metrics import counter, histogram
+from config import RERANK_MODEL, RERANK_BATCH_SIZE, RERANK_BUDGET_MS, RERANK_THREADS, EMBEDDING_BACKEND
+
+RERANK_SECONDS = histogram("rerank_seconds", "Cross-encoder reranking time per query")
+RERANK_CANDIDATES = counter("rerank_candidates_total", "Reranking candidates, scored or left in vector order "
+                            "because the latency budget ran out", ["result"])
+
+
+class Reranker:
+    """
+    Rescores vector-search candidates with a cross-encoder, which reads query
+    and passage together and ranks far better than embedding cosine alone.
+    Candidates are scored in batches in their vector-search order until the
+    latency budget would be exceeded; the scored ones are sorted by score and
+    the rest follow in their original order. The model loads on first use.
+    """
+
+    def __init__(self, model_name: str = RERANK_MODEL, batch_size: int = RERANK_BATCH_SIZE,
+                 budget_ms: Optional[float] = RERANK_BUDGET_MS, threads: int = RERANK_THREADS,
+                 embedding_backend: str = EMBEDDING_BACKEND):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.threads = threads
+        self.embedding_backend = embedding_backend
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with span("init", component="reranker"):
+                        self._model = load_reranker(self.model_name, self.threads, self.embedding_backend)
+        return self._model
+
+    def rerank(self, query: str, contexts: List[Dict], top_n: int) -> List[Dict]:
+        """
+        Best top_n of contexts (get_relevant_context() dicts, best vector match
+        first) by cross-encoder score. Scored contexts get a "rerank_score".
+        The first batch is always scored; later batches only if the time of the
+        previous one still fits in the budget.
+        """
+        if not contexts:
+            return []
+        model = self.model
+        budget = self.budget_ms / 1000 if self.budget_ms else None
+        scores = []
+        with span("rerank", candidates=len(contexts)) as s, RERANK_SECONDS.time():
+            start = time.perf_counter()
+            batch_seconds = 0.0
+            for offset in range(0, len(contexts), self.batch_size):
+                elapsed = time.perf_counter() - start
+                if offset and budget is not None and elapsed + batch_seconds > budget:
+                    break
+                batch_start = time.perf_counter()
+                pairs = [(query, ctx["text"]) for ctx in contexts[offset:offset + self.batch_size]]
+                scores.extend(np.asarray(model.predict(pairs, batch_size=self.batch_size)).ravel().tolist())
+                batch_seconds = time.perf_counter() - batch_start
+            s.set(scored=len(scores))
+        RERANK_CANDIDATES.inc(len(scores), result="scored")
+        RERANK_CANDIDATES.inc(len(contexts) - len(scores), result="unscored")
+
+        scored = [dict(ctx, rerank_score=float(score)) for ctx, score in zip(contexts, scores)]
+        # Stable sort: ties keep their vector-search order
+        scored.sort(key=lambda ctx: -ctx["rerank_score"])
+        return (scored + contexts[len(scores):])[:top_n]
@@ -0,0 +1,75 @@
+from typing import List, Dict, Optional
+
+import numpy as np
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length (zero rows stay zero)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def mmr_select(query_embedding, candidate_embeddings, k: int, lambda_mult: float = 0.5,
+               groups: Optional[List[str]] = None, max_per_group: Optional[int] = None) -> List[int]:
+    """
+    Maximal Marginal Relevance over candidate embeddings, fully vectorized.
+    Greedily picks the candidate maximizing
+        lambda * sim(query, c) - (1 - lambda) * max_{s in selected} sim(c, s)
+    keeping a running max-similarity vector so each step is one matrix-vector
+    product. Optional groups/max_per_group cap how many picks share a group
+    (e.g. at most 2 chunks per paper). Returns indices into the candidates.
+    """
+    candidates = normalize(np.asarray(candidate_embeddings, dtype=np.float32))
+    n = candidates.shape[0]
+    if n == 0 or k <= 0:
+        return []
+
+    query = normalize(np.asarray(query_embedding, dtype=np.float32).reshape(-1))
+    relevance = candidates @ query
+    max_redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+
+    group_ids = None
+    if groups is not None and max_per_group:
+        _, group_ids = np.unique(np.asarray(groups), return_inverse=True)
+        group_counts = np.zeros(group_ids.max() + 1, dtype=np.int32)
+
+    selected = []
+    for _ in range(min(k, n)):
+        redundancy = np.where(np.isfinite(max_redundancy), max_redundancy, 0.0)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            break
+
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_redundancy, candidates @ candidates[best], out=max_redundancy)
+
+        if group_ids is not None:
+            group = group_ids[best]
+            group_counts[group] += 1
+            if group_counts[group] >= max_per_group:
+                available[group_ids == group] = False
+
+    return selected
+
+
+def group_contexts_by_paper(contexts: List[Dict]) -> List[Dict]:
+    """
+    Group retrieved chunks by source paper, ordering papers by their best
+    chunk's similarity. Returns [{"paper_id", "title", "contexts": [...]}].
+    """
+    papers = {}
+    for ctx in contexts:
+        paper_id = ctx["source"].get("paper_id", "unknown")
+        paper = papers.setdefault(paper_id, {
+            "paper_id": paper_id,
+            "title": ctx["source"].get("title", "Unknown Title"),
+            "best_similarity": ctx.get("similarity", 0.0),
+            "contexts": [],
+        })
+        paper["contexts"].append(ctx)
+        paper["best_similarity"] = max(paper["best_similarity"], ctx.get("similarity", 0.0))
+    return sorted(papers.values(), key=lambda p: -p["best_similarity"])
@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+
+from utils.tracing import span
+
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+VECTORS = "vectors.f32"
+RECORDS = "records.jsonl"
+
+
+def _open_records(path: str, mode: str, compress: bool):
+    if compress:
+        return gzip.open(path + ".gz", mode + "t", encoding="utf-8", compresslevel=3)
+    return open(path, mode, encoding="utf-8")
+
+
+def _dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def export_snapshot(memory, output_dir: str, batch_size: int = 2000, compress: bool = False) -> Dict:
+    """
+    Write every chunk in memory to a columnar snapshot directory:
+      vectors.f32      row-major float32 embeddings (count x dim), appended batch by batch
+      records.jsonl    one {"id", "document", "metadata"} line per row, same order
+      manifest.json    count, dim, embedding model and format version (written last)
+    Only one batch is held in memory, so stores larger than RAM can be exported.
+    Sharded stores are exported shard by shard into the same files, and the
+    import routes each row to its shard again, so a snapshot can also move a
+    store to a different shard count.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)  # an interrupted export must not look complete
+
+    start = time.perf_counter()
+    count = 0
+    dim = None
+    with span("snapshot_export") as s, \
+            open(os.path.join(output_dir, VECTORS), "wb") as vectors_file, \
+            _open_records(os.path.join(output_dir, RECORDS), "w", compress) as records_file:
+        for collection in memory.collections:
+            offset = 0
+            while True:
+                batch = collection.get(limit=batch_size, offset=offset,
+                                       include=["embeddings", "documents", "metadatas"])
+                if not batch["ids"]:
+                    break
+                embeddings = np.asarray(batch["embeddings"], dtype=np.float32)
+                dim = embeddings.shape[1]
+                vectors_file.write(np.ascontiguousarray(embeddings).tobytes())
+                for chunk_id, document, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"]):
+                    records_file.write(json.dumps({"id": chunk_id, "document": document, "metadata": metadata},
+                                                  ensure_ascii=False) + "\n")
+                count += len(batch["ids"])
+                offset += len(batch["ids"])
+                print(f"   📤 Exported {count:,} chunks...", end="\r")
+        s.set(chunks=count)
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "count": count,
+        "dim": dim,
+        "dtype": "float32",
+        "embedding_model": memory.embedding_model_name,
+        "records": RECORDS + (".gz" if compress else ""),
+        "created": datetime.now().isoformat(),
+    }
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    seconds = time.perf_counter() - start
+    size = _dir_size(output_dir)
+    print(f"\n✅ Snapshot exported: {count:,} chunks, {size / 1e6:.1f} MB in {seconds:.1f}s "
+          f"({size / 1e6 / max(seconds, 1e-9):.1f} MB/s)")
+    return {"chunks": count, "bytes": size, "seconds": seconds}
+
+
+def import_snapshot(memory, input_dir: str, batch_size: int = 2000) -> Dict:
+    """
+    Bulk-load a snapshot written by export_snapshot. Embeddings are read
+    through a memory map and inserted with their stored vectors (no
+    re-embedding); upserts make an interrupted import safe to re-run.
+    """
+    manifest_path = os.path.join(input_dir, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"{input_dir} is not a complete snapshot (missing {MANIFEST})")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest["version"] != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest['version']}")
+    if manifest["embedding_model"] != memory.embedding_model_name:
+        raise ValueError(f"Snapshot was embedded with {manifest['embedding_model']}, "
+                         f"but memory uses {memory.embedding_model_name}")
+
+    count, dim = manifest["count"], manifest["dim"]
+    if count == 0:
+        print("⚠️ Snapshot is empty, nothing to import.")
+        return {"chunks": 0, "bytes": 0, "seconds": 0.0}
+    vectors = np.memmap(os.path.join(input_dir, VECTORS), dtype=np.float32, mode="r", shape=(count, dim))
+
+    start = time.perf_counter()
+    records_path = os.path.join(input_dir, manifest["records"])
+    compressed = records_path.endswith(".gz")
+    row = 0
+    with span("snapshot_import", chunks=count), \
+            _open_records(records_path[:-3] if compressed else records_path, "r", compressed) as records_file:
+        ids, documents, metadatas = [], [], []
+        for line in records_file:
+            record = json.loads(line)
+            ids.append(record["id"])
+            documents.append(record["document"])
+            metadatas.append(record["metadata"])
+            if len(ids) == batch_size:
+                memory.upsert_chunks(ids, np.asarray(vectors[row:row + len(ids)]), documents, metadatas)
+                row += len(ids)
+                ids, documents, metadatas = [], [], []
+                print(f"   📥 Imported {row:,}/{count:,} chunks...", end="\r")
+        if ids:
+            memory.upsert_chunks(ids, np.asarray(vectors[row:row + len(ids)]), documents, metadatas)
+            row += len(ids)
+
+    seconds = time.perf_counter() - start
+    size = _dir_size(input_dir)
+    print(f"\n✅ Snapshot imported: {row:,} chunks, {size / 1e6:.1f} MB in {seconds:.1f}s "
+          f"({size / 1e6 / max(seconds, 1e-9):.1f} MB/s)")
+    return {"chunks": row, "bytes": size, "seconds": seconds}
@@ -1,27 +1,342 @@
+import os
+import re
+import json
 import chromadb
 from chromadb.config import Settings
 import uuid
+import hashlib
 from typing import List, Dict, Optional
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+from memory.embeddings import load_embedding_model
+from utils.tracing import span
+from utils.metrics import counter, histogram
+from memory.retrieval import mmr_select
+from memory.dedup import DuplicateIndex, minhash_signature
+from memory.citation_graph import CitationGraph
+from memory.exact_index import ExactIndex
+from memory.rerank import Reranker
+from utils.text_chunker import chunk_text, merge_chunks
+from config import (EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_THREADS, EMBEDDING_BATCH_SIZE,
+                    SNAPSHOT_BATCH_SIZE, VECTOR_DB_SHARDS, VECTOR_DB_ENGINE, DEDUP_THRESHOLD, BULK_BATCH_PAPERS,
+                    RERANK_ENABLED, RERANK_FETCH_K)
+
+COLLECTION_NAME = "research_papers"
+ENGINES = ("chroma", "exact")
+# Which embedding model and collections the store uses once migrate_embeddings.py
+# has switched it (absent: EMBEDDING_MODEL and the unsuffixed collections)
+EMBEDDING_STATE = "embedding_state.json"
+# Metadata kept on every chunk (what retrieval and prompts read); the full
+# paper metadata is stored once, on the paper's first chunk
+CHUNK_METADATA_KEYS = ("paper_id", "title")
+
+EMBED_SECONDS = histogram("embed_seconds", "Time spent in the embedding model per encode call", ["kind"])
+EMBEDDED_TEXTS = counter("embedded_texts_total", "Texts embedded (chunks when storing, queries when searching)",
+                         ["kind"])
+VECTOR_QUERY_SECONDS = histogram("vector_query_seconds", "Vector search latency per query batch", ["engine"])
+VECTOR_QUERIES = counter("vector_queries_total", "Query vectors searched", ["engine"])
+VECTOR_WRITE_SECONDS = histogram("vector_write_seconds", "Time to write a paper's chunks to the vector store")
+CHUNKS_STORED = counter("chunks_stored_total", "Chunks written by store_paper()")
+
+def read_embedding_state(persist_dir: str) -> Dict:
+    path = os.path.join(persist_dir, EMBEDDING_STATE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_embedding_state(persist_dir: str, state: Dict):
+    """Replace the state file atomically (readers see the old or the new state, never half of it)"""
+    path = os.path.join(persist_dir, EMBEDDING_STATE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def collection_suffix(model_name: str) -> str:
+    """Collection name suffix for chunks embedded with model_name"""
+    return "_" + re.sub(r"[^a-zA-Z0-9]+", "_", model_name.split("/")[-1]).strip("_").lower()
+
+def collection_names(shards: int, suffix: str = "") -> List[str]:
+    if shards == 1:
+        return [COLLECTION_NAME + suffix]
+    return [f"{COLLECTION_NAME}{suffix}_shard_{i}" for i in range(shards)]
+
+def shard_index(paper_id: str, shards: int) -> int:
+    """Stable shard for a paper (same answer in every process, unlike hash())"""
+    return int(hashlib.md5(paper_id.encode("utf-8")).hexdigest(), 16) % shards
+
+def chunk_position(chunk_id: str) -> int:
+    """Index of a chunk within its paper ("<paper_id>_<i>")"""
+    index = chunk_id.rsplit("_", 1)[-1]
+    return int(index) if index.isdigit() else 0
+
+def merge_chunk_metadata(metadatas: List[Dict]) -> Dict:
+    """Paper metadata from its chunks' metadata (full on the first chunk, slim on the rest)"""
+    merged = {}
+    for metadata in metadatas:
+        merged.update(metadata or {})
+    return merged
+
+def merge_contexts(contexts: List[Dict]) -> List[Dict]:
+    """
+    Coalesce retrieved chunks into contiguous passages: each paper's chunks are
+    put in reading order, repeated ids dropped, and runs of neighbouring
+    positions joined with merge_chunks() so the words chunk_text() repeats
+    between consecutive chunks appear once. A passage is its best hit's context
+    dict with the joined "text" and the "ids" it covers; passages are ordered
+    by similarity. Chunks marked "expanded" (see expand_contexts) only add text.
+    """
+    by_paper = {}
+    for ctx in contexts:
+        by_paper.setdefault(ctx["id"].rsplit("_", 1)[0], {}).setdefault(ctx["id"], ctx)
+
+    passages = []
+    for chunks in by_paper.values():
+        run = []
+        for ctx in sorted(chunks.values(), key=lambda c: chunk_position(c["id"])):
+            if run and chunk_position(ctx["id"]) > chunk_position(run[-1]["id"]) + 1:
+                passages.append(_passage(run))
+                run = []
+            run.append(ctx)
+        passages.append(_passage(run))
+    return sorted(passages, key=lambda p: -p.get("similarity", 0.0))
+
+def _passage(run: List[Dict]) -> Dict:
+    best = max((ctx for ctx in run if not ctx.get("expanded")), key=lambda c: c.get("similarity", 0.0),
+               default=run[0])
+    return dict(best, text=merge_chunks([ctx["text"] for ctx in run]), ids=[ctx["id"] for ctx in run])
+
+def _paper_filter(filter_dict: Optional[Dict]):
+    """
+    Papers a filter restricts to: None for no filter, a list of paper_ids for
+    paper_id equality / $in filters, False for anything else
+    """
+    if not filter_dict:
+        return None
+    if set(filter_dict) != {"paper_id"}:
+        return False
+    value = filter_dict["paper_id"]
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict) and len(value) == 1:
+        if isinstance(value.get("$eq"), str):
+            return [value["$eq"]]
+        if isinstance(value.get("$in"), list):
+            return value["$in"]
+    return False
+
+def _paper_scope(filter_dict: Optional[Dict]) -> Optional[str]:
+    """paper_id of a filter that pins a single paper, else None"""
+    if not filter_dict:
+        return None
+    value = filter_dict.get("paper_id")
+    if isinstance(value, dict):
+        value = value.get("$eq")
+    return value if isinstance(value, str) else None
 
 class ResearchMemory:
-    def __init__(self, persist_dir: str = "./chroma_db"):
+    def __init__(self, persist_dir: str = "./chroma_db", shards: int = VECTOR_DB_SHARDS,
+                 embedding_backend: str = EMBEDDING_BACKEND, embedding_threads: int = EMBEDDING_THREADS,
+                 embedding_batch_size: int = EMBEDDING_BATCH_SIZE, engine: str = VECTOR_DB_ENGINE,
+                 rerank: bool = RERANK_ENABLED):
         """
         Initialize ChromaDB for storing research papers
+        - shards: number of collections chunks are spread over (1 = the single
+          "research_papers" collection). Papers are routed by a hash of their id.
+        - embedding_backend/threads/batch_size: CPU inference settings for the
+          embedding model (see memory/embeddings.py)
+        - engine: "chroma" searches Chroma's HNSW index; "exact" searches a
+          brute-force ExactIndex kept next to it (see memory/exact_index.py)
+        - rerank: rescore get_relevant_context() candidates with a cross-encoder
+          by default (see memory/rerank.py)
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}' (choose from {', '.join(ENGINES)})")
+        self.persist_dir = persist_dir
         self.client = chromadb.PersistentClient(path=persist_dir)
+        # Model and collections switched to by an embedding migration, if any
+        state = read_embedding_state(persist_dir)
+        self.collection_suffix = state.get("suffix", "")
+        # MinHash LSH index of stored papers, for near-duplicate (version) detection
+        self.duplicates = DuplicateIndex(os.path.join(persist_dir, "dedup.sqlite"))
+        # Parsed references and in-library citation links
+        self.citations = CitationGraph(os.path.join(persist_dir, "citations.sqlite"))
 
         #Initialize the sentence transformer model
-        #use the same model the chromadb is using it
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-        # Create collection for research papers
-        self.collection = self.client.get_or_create_collection(
-            name="research_papers",
-            metadata={"hnsw:space": "cosine"}
-        )
+        #same model as chromadb's default, so stores written before explicit embeddings stay compatible
+        self.embedding_model_name = state.get("model", EMBEDDING_MODEL)
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_model = load_embedding_model(self.embedding_model_name, embedding_backend, embedding_threads)
+        
+        # Create collection(s) for research papers
+        self.shards = max(1, shards)
+        names = collection_names(self.shards, self.collection_suffix)
+        self.collections = [
+            self.client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+            for name in names
+        ]
+        # Unsharded callers keep using .collection directly
+        self.collection = self.collections[0] if self.shards == 1 else None
+        self._pool = ThreadPoolExecutor(max_workers=self.shards) if self.shards > 1 else None
+
+        if self.shards > 1 and COLLECTION_NAME in [c.name for c in self.client.list_collections()]:
+            if self.client.get_collection(COLLECTION_NAME).count():
+                print(f"⚠️ Unsharded '{COLLECTION_NAME}' collection is not searched in sharded mode; "
+                      f"move it with snapshot_memory.py export/import")
+
+        self.rerank = rerank
+        self.reranker = Reranker(embedding_backend=embedding_backend)
+
+        self.engine = engine
+        self.exact = None
+        if engine == "exact":
+            self.exact = ExactIndex(os.path.join(persist_dir, "exact_index" + self.collection_suffix))
+            if self.exact.count() != self.count():
+                self.rebuild_exact_index()
+
+    def _collection_for(self, paper_id: str):
+        return self.collections[shard_index(paper_id, self.shards)]
+
+    def _target_collections(self, filter_dict: Optional[Dict]) -> List:
+        """Collections a read has to touch: only the owning shard for paper-scoped filters"""
+        paper_id = _paper_scope(filter_dict)
+        if paper_id is not None and self.shards > 1:
+            return [self._collection_for(paper_id)]
+        return self.collections
+
+    def _map_shards(self, fn, collections: List) -> List:
+        if len(collections) == 1 or self._pool is None:
+            return [fn(c) for c in collections]
+        return list(self._pool.map(fn, collections))
+
+    def count(self) -> int:
+        """Total chunks across all shards"""
+        return sum(self._map_shards(lambda c: c.count(), self.collections))
+
+    def stored_paper_ids(self, batch_size: int = SNAPSHOT_BATCH_SIZE) -> List[str]:
+        """Ids of all stored papers, from chunk ids alone, read in pages (no documents or metadata)"""
+        paper_ids = {}
+        for collection in self.collections:
+            offset = 0
+            while True:
+                batch = collection.get(limit=batch_size, offset=offset, include=[])
+                if not batch["ids"]:
+                    break
+                paper_ids.update(dict.fromkeys(chunk_id.rsplit("_", 1)[0] for chunk_id in batch["ids"]))
+                offset += len(batch["ids"])
+        return list(paper_ids)
+
+    def get_chunks(self, where: Optional[Dict] = None, include: Optional[List[str]] = None) -> Dict:
+        """
+        collection.get() across shards, concatenated into one Chroma-style result
+        (ids, documents, metadatas, ... as flat lists)
+        """
+        include = include or ["documents", "metadatas"]
+        results = self._map_shards(lambda c: c.get(where=where, include=include),
+                                   self._target_collections(where))
+        merged = {"ids": []}
+        merged.update({field: [] for field in include})
+        for result in results:
+            merged["ids"].extend(result["ids"])
+            for field in include:
+                merged[field].extend(result[field] if result[field] is not None else [])
+        return merged
+
+    def _embed(self, texts, kind: str, **encode_kwargs):
+        """embedding_model.encode() with the embedding metrics recorded"""
+        EMBEDDED_TEXTS.inc(1 if isinstance(texts, str) else len(texts), kind=kind)
+        with EMBED_SECONDS.time(kind=kind):
+            return self.embedding_model.encode(texts, **encode_kwargs)
+
+    def _query(self, query_embeddings: List, n_results: int, where: Optional[Dict], include: List[str]) -> Dict:
+        """Search with the configured engine (the exact index when it can apply the filter)"""
+        engine = "exact" if self.exact is not None and _paper_filter(where) is not False else "chroma"
+        VECTOR_QUERIES.inc(len(query_embeddings), engine=engine)
+        with VECTOR_QUERY_SECONDS.time(engine=engine):
+            if engine == "exact":
+                return self._exact_query(query_embeddings, n_results, where, include)
+            return self._chroma_query(query_embeddings, n_results, where, include)
+
+    def _chroma_query(self, query_embeddings: List, n_results: int, where: Optional[Dict], include: List[str]) -> Dict:
+        """
+        collection.query() fanned out over the relevant shards in parallel;
+        each shard returns its own top n_results and the lists are merged by
+        distance so the result matches a single-collection query.
+        """
+        collections = self._target_collections(where)
+        if len(collections) == 1:
+            return collections[0].query(query_embeddings=query_embeddings, n_results=n_results,
+                                        where=where, include=include)
+
+        def query_shard(collection):
+            if collection.count() == 0:
+                return None
+            return collection.query(query_embeddings=query_embeddings, n_results=n_results,
+                                    where=where, include=include)
+
+        results = [r for r in self._map_shards(query_shard, collections) if r is not None]
+        fields = ["ids"] + include
+        merged = {field: [] for field in fields}
+        for q in range(len(query_embeddings)):
+            hits = []
+            for result in results:
+                for i in range(len(result["ids"][q])):
+                    hits.append({field: result[field][q][i] for field in fields})
+            hits.sort(key=lambda hit: hit["distances"])
+            for field in fields:
+                merged[field].append([hit[field] for hit in hits[:n_results]])
+        return merged
     
+    def _exact_query(self, query_embeddings: List, n_results: int, where: Optional[Dict], include: List[str]) -> Dict:
+        """
+        _query() answered by the ExactIndex; documents and metadata of the hits
+        are then fetched from Chroma in one get() per shard.
+        """
+        hits = self.exact.search(query_embeddings, n_results, paper_ids=_paper_filter(where))
+
+        by_shard = {}
+        for query_hits in hits:
+            for hit in query_hits:
+                by_shard.setdefault(shard_index(hit["paper_id"], self.shards), set()).add(hit["id"])
+        records = {}
+        fields = [field for field in ("documents", "metadatas") if field in include]
+        if fields:
+            for shard, ids in by_shard.items():
+                result = self.collections[shard].get(ids=list(ids), include=fields)
+                for i, chunk_id in enumerate(result["ids"]):
+                    records[chunk_id] = {field: result[field][i] for field in fields}
+
+        merged = {field: [] for field in ["ids"] + include}
+        for query_hits in hits:
+            query_hits = [hit for hit in query_hits if hit["id"] in records or not fields]
+            merged["ids"].append([hit["id"] for hit in query_hits])
+            for field in fields:
+                merged[field].append([records[hit["id"]][field] for hit in query_hits])
+            if "distances" in include:
+                merged["distances"].append([1 - hit["similarity"] for hit in query_hits])
+            if "embeddings" in include:
+                merged["embeddings"].append([hit["embedding"] for hit in query_hits])
+        return merged
+
+    def rebuild_exact_index(self, batch_size: int = SNAPSHOT_BATCH_SIZE) -> int:
+        """Reload the ExactIndex from the embeddings stored in Chroma; returns the chunk count"""
+        print(f"🔨 Building exact search index from {self.count():,} stored chunks...")
+        self.exact.clear()
+        for collection in self.collections:
+            offset = 0
+            while True:
+                batch = collection.get(limit=batch_size, offset=offset, include=["embeddings", "metadatas"])
+                if not batch["ids"]:
+                    break
+                paper_ids = [(m or {}).get("paper_id") or chunk_id.rsplit("_", 1)[0]
+                             for chunk_id, m in zip(batch["ids"], batch["metadatas"])]
+                self.exact.add(batch["ids"], paper_ids, batch["embeddings"])
+                offset += len(batch["ids"])
+        return self.exact.count()
+
     def store_paper(self, content: str, metadata: Dict, chunks: List[str] = None) -> str:
         """
         Store a research paper in the database
@@ -37,28 +352,264 @@ class ResearchMemory:
         # Add paper_id to metadata for easier retrieval
         paper_metadata = metadata.copy()
         paper_metadata["paper_id"] = paper_id
+        chunk_metadata = {key: paper_metadata[key] for key in CHUNK_METADATA_KEYS if key in paper_metadata}
         
-        self.collection.add(
-            documents=documents,
-            metadatas=[paper_metadata] * len(documents),
-            ids=[f"{paper_id}_{i}" for i in range(len(documents))]
-        )
+        # Embed with our own model so backend, threads and batch size are controlled here
+        with span("embed", texts=len(documents), batch_size=self.embedding_batch_size):
+            embeddings = self._embed(documents, "chunk", batch_size=self.embedding_batch_size,
+                                     convert_to_numpy=True)
+
+        with span("store", chunks=len(documents), bytes=sum(len(d) for d in documents)), \
+                VECTOR_WRITE_SECONDS.time():
+            self._collection_for(paper_id).add(
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=[paper_metadata] + [chunk_metadata] * (len(documents) - 1),
+                ids=[f"{paper_id}_{i}" for i in range(len(documents))]
+            )
+            if self.exact is not None:
+                self.exact.add([f"{paper_id}_{i}" for i in range(len(documents))],
+                               [paper_id] * len(documents), embeddings)
+        CHUNKS_STORED.inc(len(documents))
+
+        with span("dedup_index"):
+            self.duplicates.add(paper_id, minhash_signature(content), metadata.get("title"))
+        self.citations.add_paper(paper_id, metadata.get("title"), metadata.get("doi"))
         
         return paper_id
+
+    def find_near_duplicates(self, content: str, threshold: float = DEDUP_THRESHOLD,
+                             exclude: Optional[str] = None) -> List[Dict]:
+        """
+        Stored papers that are near-duplicates (other versions) of this text,
+        most similar first: [{"paper_id", "title", "similarity", "added"}]
+        """
+        with span("dedup_lookup"):
+            return self.duplicates.query(minhash_signature(content), threshold=threshold, exclude=exclude)
+
+    def _paper_chunks(self, paper_ids: List[str], include: List[str],
+                      batch_size: int = BULK_BATCH_PAPERS):
+        """
+        Chunks of many papers with one get() per shard and batch of papers.
+        Yields {paper_id: [(chunk_id, {field: value}), ...]} per batch, chunks in order.
+        """
+        by_shard = {}
+        for paper_id in dict.fromkeys(paper_ids):
+            by_shard.setdefault(shard_index(paper_id, self.shards), []).append(paper_id)
+        for shard, shard_papers in by_shard.items():
+            for start in range(0, len(shard_papers), batch_size):
+                batch = shard_papers[start:start + batch_size]
+                result = self.collections[shard].get(where={"paper_id": {"$in": batch}}, include=include)
+                chunks = {}
+                for i, chunk_id in enumerate(result["ids"]):
+                    paper_id = result["metadatas"][i]["paper_id"] if "metadatas" in include \
+                        else chunk_id.rsplit("_", 1)[0]
+                    chunks.setdefault(paper_id, []).append(
+                        (chunk_id, {field: result[field][i] for field in include}))
+                for paper_chunks in chunks.values():
+                    paper_chunks.sort(key=lambda chunk: chunk_position(chunk[0]))
+                yield shard, chunks
+
+    def delete_papers(self, paper_ids: List[str], batch_size: int = BULK_BATCH_PAPERS) -> int:
+        """
+        Delete all chunks of many papers (and their near-duplicate signatures
+        and citation-graph entries), one get + delete per shard and batch of
+        papers. Returns the number of chunks removed.
+        """
+        removed = 0
+        with span("delete_papers", papers=len(paper_ids)) as s:
+            for shard, chunks in self._paper_chunks(paper_ids, include=[], batch_size=batch_size):
+                ids = [chunk_id for paper_chunks in chunks.values() for chunk_id, _ in paper_chunks]
+                if ids:
+                    self.collections[shard].delete(ids=ids)
+                    if self.exact is not None:
+                        self.exact.remove(ids)
+                removed += len(ids)
+            for paper_id in paper_ids:
+                self.duplicates.remove(paper_id)
+                self.citations.remove_paper(paper_id)
+            s.set(chunks=removed)
+        return removed
+
+    def delete_paper(self, paper_id: str) -> int:
+        """
+        Delete all chunks of a paper (and its near-duplicate signature).
+        Returns the number of chunks removed.
+        """
+        return self.delete_papers([paper_id])
+
+    def update_papers_metadata(self, updates: Dict[str, Dict], batch_size: int = BULK_BATCH_PAPERS) -> int:
+        """
+        Patch the metadata of many papers: {paper_id: {key: value}}, a value of
+        None removes the key. Keys every chunk carries (CHUNK_METADATA_KEYS)
+        are updated on all chunks, the rest only on the first chunk, with one
+        get + update per shard and batch of papers. Returns papers updated.
+        """
+        if any("paper_id" in patch for patch in updates.values()):
+            raise ValueError("paper_id cannot be changed")
+        updated = 0
+        with span("update_metadata", papers=len(updates)):
+            for shard, chunks in self._paper_chunks(list(updates), include=["metadatas"], batch_size=batch_size):
+                ids, metadatas = [], []
+                for paper_id, paper_chunks in chunks.items():
+                    patch = updates[paper_id]
+                    shared = {key: value for key, value in patch.items() if key in CHUNK_METADATA_KEYS}
+                    for position, (chunk_id, _) in enumerate(paper_chunks):
+                        if position == 0:
+                            ids.append(chunk_id)
+                            metadatas.append(patch)
+                        elif shared:
+                            ids.append(chunk_id)
+                            metadatas.append(shared)
+                    if "title" in patch or "doi" in patch:
+                        paper_metadata = merge_chunk_metadata([m["metadatas"] for _, m in paper_chunks] + [patch])
+                        self.citations.add_paper(paper_id, paper_metadata.get("title"), paper_metadata.get("doi"))
+                    updated += 1
+                if ids:
+                    self.collections[shard].update(ids=ids, metadatas=metadatas)
+        return updated
+
+    def update_paper_metadata(self, paper_id: str, updates: Dict) -> bool:
+        """
+        Patch one paper's metadata (e.g. processed flags). Returns False if the paper isn't stored.
+        """
+        return self.update_papers_metadata({paper_id: updates}) == 1
+
+    def replace_chunks(self, new_chunks: Dict[str, List[str]], batch_size: int = BULK_BATCH_PAPERS) -> int:
+        """
+        Replace the chunks of many papers ({paper_id: [chunk text, ...]}),
+        keeping their ids and metadata. New chunks are embedded in one batched
+        pass per batch of papers, written with one upsert per shard, and
+        chunks beyond the new count are deleted. Returns chunks written.
+        """
+        written = 0
+        for shard, chunks in self._paper_chunks(list(new_chunks), include=["metadatas"], batch_size=batch_size):
+            ids, documents, metadatas, paper_ids, stale = [], [], [], [], []
+            for paper_id, paper_chunks in chunks.items():
+                paper_metadata = merge_chunk_metadata([m["metadatas"] for _, m in paper_chunks])
+                slim = {key: paper_metadata[key] for key in CHUNK_METADATA_KEYS if key in paper_metadata}
+                old = {chunk_id: m["metadatas"] for chunk_id, m in paper_chunks}
+                for i, document in enumerate(new_chunks[paper_id]):
+                    chunk_id = f"{paper_id}_{i}"
+                    metadata = dict(paper_metadata if i == 0 else slim)
+                    # Upserts merge metadata: clear keys the chunk had but shouldn't keep
+                    metadata.update({key: None for key in old.get(chunk_id, {}) if key not in metadata})
+                    ids.append(chunk_id)
+                    documents.append(document)
+                    metadatas.append(metadata)
+                    paper_ids.append(paper_id)
+                stale.extend(chunk_id for chunk_id in old if chunk_position(chunk_id) >= len(new_chunks[paper_id]))
+            if not ids:
+                continue
+
+            with span("embed", texts=len(documents), batch_size=self.embedding_batch_size):
+                embeddings = self._embed(documents, "chunk", batch_size=self.embedding_batch_size,
+                                         convert_to_numpy=True)
+            with span("store", chunks=len(documents)):
+                collection = self.collections[shard]
+                collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+                if stale:
+                    collection.delete(ids=stale)
+                if self.exact is not None:
+                    self.exact.add(ids, paper_ids, embeddings)
+                    self.exact.remove(stale)
+            written += len(ids)
+        return written
+
+    def rechunk(self, chunk_size: int = 1000, overlap: int = 200, paper_ids: Optional[List[str]] = None,
+                batch_size: int = BULK_BATCH_PAPERS) -> Dict:
+        """
+        Re-split stored papers with new chunk settings. Each paper's text is
+        rebuilt from its stored chunks (overlaps removed), so no PDF is read.
+        Works through the library in batches of papers; returns
+        {"papers", "old_chunks", "new_chunks"}.
+        """
+        if paper_ids is None:
+            paper_ids = self.stored_paper_ids()
+        stats = {"papers": 0, "old_chunks": 0, "new_chunks": 0}
+        for start in range(0, len(paper_ids), batch_size):
+            batch = paper_ids[start:start + batch_size]
+            new_chunks = {}
+            for _, chunks in self._paper_chunks(batch, include=["documents"], batch_size=batch_size):
+                for paper_id, paper_chunks in chunks.items():
+                    text = merge_chunks([fields["documents"] for _, fields in paper_chunks])
+                    new_chunks[paper_id] = chunk_text(text, chunk_size=chunk_size, overlap=overlap)
+                    stats["old_chunks"] += len(paper_chunks)
+            stats["new_chunks"] += self.replace_chunks(new_chunks, batch_size=batch_size)
+            stats["papers"] += len(new_chunks)
+            print(f"   ✂️ Re-chunked {min(start + batch_size, len(paper_ids)):,}/{len(paper_ids):,} papers...", end="\r")
+        print()
+        return stats
+
+    def index_missing_signatures(self) -> int:
+        """
+        Add near-duplicate signatures for papers stored before the index
+        existed. Returns how many papers were indexed.
+        """
+        indexed = set(self.duplicates.paper_ids())
+        added = 0
+        for metadata in self.get_all_paper_metadata():
+            paper_id = metadata.get("paper_id")
+            if not paper_id or paper_id in indexed:
+                continue
+            paper = self.get_paper_by_id(paper_id)
+            if paper:
+                self.duplicates.add(paper_id, minhash_signature(paper["content"]), metadata.get("title"))
+                added += 1
+        return added
     
+    def upsert_chunks(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict]):
+        """
+        Bulk insert/overwrite chunks with precomputed embeddings (no re-embedding).
+        Used by snapshot import; rows are routed to their paper's shard.
+        """
+        by_shard = {}
+        paper_ids = []
+        for row, metadata in enumerate(metadatas):
+            paper_id = metadata.get("paper_id") or ids[row].rsplit("_", 1)[0]
+            paper_ids.append(paper_id)
+            by_shard.setdefault(shard_index(paper_id, self.shards), []).append(row)
+
+        for shard, rows in by_shard.items():
+            self.collections[shard].upsert(
+                ids=[ids[r] for r in rows],
+                embeddings=[embeddings[r] for r in rows],
+                documents=[documents[r] for r in rows],
+                metadatas=[metadatas[r] for r in rows]
+            )
+        if self.exact is not None:
+            self.exact.add(ids, paper_ids, embeddings)
+
+    def export_snapshot(self, output_dir: str, batch_size: int = SNAPSHOT_BATCH_SIZE, compress: bool = False) -> Dict:
+        """
+        Stream the whole collection to a portable snapshot directory (see memory/snapshot.py)
+        """
+        from memory.snapshot import export_snapshot
+        return export_snapshot(self, output_dir, batch_size=batch_size, compress=compress)
+
+    def import_snapshot(self, input_dir: str, batch_size: int = SNAPSHOT_BATCH_SIZE) -> Dict:
+        """
+        Bulk-load a snapshot directory, reusing its stored embeddings
+        """
+        from memory.snapshot import import_snapshot
+        return import_snapshot(self, input_dir, batch_size=batch_size)
+
     def search_similar_papers(self, query: str, n_results: int = 5) -> List[Dict]:
         """
         Search for papers similar to the query
         """
 
         #Generate the query for user embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
+        with span("embed", texts=1):
+            query_embedding = self._embed(query, "query").tolist()
 
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            include=["documents", "metadatas", "distances"]
-        )
+        with span("retrieve", n_results=n_results, shards=self.shards):
+            results = self._query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=None,
+                include=["documents", "metadatas", "distances"]
+            )
         
         # Process results
         papers = []
@@ -78,7 +629,7 @@ class ResearchMemory:
         """
         try:
             # Get all chunks for this paper
-            results = self.collection.get(
+            results = self._collection_for(paper_id).get(
                 where={"paper_id": paper_id},
                 include=["documents", "metadatas"]
             )
@@ -89,12 +640,27 @@ class ResearchMemory:
                 return {
                     "id": paper_id,
                     "content": full_content,
-                    "metadata": results["metadatas"][0]  # Metadata is same for all chunks
+                    "metadata": merge_chunk_metadata(results["metadatas"])
                 }
         except:
             return None
         return None
     
+    def get_papers_metadata(self, paper_ids: List[str]) -> Dict[str, Dict]:
+        """
+        {paper_id: metadata} read from each paper's first chunk, which carries the
+        full metadata; one get() per shard and no document text
+        """
+        by_shard = {}
+        for paper_id in paper_ids:
+            by_shard.setdefault(shard_index(paper_id, self.shards), []).append(f"{paper_id}_0")
+        found = {}
+        for shard, ids in by_shard.items():
+            result = self.collections[shard].get(ids=ids, include=["metadatas"])
+            for chunk_id, metadata in zip(result["ids"], result["metadatas"]):
+                found[chunk_id.rsplit("_", 1)[0]] = metadata or {}
+        return found
+
     def get_all_paper_metadata(self) -> List[Dict]:
         """
         Retrieve metadata for all papers (fast, for listing only)
@@ -102,7 +668,7 @@ class ResearchMemory:
         """
         try:
             # Get all items but only include metadatas
-            results = self.collection.get(include=["metadatas"])
+            results = self.get_chunks(include=["metadatas"])
         
             if not results["ids"]:
                 return []
@@ -112,10 +678,9 @@ class ResearchMemory:
         
             for metadata in results["metadatas"]:
                 paper_id = metadata.get("paper_id")
-                if paper_id and paper_id not in unique_papers:
-                    # Create a copy to avoid modifying original metadata
-                    paper_metadata = metadata.copy()
-                    unique_papers[paper_id] = paper_metadata
+                if paper_id:
+                    # Merge chunks: only the first one carries the full metadata
+                    unique_papers.setdefault(paper_id, {}).update(metadata)
         
             return list(unique_papers.values())
         
@@ -130,7 +695,7 @@ class ResearchMemory:
         """
         try:
             # Get all chunks for this paper
-            results = self.collection.get(
+            results = self._collection_for(paper_id).get(
                 where={"paper_id": paper_id},
                 include=["documents", "metadatas"]
             )
@@ -141,42 +706,133 @@ class ResearchMemory:
                 return {
                     "id": paper_id,
                     "content": full_content,
-                    "metadata": results["metadatas"][0]  # Metadata is same for all chunks
+                    "metadata": merge_chunk_metadata(results["metadatas"])
                 }
         except Exception as e:
             print(f"Error retrieving paper {paper_id}: {e}")
             return None
         return None
     
-    def get_relevant_context(self, query: str, n_results: int = 3, filter_dict: Optional[Dict] = None) -> List[Dict]:
+    def get_relevant_context(self, query: str, n_results: int = 3, filter_dict: Optional[Dict] = None,
+                             rerank: Optional[bool] = None) -> List[Dict]:
         """
         RETRIEVAL FUNCTION FOR CHAT AGENT (RAG)
         Finds the most relevant text passages from the database to answer a query.
-        Returns a list of dicts with the text and its source metadata.
+        Returns a list of dicts with the text, its source metadata, chunk id and similarity.
 
         Args:
             query: The user's question (e.g., "Why did the author use method X?")
             n_results: Number of relevant text chunks to retrieve.
             filter_dict: Optional metadata filter (e.g., {"paper_id": "123..."} to search only one paper)
+            rerank: Over-fetch RERANK_FETCH_K chunks and keep the n_results best by
+                cross-encoder score (default: the memory's rerank setting)
         """
-        # Generate embedding for the query
-        query_embedding = self.embedding_model.encode(query).tolist()
+        return self.get_relevant_contexts([query], n_results=n_results, filter_dict=filter_dict, rerank=rerank)[0]
+
+    def get_relevant_contexts(self, queries: List[str], n_results: int = 3,
+                              filter_dict: Optional[Dict] = None, rerank: Optional[bool] = None) -> List[List[Dict]]:
+        """
+        Batched get_relevant_context: embeds all queries in one pass and runs a
+        single Chroma query. Returns one list of contexts per query.
+        """
+        rerank = self.rerank if rerank is None else rerank
+        fetch_k = max(n_results, RERANK_FETCH_K) if rerank else n_results
+        # Generate embeddings for the queries
+        with span("embed", texts=len(queries)):
+            query_embeddings = self._embed(queries, "query").tolist()
         
         # Query the database
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=filter_dict, # Use the filter if provided
-            include=["documents", "metadatas"]
-        )
+        with span("retrieve", queries=len(queries), n_results=fetch_k, filtered=filter_dict is not None):
+            results = self._query(
+                query_embeddings=query_embeddings,
+                n_results=fetch_k,
+                where=filter_dict, # Use the filter if provided (paper filters hit one shard)
+                include=["documents", "metadatas", "distances"]
+            )
         
         # Format the results for the LLM
-        relevant_contexts = []
-        for i in range(len(results["ids"][0])):
-            context = {
-                "text": results["documents"][0][i],
-                "source": results["metadatas"][0][i] # Includes title, authors, paper_id etc.
-            }
-            relevant_contexts.append(context)
+        all_contexts = []
+        for q in range(len(queries)):
+            relevant_contexts = []
+            for i in range(len(results["ids"][q])):
+                context = {
+                    "id": results["ids"][q][i],
+                    "text": results["documents"][q][i],
+                    "source": results["metadatas"][q][i], # Includes title, authors, paper_id etc.
+                    "similarity": 1 - results["distances"][q][i]
+                }
+                relevant_contexts.append(context)
+            if rerank:
+                relevant_contexts = self.reranker.rerank(queries[q], relevant_contexts, n_results)
+            all_contexts.append(relevant_contexts)
+        
+        return all_contexts
+
+    def expand_contexts(self, contexts: List[Dict], neighbors: int = 1) -> List[Dict]:
+        """
+        Small-to-big retrieval: contexts plus the stored chunks up to `neighbors`
+        positions before and after each hit in the same paper, fetched with one
+        get() per shard. Added chunks carry their hit's source and similarity and
+        are marked "expanded"; pass the result to merge_contexts().
+        """
+        if neighbors <= 0 or not contexts:
+            return contexts
+        present = {ctx["id"] for ctx in contexts}
+        wanted = {}  # neighbour chunk id -> the hit it extends
+        for ctx in contexts:
+            paper_id = ctx["id"].rsplit("_", 1)[0]
+            position = chunk_position(ctx["id"])
+            for neighbor in range(max(0, position - neighbors), position + neighbors + 1):
+                chunk_id = f"{paper_id}_{neighbor}"
+                if chunk_id not in present:
+                    wanted.setdefault(chunk_id, ctx)
+        if not wanted:
+            return contexts
+
+        by_shard = {}
+        for chunk_id in wanted:
+            by_shard.setdefault(shard_index(chunk_id.rsplit("_", 1)[0], self.shards), []).append(chunk_id)
+        expanded = list(contexts)
+        with span("expand", hits=len(contexts), neighbors=len(wanted)):
+            for shard, ids in by_shard.items():
+                result = self.collections[shard].get(ids=ids, include=["documents"])
+                for chunk_id, document in zip(result["ids"], result["documents"]):
+                    hit = wanted[chunk_id]
+                    expanded.append({"id": chunk_id, "text": document, "source": hit["source"],
+                                     "similarity": hit["similarity"], "expanded": True})
+        return expanded
+
+    def get_diverse_context(self, query: str, n_results: int = 8, fetch_k: int = 40,
+                            lambda_mult: float = 0.5, max_per_paper: Optional[int] = 2,
+                            filter_dict: Optional[Dict] = None) -> List[Dict]:
+        """
+        Cross-paper retrieval for library-wide questions. Over-fetches fetch_k
+        chunks, then picks n_results with Maximal Marginal Relevance over the
+        returned embeddings, capping chunks per paper so the answer can draw on
+        many papers without repeating the same passage.
+        """
+        with span("embed", texts=1):
+            query_embedding = self._embed(query, "query")
+        
+        with span("retrieve", n_results=fetch_k, filtered=filter_dict is not None):
+            results = self._query(
+                query_embeddings=[query_embedding.tolist()],
+                n_results=fetch_k,
+                where=filter_dict,
+                include=["documents", "metadatas", "distances", "embeddings"]
+            )
+        
+        if not results["ids"][0]:
+            return []
+        
+        with span("mmr", candidates=len(results["ids"][0])):
+            paper_ids = [m.get("paper_id", "") for m in results["metadatas"][0]]
+            selected = mmr_select(query_embedding, results["embeddings"][0], n_results,
+                                  lambda_mult=lambda_mult, groups=paper_ids, max_per_group=max_per_paper)
         
-        return relevant_contexts
\ No newline at end of file
+        return [{
+            "id": results["ids"][0][i],
+            "text": results["documents"][0][i],
+            "source": results["metadatas"][0][i],
+            "similarity": 1 - results["distances"][0][i]
+        } for i in selected]
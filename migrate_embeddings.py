@@ -0,0 +1,79 @@
+import argparse
+from memory.vector_db import ResearchMemory
+from memory.embeddings import BACKENDS
+from memory.migration import (start_migration, run_migration, migration_status, compare_indexes,
+                              sample_queries, cutover, drop_previous, abort_migration)
+from config import MIGRATION_BATCH_SIZE, VECTOR_DB_SHARDS, EMBEDDING_BACKEND, EMBEDDING_THREADS
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed the stored chunks with another embedding model")
+    parser.add_argument("--persist-dir", default="./chroma_db",
+                       help="ChromaDB directory (default: ./chroma_db)")
+    parser.add_argument("--shards", type=int, default=VECTOR_DB_SHARDS,
+                       help=f"Shard count of the store (default: {VECTOR_DB_SHARDS})")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE,
+                       help=f"Chunks re-embedded per checkpoint (default: {MIGRATION_BATCH_SIZE})")
+    parser.add_argument("--embedding-backend", choices=BACKENDS, default=EMBEDDING_BACKEND,
+                       help=f"CPU backend for the new model (default: {EMBEDDING_BACKEND})")
+    parser.add_argument("--embedding-threads", type=int, default=EMBEDDING_THREADS,
+                       help="Intra-op threads for the new model (0 = library default)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Start or resume re-embedding into new collections")
+    run_parser.add_argument("--model", help="New embedding model (required to start a migration)")
+    run_parser.add_argument("--max-chunks", type=int, help="Stop after about this many chunks (resume later)")
+
+    subparsers.add_parser("status", help="Progress of the migration in progress")
+
+    compare_parser = subparsers.add_parser("compare", help="Run queries on both indexes and report top-k overlap")
+    compare_parser.add_argument("queries", nargs="*", help="Queries (default: sampled from stored chunks)")
+    compare_parser.add_argument("--k", type=int, default=5)
+
+    subparsers.add_parser("cutover", help="Catch up, sync and switch the store to the new model")
+    subparsers.add_parser("drop-old", help="Delete the collections replaced by the last cutover")
+    subparsers.add_parser("abort", help="Forget the migration and delete its collections")
+
+    args = parser.parse_args()
+    memory = ResearchMemory(persist_dir=args.persist_dir, shards=args.shards,
+                            embedding_backend=args.embedding_backend, embedding_threads=args.embedding_threads)
+    model_options = {"backend": args.embedding_backend, "threads": args.embedding_threads}
+
+    try:
+        if args.command == "run":
+            if args.model:
+                migration = start_migration(memory, args.model)
+                print(f"🔄 Migrating {memory.count():,} chunks from {memory.embedding_model_name} to "
+                      f"{migration['model']} (queries keep using {memory.embedding_model_name} until cutover)")
+            result = run_migration(memory, batch_size=args.batch_size, max_chunks=args.max_chunks, **model_options)
+            if result["done"]:
+                print("ℹ️ All chunks re-embedded; run 'compare' to check results, then 'cutover'")
+        elif args.command == "status":
+            status = migration_status(memory)
+            if not status:
+                print(f"ℹ️ No migration in progress (store uses {memory.embedding_model_name})")
+                return
+            done = sum(status["offsets"])
+            print(f"🔄 {memory.embedding_model_name} → {status['model']} (started {status['started']})")
+            print(f"   Read {done:,}/{status['source_chunks']:,} chunks, "
+                  f"{status['target_chunks']:,} in the new collections")
+        elif args.command == "compare":
+            queries = args.queries or sample_queries(memory)
+            result = compare_indexes(memory, queries, k=args.k, **model_options)
+            for query, old, new in zip(queries, result["old"], result["new"]):
+                print(f"   {len(set(old) & set(new))}/{len(old)}  {query[:70]}")
+            print(f"📊 Mean top-{args.k} overlap between old and new index: {result['mean_overlap']:.2f}")
+        elif args.command == "cutover":
+            state = cutover(memory, batch_size=args.batch_size, **model_options)
+            print(f"✅ Store switched to {state['model']}; restart running services to pick it up")
+            print("   Previous collections kept until 'drop-old'")
+        elif args.command == "drop-old":
+            dropped = drop_previous(memory)
+            print(f"🗑️ Dropped {len(dropped)} collection(s): {', '.join(dropped) or 'none'}")
+        else:
+            dropped = abort_migration(memory)
+            print(f"🗑️ Migration aborted, dropped {len(dropped)} collection(s)")
+    except ValueError as e:
+        print(f"❌ {e}")
+
+if __name__ == "__main__":
+    main()
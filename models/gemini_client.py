@@ -1,16 +1,53 @@
 import google.generativeai as genai
 from config import GEMINI_API_KEY, GEMINI_MODEL
+from utils.tracing import span
+from utils.metrics import counter, histogram
+from utils.text_chunker import estimate_tokens
+
+LLM_REQUESTS = counter("gemini_requests_total", "Gemini generate_content calls", ["status"])
+LLM_SECONDS = histogram("gemini_request_seconds", "Gemini generate_content latency")
+LLM_TOKENS = counter("gemini_tokens_total", "Tokens sent to and received from Gemini "
+                     "(usage metadata; ~4 chars/token estimate when absent)", ["direction"])
+LLM_IMAGES = counter("gemini_images_total", "Images attached to Gemini requests")
+
+def _token_counts(response, prompt_chars):
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    response_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is None:
+        prompt_tokens = (prompt_chars + 3) // 4
+    if response_tokens is None:
+        response_tokens = estimate_tokens(response.text)
+    return prompt_tokens, response_tokens
 
 class GeminiClient:
     def __init__(self):
         genai.configure(api_key=GEMINI_API_KEY)
         self.model = genai.GenerativeModel(GEMINI_MODEL)
-    
+
     def generate_content(self, content):
         """Wrapper for Gemini's generate_content with error handling"""
-        try:
-            response = self.model.generate_content(content)
-            return response.text
-        except Exception as e:
-            print(f"Error during Gemini API call: {e}")
-            return None
\ No newline at end of file
+        parts = content if isinstance(content, list) else [content]
+        prompt_chars = sum(len(p) for p in parts if isinstance(p, str))
+        images = sum(1 for p in parts if not isinstance(p, str))
+        with span("llm", prompt_chars=prompt_chars, images=images,
+                  image_bytes=sum(len(p["data"]) for p in parts if isinstance(p, dict) and "data" in p)) as s, \
+                LLM_SECONDS.time():
+            LLM_IMAGES.inc(images)
+            try:
+                response = self.model.generate_content(content)
+                s.set(response_chars=len(response.text))
+                prompt_tokens, response_tokens = _token_counts(response, prompt_chars)
+                LLM_TOKENS.inc(prompt_tokens, direction="prompt")
+                LLM_TOKENS.inc(response_tokens, direction="response")
+                LLM_REQUESTS.inc(status="ok")
+                return response.text
+            except Exception as e:
+                s.set(error=type(e).__name__)
+                LLM_REQUESTS.inc(status="error")
+                print(f"Error during Gemini API call: {e}")
+                return None
+
+    def generate_text(self, prompt):
+        """Text-only request; the processors use this when the original PDF is unavailable"""
+        return self.generate_content(prompt)
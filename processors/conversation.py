@@ -0,0 +1,104 @@
+import re
+from collections import deque
+from typing import List
+
+from config import CHAT_HISTORY_TURNS, CHAT_HISTORY_TOKEN_BUDGET, CHAT_SUMMARY_TOKEN_BUDGET
+from utils.text_chunker import estimate_tokens
+
+# A question that opens like this continues the previous one
+FOLLOW_UP_PREFIXES = ("and ", "what about", "how about")
+# Pronouns that need an antecedent from an earlier turn
+REFERRING_PRONOUNS = {"it", "its", "they", "them", "their", "these", "those", "he", "she", "him", "her"}
+# Words that say nothing about the subject of a question
+QUESTION_FILLER = {
+    "what", "which", "who", "whom", "whose", "how", "why", "when", "where", "is", "are", "was", "were", "be",
+    "been", "do", "does", "did", "can", "could", "would", "should", "will", "has", "have", "had", "the", "a",
+    "an", "of", "in", "on", "for", "to", "with", "by", "from", "as", "at", "about", "and", "or", "you", "me",
+    "please", "more", "much", "many", "there", "this", "that", "i", "we", "our", "so", "than", "into",
+}
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= max_chars else sentence[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+class ConversationMemory:
+    """
+    Rolling state for the interactive Q&A loops. The last few turns are kept
+    verbatim and older turns are folded into a compact extractive summary, so
+    the history block never exceeds a fixed token budget no matter how long
+    the session runs. Folding is local string work, so it adds no LLM calls.
+    """
+
+    def __init__(self, max_turns: int = CHAT_HISTORY_TURNS, token_budget: int = CHAT_HISTORY_TOKEN_BUDGET,
+                 summary_budget: int = CHAT_SUMMARY_TOKEN_BUDGET):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.turns = deque()
+        self.summary_lines: List[str] = []
+
+    def add_turn(self, question: str, answer: str):
+        # A single very long answer is clipped so one turn can't take the whole budget
+        max_answer_chars = max(200, (self.token_budget - self.summary_budget) * 4 // max(self.max_turns, 1))
+        answer = (answer or "").strip()
+        if len(answer) > max_answer_chars:
+            answer = answer[:max_answer_chars].rsplit(" ", 1)[0] + " …"
+        self.turns.append((question.strip(), answer))
+
+        while len(self.turns) > self.max_turns or (len(self.turns) > 1 and self.token_count() > self.token_budget):
+            self._fold(*self.turns.popleft())
+
+    def _fold(self, question: str, answer: str):
+        self.summary_lines.append(f"- Asked: {_first_sentence(question, 160)} Answer: {_first_sentence(answer, 200)}")
+        while len(self.summary_lines) > 1 and estimate_tokens("\n".join(self.summary_lines)) > self.summary_budget:
+            self.summary_lines.pop(0)
+
+    def token_count(self) -> int:
+        return estimate_tokens(self.render())
+
+    def render(self) -> str:
+        """History block for the prompt (empty string before the first turn)"""
+        if not self.turns and not self.summary_lines:
+            return ""
+        parts = []
+        if self.summary_lines:
+            parts.append("Summary of earlier turns:\n" + "\n".join(self.summary_lines))
+        if self.turns:
+            parts.append("Recent turns:\n" + "\n".join(f"User: {q}\nAssistant: {a}" for q, a in self.turns))
+        return "\n\n".join(parts)
+
+    def is_follow_up(self, question: str) -> bool:
+        """
+        True when the question continues the previous turn: it opens with a
+        continuation phrase ("and ...", "what about ...") or leans on a pronoun
+        without naming a subject of its own ("how does it compare to the
+        baseline?"). Standalone questions such as "What does this paper propose
+        as its main contribution?" are not rewritten.
+        """
+        if not self.turns:
+            return False
+        text = question.lower().strip()
+        if text.startswith(FOLLOW_UP_PREFIXES):
+            return True
+        words = re.findall(r"[a-z']+", text)
+        pronouns = [i for i, word in enumerate(words) if word in REFERRING_PRONOUNS]
+        if not pronouns:
+            return False
+        content = [i for i, word in enumerate(words)
+                   if word not in QUESTION_FILLER and word not in REFERRING_PRONOUNS and len(word) > 2]
+        # The pronoun is the subject (nothing named before it), or the question names almost nothing
+        return not content or pronouns[0] < content[0] or len(content) <= 2
+
+    def rewrite_query(self, question: str) -> str:
+        """
+        Retrieval query for this turn. Follow-ups ("and what about the second
+        experiment?") are expanded with the previous question so the embedding
+        search has the subject the user is referring to.
+        """
+        if not self.is_follow_up(question):
+            return question
+        previous_question, _ = self.turns[-1]
+        return f"{previous_question} {question}"
@@ -0,0 +1,116 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from config import EQUATION_MIN_SYMBOL_DENSITY, EQUATION_DISPLAY_MAX_LINES, EQUATION_CONTEXT_BLOCKS
+from utils.archives import open_pdf
+from utils.tracing import span
+
+# TeX (Computer/Latin Modern, AMS, MathTime, ...), Symbol and OpenType math fonts;
+# body-text fonts such as CMR are deliberately absent
+MATH_FONT_RE = re.compile(r"symbol|cmmi|cmsy|cmex|msam|msbm|eufm|eusm|rsfs|wasy|esint|mtmi|mtsy|mtex|euclid|"
+                          r"stix|math", re.IGNORECASE)
+EQUATION_NUMBER_RE = re.compile(r"\(\d+[a-z]?\)\s*$")
+
+
+def _is_math_char(char: str) -> bool:
+    # ASCII operators (=, +, <) also appear in prose and captions, so they don't count
+    code = ord(char)
+    if code < 0x80:
+        return False
+    return (0x0370 <= code <= 0x03FF          # Greek
+            or 0x2190 <= code <= 0x22FF       # arrows, mathematical operators
+            or 0x27C0 <= code <= 0x2AFF       # supplemental arrows and operators
+            or 0x1D400 <= code <= 0x1D7FF     # mathematical alphanumerics
+            or unicodedata.category(char) == "Sm")
+
+
+def _block_stats(block: Dict) -> Tuple[str, int, int]:
+    """(text, non-space chars, math chars) of a text block from page.get_text("dict")"""
+    lines = []
+    chars = math = 0
+    for line in block["lines"]:
+        for text_span in line["spans"]:
+            text = text_span["text"]
+            visible = sum(1 for c in text if not c.isspace())
+            chars += visible
+            math += visible if MATH_FONT_RE.search(text_span["font"]) else sum(1 for c in text if _is_math_char(c))
+        lines.append("".join(text_span["text"] for text_span in line["spans"]))
+    return "\n".join(lines), chars, math
+
+
+def _is_equation_block(block: Dict, text: str, chars: int, math: int, page_width: float) -> bool:
+    if not math or not chars:
+        return False
+    if math / chars >= EQUATION_MIN_SYMBOL_DENSITY:
+        return True
+    # Display equations: a few short lines set off from the margins, or numbered "(n)"
+    x0, _, x1, _ = block["bbox"]
+    centered = abs((x0 + x1) / 2 - page_width / 2) < 0.1 * page_width and x1 - x0 < 0.75 * page_width
+    short = len(block["lines"]) <= EQUATION_DISPLAY_MAX_LINES
+    return short and (centered or bool(EQUATION_NUMBER_RE.search(text)))
+
+
+def find_equation_pages(pdf_path: str, context_blocks: int = EQUATION_CONTEXT_BLOCKS,
+                        data: Optional[bytes] = None) -> Tuple[List[Dict], int]:
+    """
+    Pages carrying equations, found from PyMuPDF text spans: blocks set in
+    math fonts or dense in math symbols, or short centered/numbered blocks
+    with any math. Returns ([{"page", "equations", "text"}], page count);
+    text holds the equation blocks and context_blocks text blocks on either
+    side (variable definitions usually follow), or the whole page when
+    context_blocks is negative. data holds the PDF's bytes if already read.
+    """
+    pages = []
+    doc = open_pdf(pdf_path, data)
+    try:
+        for page_num, page in enumerate(doc):
+            blocks = [block for block in page.get_text("dict")["blocks"] if block["type"] == 0]
+            stats = [_block_stats(block) for block in blocks]
+            hits = [i for i, (block, (text, chars, math)) in enumerate(zip(blocks, stats))
+                    if _is_equation_block(block, text, chars, math, page.rect.width)]
+            if not hits:
+                continue
+
+            if context_blocks < 0:
+                keep = range(len(blocks))
+            else:
+                keep = sorted({j for i in hits for j in range(max(0, i - context_blocks),
+                                                                min(len(blocks), i + context_blocks + 1))})
+            parts = []
+            previous = None
+            for i in keep:
+                if previous is not None and i != previous + 1:
+                    parts.append("[...]")
+                parts.append(stats[i][0])
+                previous = i
+            pages.append({"page": page_num + 1, "equations": len(hits), "text": "\n".join(parts)})
+        return pages, len(doc)
+    finally:
+        doc.close()
+
+
+def build_equation_context(pdf_path: str, context_blocks: int = EQUATION_CONTEXT_BLOCKS,
+                           data: Optional[bytes] = None) -> Tuple[Optional[str], Dict]:
+    """
+    Excerpt of the equation-bearing regions of a PDF for the equations
+    section. Returns (context, info); context is None when no equations were
+    found (e.g. scanned pages or equations embedded as images), in which case
+    the caller should send the full text.
+    """
+    info = {"pages": 0, "kept_pages": [], "equations": 0, "fallback_reason": None}
+    with span("equation_prefilter") as s:
+        try:
+            pages, info["pages"] = find_equation_pages(pdf_path, context_blocks, data)
+        except Exception as e:
+            info["fallback_reason"] = f"could not read PDF ({e})"
+            return None, info
+        info["kept_pages"] = [page["page"] for page in pages]
+        info["equations"] = sum(page["equations"] for page in pages)
+        s.set(pages=info["pages"], kept=len(pages), equations=info["equations"])
+        if not pages:
+            info["fallback_reason"] = "no equations detected"
+            return None, info
+
+        context = "\n\n".join(f"[Page {page['page']}]\n{page['text']}" for page in pages)
+        return context, info
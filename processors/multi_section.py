@@ -0,0 +1,124 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
+
+from config import MAX_SECTION_WORKERS, EQUATION_PREFILTER
+from extractors.image_extractor import extract_images_and_captions
+from extractors.citation_extractor import extract_citations_from_references
+from processors.summarizer import get_multimodal_summary_from_gemini
+from processors.section_processor import get_section_from_gemini
+from processors.equation_pages import build_equation_context
+from processors.section_context import (SECTION_QUERIES, build_section_context, build_citation_context,
+                                        report_context_savings)
+from utils.tracing import span
+
+ALL_SECTIONS = ["summary", "methodology", "equations", "citations", "future_scope", "literature_survey"]
+SECTION_ALIASES = {"equation": "equations"}
+
+
+def parse_sections(value: str) -> List[str]:
+    """
+    Parse a --section value: a single section, a comma-separated list
+    ("summary,methodology,equations") or "all". Raises ValueError on unknown names.
+    """
+    if value.strip().lower() == "all":
+        return list(ALL_SECTIONS)
+
+    sections = []
+    for name in value.split(","):
+        name = SECTION_ALIASES.get(name.strip().lower(), name.strip().lower())
+        if not name:
+            continue
+        if name not in ALL_SECTIONS:
+            raise ValueError(f"Unknown section '{name}'. Use one of: {' | '.join(ALL_SECTIONS)} | all")
+        if name not in sections:
+            sections.append(name)
+    return sections
+
+
+def analyze_sections(pdf_path, extracted_text, sections, gemini_client, text_only=False,
+                     max_workers=MAX_SECTION_WORKERS, memory=None, paper_id=None,
+                     retrieval=False, equation_prefilter=EQUATION_PREFILTER, pdf_data=None) -> Dict[str, Dict]:
+    """
+    Run several section analyses for one paper, sharing the extracted inputs.
+    Figures are extracted once up front and the section requests are issued
+    concurrently. With retrieval=True (and the paper stored in memory), narrow
+    sections are sent retrieved excerpts instead of the whole paper. With
+    equation_prefilter (and the PDF available), the equations section is sent
+    only the regions of the pages that carry equations. pdf_data holds the
+    PDF's bytes when already read (archive members), so they are read once.
+    Returns {section: {"result": ..., "latency": seconds}} in the order the
+    sections were requested.
+    """
+    figures = None
+    if "summary" in sections and not text_only:
+        figures = extract_images_and_captions(pdf_path, max_selected=5, manual=False, data=pdf_data)
+
+    def run_section(section):
+        start = time.perf_counter()
+        with span("section", section=section):
+            try:
+                if section == "summary":
+                    result = get_multimodal_summary_from_gemini(
+                        pdf_path, extracted_text, gemini_client, text_only=text_only, figures=figures
+                    )
+                elif section == "citations":
+                    graph = memory.citations if memory is not None and paper_id else None
+                    if graph is not None and graph.has_references(paper_id):
+                        # Parsed and resolved on an earlier run
+                        result = graph.get_references(paper_id)
+                        print(f"♻️ Loaded {len(result)} stored citations")
+                    elif text_only:
+                        # For citations, we need the PDF, so we can't process without it
+                        print("❌ Citations extraction requires original PDF file")
+                        result = None
+                    else:
+                        result = extract_citations_from_references(pdf_path, text=extracted_text, doi_cache=graph)
+                        if graph is not None and result:
+                            graph.store_references(paper_id, result)
+                else:
+                    section_text = extracted_text
+                    context = None
+                    if section == "equations" and equation_prefilter and not text_only:
+                        context, info = build_equation_context(pdf_path, data=pdf_data)
+                        if context:
+                            print(f"🧮 equations: {len(info['kept_pages'])} of {info['pages']} pages carry equations "
+                                  f"({len(info['kept_pages']) / info['pages']:.0%})")
+                            report_context_savings(section, context, extracted_text, via="page prefilter")
+                            section_text = context
+                        else:
+                            print(f"↩️ equations: page prefilter not used ({info['fallback_reason']})")
+                    if context is None and retrieval and memory is not None and paper_id and section in SECTION_QUERIES:
+                        context, info = build_section_context(memory, paper_id, section)
+                        if context:
+                            report_context_savings(section, context, extracted_text)
+                            section_text = context
+                        else:
+                            print(f"↩️ {section}: using full text ({info['fallback_reason']})")
+                    if section == "literature_survey" and memory is not None and paper_id:
+                        related = build_citation_context(memory.citations, paper_id)
+                        if related:
+                            section_text = f"{related}\n\n{section_text}"
+                    result = get_section_from_gemini(
+                        pdf_path, section_text, section, gemini_client, text_only=text_only
+                    )
+            except Exception as e:
+                print(f"❌ Error while processing section '{section}': {e}")
+                result = None
+        return {"result": result, "latency": time.perf_counter() - start}
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sections)))) as pool:
+        futures = {section: pool.submit(run_section, section) for section in sections}
+        results = {section: future.result() for section, future in futures.items()}
+    wall_time = time.perf_counter() - wall_start
+
+    if len(sections) > 1:
+        print("\n⏱️ Section latency:")
+        for section, outcome in results.items():
+            status = "✅" if outcome["result"] else "❌"
+            print(f"   {status} {section:18} {outcome['latency']:.1f}s")
+        sequential = sum(outcome["latency"] for outcome in results.values())
+        print(f"   Total wall time: {wall_time:.1f}s (sum of sections: {sequential:.1f}s)")
+
+    return results
@@ -0,0 +1,123 @@
+from typing import Dict, Optional, Tuple
+
+from config import (SECTION_CONTEXT_MAX_CHARS, SECTION_RETRIEVAL_RESULTS, RETRIEVAL_MIN_SIMILARITY,
+                    CITATION_CONTEXT_HOPS, CITATION_CONTEXT_MAX_PAPERS)
+from utils.text_chunker import estimate_tokens
+from utils.tracing import span
+
+# Queries that pull the passages each section analysis actually needs
+SECTION_QUERIES = {
+    "methodology": [
+        "methodology and proposed approach",
+        "experimental setup, datasets and evaluation metrics",
+        "model architecture, training procedure and implementation details",
+    ],
+    "equations": [
+        "mathematical formulation, equations and objective function",
+        "loss function, optimization and update rule",
+        "definitions of variables and notation",
+    ],
+    "future_scope": [
+        "future work and open problems",
+        "conclusion and limitations of this work",
+        "directions for further research and extensions",
+    ],
+    "literature_survey": [
+        "related work and prior approaches",
+        "background and previous research in this area",
+        "comparison with existing methods and baselines",
+    ],
+}
+
+
+def _chunk_position(chunk_id: str) -> int:
+    """Chunk ids are '<paper_id>_<index>'; the index is the chunk's position in the paper"""
+    try:
+        return int(chunk_id.rsplit("_", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def build_section_context(memory, paper_id: str, section: str, max_chars: int = SECTION_CONTEXT_MAX_CHARS,
+                          n_results: int = SECTION_RETRIEVAL_RESULTS,
+                          min_similarity: float = RETRIEVAL_MIN_SIMILARITY) -> Tuple[Optional[str], Dict]:
+    """
+    Assemble a bounded excerpt of one paper for a section analysis using
+    section-specific retrieval queries. Returns (context, info); context is
+    None when the section has no queries or retrieval confidence is too low,
+    in which case the caller should send the full text.
+    """
+    info = {"section": section, "chunks": 0, "best_similarity": None, "fallback_reason": None}
+    queries = SECTION_QUERIES.get(section)
+    if not queries:
+        info["fallback_reason"] = "no section queries"
+        return None, info
+
+    with span("section_context", section=section) as s:
+        results = memory.get_relevant_contexts(queries, n_results=n_results, filter_dict={"paper_id": paper_id})
+
+        # Merge hits across queries, keeping each chunk's best score
+        best = {}
+        for contexts in results:
+            for ctx in contexts:
+                if ctx["id"] not in best or ctx["similarity"] > best[ctx["id"]]["similarity"]:
+                    best[ctx["id"]] = ctx
+
+        if not best:
+            info["fallback_reason"] = "no chunks retrieved"
+            return None, info
+
+        info["best_similarity"] = max(ctx["similarity"] for ctx in best.values())
+        if info["best_similarity"] < min_similarity:
+            info["fallback_reason"] = f"best similarity {info['best_similarity']:.2f} < {min_similarity}"
+            return None, info
+
+        # Fill the budget with the highest-scoring chunks, then restore reading order
+        selected = []
+        used = 0
+        for ctx in sorted(best.values(), key=lambda c: -c["similarity"]):
+            if selected and used + len(ctx["text"]) > max_chars:
+                continue
+            selected.append(ctx)
+            used += len(ctx["text"])
+        selected.sort(key=lambda c: _chunk_position(c["id"]))
+
+        context = "\n\n[...]\n\n".join(ctx["text"] for ctx in selected)
+        info["chunks"] = len(selected)
+        s.set(chunks=len(selected), chars=len(context))
+        return context, info
+
+
+def report_context_savings(section: str, context: str, full_text: str, via: str = "retrieval"):
+    """Print the prompt-size comparison between the selected context and the full paper"""
+    retrieved_tokens = estimate_tokens(context)
+    full_tokens = estimate_tokens(full_text)
+    saved = 1 - retrieved_tokens / full_tokens if full_tokens else 0
+    print(f"📉 {section}: ~{retrieved_tokens:,} prompt tokens via {via} vs ~{full_tokens:,} "
+          f"for the full text ({saved:.0%} smaller)")
+
+
+def build_citation_context(graph, paper_id: str, hops: int = CITATION_CONTEXT_HOPS,
+                           max_papers: int = CITATION_CONTEXT_MAX_PAPERS) -> Optional[str]:
+    """
+    Block listing library papers linked to this one in the citation graph
+    (direct citations in both directions, then further hops), for the
+    literature survey prompt. None when the paper has no in-library links.
+    """
+    cites, cited_by = set(graph.cites(paper_id)), set(graph.cited_by(paper_id))
+    neighborhood = graph.neighborhood(paper_id, hops=hops)
+    if not neighborhood:
+        return None
+
+    ranked = sorted(neighborhood.items(), key=lambda item: item[1])[:max_papers]
+    titles = graph.titles([p for p, _ in ranked])
+    lines = []
+    for linked_id, distance in ranked:
+        if linked_id in cites:
+            relation = "cited by this paper"
+        elif linked_id in cited_by:
+            relation = "cites this paper"
+        else:
+            relation = f"{distance} citation hops away"
+        lines.append(f"- {titles.get(linked_id, 'Unknown Title')} ({relation})")
+    return "RELATED PAPERS IN OUR LIBRARY (from the citation graph):\n" + "\n".join(lines)
@@ -1,6 +1,7 @@
 from extractors.image_extractor import extract_images_and_captions
+from processors.figure_preprocessor import prepare_figures_for_gemini
 
-def get_multimodal_summary_from_gemini(pdf_path, text_content, gemini_client, similar_papers=None, text_only=False):
+def get_multimodal_summary_from_gemini(pdf_path, text_content, gemini_client, similar_papers=None, text_only=False, figures=None):
     if text_only:
         # Text-only processing mode
         memory_context = ""
@@ -109,8 +110,10 @@ def get_multimodal_summary_from_gemini(pdf_path, text_content, gemini_client, si
         return gemini_client.generate_text(prompt)
     
     else:
-        # Multimodal processing with images
-        figures_text, selected_images = extract_images_and_captions(pdf_path, max_selected=5, manual=False)
+        # Multimodal processing with images (reuse figures already extracted by the caller if given)
+        if figures is None:
+            figures = extract_images_and_captions(pdf_path, max_selected=5, manual=False)
+        figures_text, selected_images = figures
         
         memory_context = ""
         if similar_papers:
@@ -212,7 +215,8 @@ def get_multimodal_summary_from_gemini(pdf_path, text_content, gemini_client, si
         """
         
         content = [prompt, text_content]
-        content.extend(selected_images)
+        figure_parts, _ = prepare_figures_for_gemini(selected_images)
+        content.extend(figure_parts)
         
         print("🧠 Sending comprehensive multimodal analysis request to Gemini...")
         return gemini_client.generate_content(content)
\ No newline at end of file
@@ -0,0 +1,308 @@
+import os
+import sys
+import json
+import math
+import time
+import queue
+import uuid
+import argparse
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models.gemini_client import GeminiClient
+from memory.vector_db import ResearchMemory
+from processors.multi_section import parse_sections
+from processors.conversation import ConversationMemory
+from ingest_papers import ingest_pdfs
+from main import process_stored_paper, save_section_result, answer_paper_question, answer_library_question
+from utils.tracing import span
+from utils.metrics import registry as metrics, histogram
+from config import (SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_LATENCY_WINDOW, SERVER_MAX_SESSIONS,
+                    SERVER_OUTPUT_DIR, RERANK_ENABLED)
+
+
+REQUEST_SECONDS = histogram("server_request_seconds", "Service request latency by endpoint and outcome",
+                            ["endpoint", "status"])
+
+
+class NotFoundError(Exception):
+    pass
+
+
+def _require(body, *fields):
+    """Reject a request body missing a required field (answered with 400)"""
+    for field in fields:
+        if field not in body:
+            raise ValueError(f"Missing field '{field}'")
+
+
+class LatencyStats:
+    """Rolling per-endpoint request latencies with nearest-rank percentiles"""
+
+    def __init__(self, window: int = SERVER_LATENCY_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True):
+        with self.lock:
+            self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self):
+        with self.lock:
+            snapshot = {endpoint: sorted(samples) for endpoint, samples in self.samples.items()}
+            counts, errors = dict(self.counts), dict(self.errors)
+
+        def percentile(values, p):
+            return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+        return {
+            endpoint: {
+                "requests": counts[endpoint],
+                "errors": errors.get(endpoint, 0),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+            for endpoint, values in snapshot.items()
+        }
+
+
+class AnalysisService:
+    """
+    Keeps ResearchMemory (embedding model + Chroma) and GeminiClient loaded and
+    runs requests from a work queue on a fixed number of worker threads, so each
+    request pays only for its own work instead of the CLI's start-up cost.
+    """
+
+    def __init__(self, workers: int = SERVER_WORKERS, persist_dir: str = "./chroma_db", rerank: bool = RERANK_ENABLED,
+                 output_dir: str = SERVER_OUTPUT_DIR):
+        self.started = time.time()
+        self.output_dir = output_dir
+        with span("init", component="gemini"):
+            self.gemini_client = GeminiClient()
+        with span("init", component="memory"):
+            self.memory = ResearchMemory(persist_dir=persist_dir, rerank=rerank)
+
+        self.latency = LatencyStats()
+        self.sessions = OrderedDict()
+        self.sessions_lock = threading.Lock()
+        self.jobs = queue.Queue()
+        self.workers = [threading.Thread(target=self._work, name=f"worker-{i}", daemon=True) for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def _work(self):
+        while True:
+            future, fn, args = self.jobs.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            self.jobs.task_done()
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        self.jobs.put((future, fn, args))
+        return future
+
+    def _conversation(self, session_id: str):
+        """(ConversationMemory, lock) of a session; hold the lock for a whole turn"""
+        with self.sessions_lock:
+            session = self.sessions.pop(session_id, None) or (ConversationMemory(), threading.Lock())
+            self.sessions[session_id] = session
+            while len(self.sessions) > SERVER_MAX_SESSIONS:
+                self.sessions.popitem(last=False)
+            return session
+
+    def _output_path(self, name: str) -> str:
+        """Report path prefix inside output_dir; names carrying a directory are rejected"""
+        if not name or name in (".", "..") or os.path.basename(name) != name or "\\" in name:
+            raise ValueError("output_prefix must be a file name without directories")
+        os.makedirs(self.output_dir, exist_ok=True)
+        return os.path.join(self.output_dir, name)
+
+    # Endpoint implementations (run on worker threads)
+
+    def ingest(self, body):
+        if not body.get("paths"):
+            _require(body, "path")
+        paths = body.get("paths") or [body["path"]]
+        return {"results": ingest_pdfs(paths, memory=self.memory)}
+
+    def search(self, body):
+        _require(body, "query")
+        filter_dict = {"paper_id": body["paper_id"]} if body.get("paper_id") else None
+        rerank = body.get("rerank")
+        if rerank is not None and not isinstance(rerank, bool):
+            raise ValueError("rerank must be true or false")
+        contexts = self.memory.get_relevant_context(body["query"], n_results=int(body.get("n_results", 5)),
+                                                    filter_dict=filter_dict, rerank=rerank)
+        return {"results": contexts}
+
+    def ask(self, body):
+        _require(body, "question")
+        session_id = body.get("session_id") or str(uuid.uuid4())
+        conversation, session_lock = self._conversation(session_id)
+        paper_id = body.get("paper_id")
+        # Turns of one session run one at a time: each reads and extends the same history
+        with session_lock:
+            if paper_id:
+                paper_data = self.memory.get_paper_by_id(paper_id)
+                if not paper_data:
+                    raise NotFoundError(f"Paper {paper_id} not found")
+                turn = answer_paper_question(self.memory, self.gemini_client, paper_id,
+                                             paper_data['metadata'].get('title', 'Unknown Title'),
+                                             body["question"], conversation)
+            else:
+                turn = answer_library_question(self.memory, self.gemini_client, body["question"], conversation)
+
+        if turn is None:
+            return {"session_id": session_id, "answer": None, "sources": []}
+        sources = [{"id": ctx["id"], "title": ctx["source"].get("title", "Unknown"),
+                    "paper_id": ctx["source"].get("paper_id"), "similarity": ctx["similarity"]}
+                   for ctx in turn["contexts"]]
+        return {"session_id": session_id, "answer": turn["answer"], "prompt_tokens": turn["prompt_tokens"],
+                "saved_tokens": turn.get("saved_tokens", 0), "sources": sources}
+
+    def analyze(self, body):
+        _require(body, "paper_id")
+        sections = parse_sections(body.get("section", "summary"))
+        # Validated before the (slow) analysis so a bad name fails fast
+        output_path = self._output_path(body.get("output_prefix") or body["paper_id"]) if body.get("save") else None
+        results = process_stored_paper(body["paper_id"], sections, self.gemini_client, self.memory,
+                                       retrieval=bool(body.get("retrieval")))
+        if results is None:
+            raise NotFoundError(f"Paper {body['paper_id']} not found")
+        if body.get("save"):
+            for section, result in results.items():
+                save_section_result(section, result, output_path)
+        return {"paper_id": body["paper_id"], "results": results}
+
+    def papers(self, body):
+        return {"papers": self.memory.get_all_paper_metadata()}
+
+    def status(self):
+        return {
+            "uptime_s": time.time() - self.started,
+            "workers": len(self.workers),
+            "queue_depth": self.jobs.qsize(),
+            "sessions": len(self.sessions),
+            "chunks": self.memory.count(),
+            "latency": self.latency.summary(),
+        }
+
+
+def make_handler(service: AnalysisService):
+    # Queued endpoints; /status and /metrics are answered inline so they stay responsive under load
+    post_routes = {"/ingest": service.ingest, "/search": service.search,
+                   "/ask": service.ask, "/analyze": service.analyze}
+    get_routes = {"/papers": service.papers}
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            data = json.dumps(payload, default=str).encode("utf-8")
+            self._send_bytes(status, data, "application/json")
+
+        def _send_bytes(self, status, data, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self, routes, read_body):
+            path = self.path.split("?", 1)[0]
+            if path == "/status" and not read_body:
+                self._send(200, service.status())
+                return
+            if path == "/metrics" and not read_body:
+                self._send_bytes(200, metrics.render().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+                return
+            if path not in routes:
+                self._send(404, {"error": f"Unknown endpoint {path}"})
+                return
+
+            start = time.perf_counter()
+            ok = False
+            try:
+                body = {}
+                if read_body:
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    if not isinstance(body, dict):
+                        raise ValueError("Request body must be a JSON object")
+                result = service.submit(routes[path], body).result()
+                ok = True
+                self._send(200, result)
+            except (json.JSONDecodeError, ValueError) as e:
+                self._send(400, {"error": str(e)})
+            except NotFoundError as e:
+                self._send(404, {"error": str(e)})
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+            finally:
+                seconds = time.perf_counter() - start
+                service.latency.record(path, seconds, ok)
+                REQUEST_SECONDS.observe(seconds, endpoint=path, status="ok" if ok else "error")
+
+        def do_GET(self):
+            self._dispatch(get_routes, read_body=False)
+
+        def do_POST(self):
+            self._dispatch(post_routes, read_body=True)
+
+        def log_message(self, format, *args):
+            pass  # the pipeline already logs progress; keep per-request noise out
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the research agent as a long-lived local service")
+    parser.add_argument("--host", default=SERVER_HOST, help=f"Bind address (default: {SERVER_HOST})")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help=f"Port (default: {SERVER_PORT})")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help=f"Requests processed concurrently (default: {SERVER_WORKERS})")
+    parser.add_argument("--persist-dir", default="./chroma_db", help="ChromaDB directory (default: ./chroma_db)")
+    parser.add_argument("--output-dir", default=SERVER_OUTPUT_DIR,
+                        help=f"Directory for reports saved by /analyze (default: {SERVER_OUTPUT_DIR})")
+    parser.add_argument("--rerank", action=argparse.BooleanOptionalAction, default=RERANK_ENABLED,
+                        help="Rescore retrieved chunks with a CPU cross-encoder (per request: \"rerank\" in /search)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if not os.getenv("GEMINI_API_KEY"):
+        print("❌ Error: Gemini API key not found.")
+        return
+
+    print("🔄 Loading models and memory...")
+    init_start = time.perf_counter()
+    service = AnalysisService(workers=args.workers, persist_dir=args.persist_dir, rerank=args.rerank,
+                              output_dir=args.output_dir)
+    print(f"✅ Ready in {time.perf_counter() - init_start:.1f}s")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🚀 Serving on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
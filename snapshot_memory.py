@@ -0,0 +1,40 @@
+import argparse
+from memory.vector_db import ResearchMemory
+from config import SNAPSHOT_BATCH_SIZE, VECTOR_DB_SHARDS
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import research memory snapshots")
+    parser.add_argument("--persist-dir", default="./chroma_db",
+                       help="ChromaDB directory (default: ./chroma_db)")
+    parser.add_argument("--shards", type=int, default=VECTOR_DB_SHARDS,
+                       help=f"Shard count of the store (default: {VECTOR_DB_SHARDS}); importing into a "
+                            "different count re-routes the chunks")
+    parser.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE,
+                       help=f"Chunks per batch (default: {SNAPSHOT_BATCH_SIZE})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write the memory to a snapshot directory")
+    export_parser.add_argument("snapshot_dir", help="Directory to write the snapshot to")
+    export_parser.add_argument("--compress", action="store_true",
+                              help="Gzip the text/metadata records (smaller, slower)")
+
+    import_parser = subparsers.add_parser("import", help="Load a snapshot directory into the memory")
+    import_parser.add_argument("snapshot_dir", help="Snapshot directory written by 'export'")
+
+    args = parser.parse_args()
+    memory = ResearchMemory(persist_dir=args.persist_dir, shards=args.shards)
+
+    if args.command == "export":
+        print(f"📤 Exporting {memory.count():,} chunks to {args.snapshot_dir}...")
+        memory.export_snapshot(args.snapshot_dir, batch_size=args.batch_size, compress=args.compress)
+    else:
+        print(f"📥 Importing snapshot from {args.snapshot_dir}...")
+        try:
+            memory.import_snapshot(args.snapshot_dir, batch_size=args.batch_size)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        print(f"📊 Chunks in memory: {memory.count():,}")
+
+if __name__ == "__main__":
+    main()
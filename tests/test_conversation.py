@@ -0,0 +1,46 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processors.conversation import ConversationMemory
+
+STANDALONE = [
+    "What does this paper propose as its main contribution?",
+    "Which loss function is used?",
+    "Why is batch normalization applied after every convolution layer?",
+    "What are the limitations of the proposed approach?",
+    "How many parameters does the model have?",
+    "What datasets were used for the first experiment?",
+]
+
+FOLLOW_UPS = [
+    "And the second experiment?",
+    "What about the ablation?",
+    "How about on ImageNet?",
+    "How does it compare to the baseline?",
+    "What did they find?",
+    "Can you explain it in more detail?",
+]
+
+
+def _after_one_turn():
+    conversation = ConversationMemory()
+    conversation.add_turn("What training objective does the paper use?", "A contrastive loss.")
+    return conversation
+
+
+def test_first_question_is_never_a_follow_up():
+    assert not ConversationMemory().is_follow_up("How does it compare to the baseline?")
+
+
+def test_standalone_questions_are_not_rewritten():
+    conversation = _after_one_turn()
+    for question in STANDALONE:
+        assert conversation.rewrite_query(question) == question, question
+
+
+def test_follow_ups_are_expanded_with_the_previous_question():
+    conversation = _after_one_turn()
+    for question in FOLLOW_UPS:
+        assert conversation.rewrite_query(question) == f"What training objective does the paper use? {question}", question
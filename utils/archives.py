@@ -0,0 +1,159 @@
+import os
+import queue
+import fnmatch
+import tarfile
+import zipfile
+import threading
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import fitz  # PyMuPDF
+
+from config import ARCHIVE_MAX_MEMBER_BYTES, ARCHIVE_PREFETCH
+
+# Papers ingested from an archive are stored with file_path "<archive>::<member>"
+MEMBER_SEPARATOR = "::"
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class ArchiveMember(NamedTuple):
+    path: str              # "<absolute archive path>::<member name>"
+    size: int              # uncompressed bytes
+    data: Optional[bytes]  # None when the member is larger than the read limit
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def member_path(archive_path: str, name: str) -> str:
+    return f"{os.path.abspath(archive_path)}{MEMBER_SEPARATOR}{name}"
+
+
+def split_member_path(path: str):
+    """(archive path, member name) for an archive member path, else None"""
+    archive_path, separator, name = path.partition(MEMBER_SEPARATOR)
+    return (archive_path, name) if separator and name else None
+
+
+def pdf_exists(path: Optional[str]) -> bool:
+    """Whether a stored file_path can still be opened (for member paths: whether the archive exists)"""
+    if not path:
+        return False
+    member = split_member_path(path)
+    return os.path.exists(member[0] if member else path)
+
+
+def read_member(path: str) -> bytes:
+    """Bytes of one archive member, given its "<archive>::<member>" path"""
+    archive_path, name = split_member_path(path)
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            return archive.read(name)
+    # A tar has no index: looking a member up by name (getmember) lists, and so
+    # decompresses, the whole archive first. Streaming stops at the member instead.
+    with tarfile.open(archive_path, "r|*") as archive:
+        for info in archive:
+            if info.name == name and info.isfile():
+                return archive.extractfile(info).read()
+    raise KeyError(f"{name} is not a file in {archive_path}")
+
+
+def open_pdf(path: str, data: Optional[bytes] = None):
+    """
+    fitz.open() for a PDF on disk or inside an archive (read into memory, not
+    extracted), or for its bytes in data when the caller already read them
+    """
+    if data is not None:
+        return fitz.open(stream=data, filetype="pdf")
+    if split_member_path(path):
+        return fitz.open(stream=read_member(path), filetype="pdf")
+    return fitz.open(path)
+
+
+def _matches(name: str, pattern: str) -> bool:
+    base = name.rsplit("/", 1)[-1]
+    # "._name" entries are macOS resource forks, not PDFs
+    return fnmatch.fnmatch(base, pattern) and not base.startswith("._")
+
+
+def _iter_zip(archive_path: str, pattern: str, max_bytes: int) -> Iterator[ArchiveMember]:
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not _matches(info.filename, pattern):
+                continue
+            data = None
+            if info.file_size <= max_bytes:
+                with archive.open(info) as member:
+                    data = member.read()
+            yield ArchiveMember(member_path(archive_path, info.filename), info.file_size, data)
+
+
+def _iter_tar(archive_path: str, pattern: str, max_bytes: int) -> Iterator[ArchiveMember]:
+    # Stream mode reads members in order without seeking, so a compressed tar is
+    # decompressed once, front to back, and never held in memory as a whole
+    with tarfile.open(archive_path, "r|*") as archive:
+        for info in archive:
+            if not info.isfile() or not _matches(info.name, pattern):
+                continue
+            data = archive.extractfile(info).read() if info.size <= max_bytes else None
+            yield ArchiveMember(member_path(archive_path, info.name), info.size, data)
+
+
+def iter_archive(archive_path: str, pattern: str = "*.pdf",
+                 max_member_bytes: int = ARCHIVE_MAX_MEMBER_BYTES) -> Iterator[ArchiveMember]:
+    """
+    Members of a zip or (compressed) tar archive whose file name matches
+    pattern, read into memory one at a time. Members larger than
+    max_member_bytes are yielded with data None instead of being read.
+    """
+    if zipfile.is_zipfile(archive_path):
+        return _iter_zip(archive_path, pattern, max_member_bytes)
+    return _iter_tar(archive_path, pattern, max_member_bytes)
+
+
+def prefetch(items: Iterable, depth: int = ARCHIVE_PREFETCH) -> Iterator:
+    """
+    Iterate items on a background thread at most depth items ahead of the
+    consumer, so reading and decompressing the next archive members overlaps
+    with ingesting the current one. Errors are re-raised in the consumer.
+    """
+    if depth <= 0:
+        yield from items
+        return
+
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+
+    thread = threading.Thread(target=produce, name="archive-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        # Unblocks the reader if the consumer stopped early
+        stop.set()
+        thread.join()
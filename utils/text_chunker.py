@@ -1,23 +1,53 @@
 import re
 from typing import List, Dict
 from datetime import datetime
+from utils.tracing import span
 
 def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
     """
     Split text into overlapping chunks for better embedding
     """
-    words = text.split()
-    chunks = []
-    
-    for i in range(0, len(words), chunk_size - overlap):
-        chunk = " ".join(words[i:i + chunk_size])
-        chunks.append(chunk)
+    with span("chunk") as s:
+        words = text.split()
+        chunks = []
         
-        # Break early if we're at the end
-        if i + chunk_size >= len(words):
-            break
-    
-    return chunks
+        for i in range(0, len(words), chunk_size - overlap):
+            chunk = " ".join(words[i:i + chunk_size])
+            chunks.append(chunk)
+            
+            # Break early if we're at the end
+            if i + chunk_size >= len(words):
+                break
+        
+        s.set(words=len(words), chunks=len(chunks))
+        return chunks
+
+def merge_chunks(chunks: List[str], min_overlap: int = 8) -> str:
+    """
+    Rebuild the text behind consecutive chunk_text() chunks, dropping the
+    words each chunk repeats from the end of the previous one. Overlaps
+    shorter than min_overlap words are treated as coincidence and kept.
+    """
+    words = []
+    for chunk in chunks:
+        chunk_words = chunk.split()
+        overlap = 0
+        if words and chunk_words:
+            # Longest suffix of the text so far that the chunk starts with
+            start = max(0, len(words) - len(chunk_words))
+            for pos in range(start, len(words) - min_overlap + 1):
+                if words[pos] == chunk_words[0] and words[pos:] == chunk_words[:len(words) - pos]:
+                    overlap = len(words) - pos
+                    break
+        words.extend(chunk_words[overlap:])
+    return " ".join(words)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for prompt budgeting (~4 characters per token for English
+    text with Gemini's tokenizer). Avoids a network round-trip to count_tokens.
+    """
+    return (len(text) + 3) // 4
 
 def extract_paper_metadata(text: str) -> Dict:
     """
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class Span:
+    """A timed pipeline stage. Attributes can be added while the span is open."""
+
+    def __init__(self, name: str, attrs: Dict, parent: Optional["Span"], start: float):
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.start = start
+        self.end = None
+        self.thread_id = threading.get_ident()
+        self.mem_start = 0
+        self.mem_peak = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collects nested timing spans for the pipeline stages (extract, OCR, chunk,
+    embed, store, retrieve, LLM call, render). Disabled tracers cost one
+    attribute check per span, so instrumentation can stay in place permanently.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+
+    def enable(self, track_memory: bool = False):
+        self.enabled = True
+        self.track_memory = track_memory
+        self.spans = []
+        self._origin = time.perf_counter()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        current = Span(name, attrs, parent, time.perf_counter())
+
+        if self.track_memory:
+            # tracemalloc has a single global peak, so fold it into the parent before resetting
+            size, peak = tracemalloc.get_traced_memory()
+            if parent:
+                parent.mem_peak = max(parent.mem_peak, peak)
+            current.mem_start = size
+            tracemalloc.reset_peak()
+
+        stack.append(current)
+        try:
+            yield current
+        except Exception as e:
+            current.set(error=type(e).__name__)
+            raise
+        finally:
+            current.end = time.perf_counter()
+            stack.pop()
+            if self.track_memory:
+                current.mem_peak = max(current.mem_peak, tracemalloc.get_traced_memory()[1])
+                if parent:
+                    parent.mem_peak = max(parent.mem_peak, current.mem_peak)
+                tracemalloc.reset_peak()
+            with self._lock:
+                self.spans.append(current)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Aggregate spans by name: call count, total/max duration and summed numeric attributes"""
+        stages = {}
+        for s in sorted(self.spans, key=lambda s: s.start):
+            duration = s.end - s.start
+            stage = stages.setdefault(s.name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stage["count"] += 1
+            stage["total_ms"] += duration * 1000
+            stage["max_ms"] = max(stage["max_ms"], duration * 1000)
+            for key, value in s.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stage[key] = stage.get(key, 0) + value
+            if self.track_memory:
+                peak = max(s.mem_peak - s.mem_start, 0)
+                stage["peak_mem_bytes"] = max(stage.get("peak_mem_bytes", 0), peak)
+        return stages
+
+    def to_json(self) -> Dict:
+        spans = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            record = {
+                "name": s.name,
+                "start_ms": (s.start - self._origin) * 1000,
+                "duration_ms": (s.end - s.start) * 1000,
+                "depth": s.depth,
+                "parent": s.parent.name if s.parent else None,
+                "thread": s.thread_id,
+                "attrs": s.attrs,
+            }
+            if self.track_memory:
+                record["peak_mem_bytes"] = max(s.mem_peak - s.mem_start, 0)
+            spans.append(record)
+        return {"spans": spans, "summary": self.summary()}
+
+    def to_chrome_trace(self) -> Dict:
+        """Chrome trace-event format, viewable in chrome://tracing or https://ui.perfetto.dev"""
+        pid = os.getpid()
+        events = []
+        for s in self.spans:
+            args = dict(s.attrs)
+            if self.track_memory:
+                args["peak_mem_bytes"] = max(s.mem_peak - s.mem_start, 0)
+            events.append({
+                "name": s.name,
+                "ph": "X",
+                "ts": (s.start - self._origin) * 1e6,
+                "dur": (s.end - s.start) * 1e6,
+                "pid": pid,
+                "tid": s.thread_id,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, path: str, fmt: str = "json"):
+        data = self.to_chrome_trace() if fmt == "chrome" else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+        print(f"⏱️ Profile ({fmt}) saved to: {path}")
+
+    def print_summary(self):
+        stages = self.summary()
+        if not stages:
+            return
+        print(f"\n⏱️ {'stage':20} {'calls':>6} {'total ms':>12} {'max ms':>12}"
+              + (f" {'peak MB':>10}" if self.track_memory else ""))
+        for name, s in sorted(stages.items(), key=lambda item: -item[1]["total_ms"]):
+            line = f"   {name:20} {s['count']:>6} {s['total_ms']:>12.1f} {s['max_ms']:>12.1f}"
+            if self.track_memory:
+                line += f" {s.get('peak_mem_bytes', 0) / 1e6:>10.1f}"
+            print(line)
+
+
+tracer = Tracer()
+
+
+def span(name: str, **attrs):
+    """Open a span on the global tracer: `with span("extract", file=path) as s: ...`"""
+    return tracer.span(name, **attrs)
+
+
+def enable_tracing(track_memory: bool = False):
+    tracer.enable(track_memory=track_memory)
+
+
+def export_trace(path: str, fmt: str = "json"):
+    tracer.print_summary()
+    tracer.export(path, fmt)